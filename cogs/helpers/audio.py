@@ -0,0 +1,313 @@
+# cogs/helpers/audio.py
+"""
+This file contains the audio sources used by the playback path.
+discord.py pulls one 20ms frame (PCM or an Opus packet) at a time from the playing source on its audio thread,
+so a source that owns the next track can switch to it between two frames without a gap, and a source
+that reads ahead on its own thread can cover network stalls instead of blocking that thread.
+"""
+
+import threading
+import logging
+from collections import deque
+from typing import Any, Callable, Optional
+import discord
+from discord.opus import Encoder, OPUS_SILENCE
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+FRAME_SIZE = Encoder.FRAME_SIZE  # Bytes of one 20ms stereo 48kHz s16le frame
+FRAME_SECONDS = Encoder.FRAME_LENGTH / 1000
+
+
+def _cleanup_in_background(source: discord.AudioSource):
+    """Cleans up a finished source without blocking the audio thread (FFmpeg may take a moment to exit)."""
+    threading.Thread(target=source.cleanup, name="audio-cleanup", daemon=True).start()
+
+
+class GaplessSource(discord.AudioSource):
+    """
+    Source that plays a sequence of tracks back to back.
+    The source of the next track is opened ahead of time with queue_next and takes over at the
+    frame boundary where the current track runs out. If no next track is ready, the source ends
+    and the voice client's after callback runs as usual.
+
+    With opus=True every track is an Opus source (e.g. FFmpegOpusAudio passing YouTube's Opus
+    through) and packets are sent as they are; otherwise every track is a PCM source.
+
+    With crossfade seconds and a mixer, PCM tracks overlap: the queued track starts that long before the
+    current one ends, and mixer(outgoing, incoming, start, end) blends their frames while the incoming
+    track's share rises from start to end across the frame.
+
+    Callbacks run on the audio thread and must only hand work over to the event loop:
+        on_near_end(tag): the current track is within lead seconds of its end.
+        on_track_start(tag): a queued track took over from the finished one.
+        accept_next(tag) -> bool: whether the queued track is still the right one to play next.
+    """
+
+    def __init__(self, source: discord.AudioSource, *, duration: Optional[float] = None, tag: Any = None,
+                 offset: float = 0, opus: bool = False, lead: float = 10.0,
+                 crossfade: float = 0.0, mixer: Optional[Callable[[bytes, bytes, float, float], bytes]] = None,
+                 on_near_end: Optional[Callable[[Any], None]] = None,
+                 on_track_start: Optional[Callable[[Any], None]] = None,
+                 accept_next: Optional[Callable[[Any], bool]] = None):
+        self.opus = opus
+        self.lead = lead
+        self.crossfade = crossfade
+        self.mixer = mixer
+        self.on_near_end = on_near_end
+        self.on_track_start = on_track_start
+        self.accept_next = accept_next
+        self._lock = threading.Lock()
+        self._current: Optional[discord.AudioSource] = None
+        self._next: Optional[discord.AudioSource] = None
+        self._next_duration: Optional[float] = None
+        self._next_tag: Any = None
+        self._outgoing: Optional[discord.AudioSource] = None  # Track fading out during a crossfade
+        self._fade_frames = 0
+        self._fade_done = 0
+        self._start(source, duration, tag, offset)
+
+    def _start(self, source: discord.AudioSource, duration: Optional[float], tag: Any, offset: float = 0):
+        """Makes a source the current track. Must be called with the lock held or from __init__."""
+        self._current = source
+        self.duration = duration
+        self.tag = tag
+        self.offset = offset
+        self._frames = 0
+        self._near_end_sent = False
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds played of the current source."""
+        return self._frames * FRAME_SECONDS
+
+    @property
+    def position(self) -> float:
+        """Position in the current track in seconds, counting from the start of the track."""
+        return self.offset + self.elapsed
+
+    def is_opus(self) -> bool:
+        return self.opus
+
+    def _is_frame(self, data: bytes) -> bool:
+        """Returns True if data is a complete frame (any Opus packet, or a full PCM frame)."""
+        return bool(data) if self.opus else len(data) == FRAME_SIZE
+
+    def queue_next(self, source: discord.AudioSource, *, duration: Optional[float] = None, tag: Any = None):
+        """
+        Opens the next track ahead of time, replacing a previously queued one.
+
+        Parameters:
+            source (discord.AudioSource): Source of the next track, of the same kind (PCM or Opus).
+            duration (float, optional): Length of the next track in seconds.
+            tag (Any): Identifies the track in callbacks, e.g. the queue entry.
+        """
+        with self._lock:
+            stale, self._next = self._next, source
+            self._next_duration, self._next_tag = duration, tag
+        if stale is not None:
+            _cleanup_in_background(stale)
+
+    def switch_to(self, source: discord.AudioSource, *, duration: Optional[float] = None, tag: Any = None,
+                  offset: float = 0):
+        """
+        Replaces the current track at the next frame boundary, e.g. for a skip.
+        A queued next track is dropped, because it was queued for the old position.
+
+        Parameters:
+            source (discord.AudioSource): Source of the new track, of the same kind (PCM or Opus).
+            duration (float, optional): Length of the new track in seconds.
+            tag (Any): Identifies the track in callbacks.
+            offset (float): Position in the track the source starts at, e.g. after a seek.
+        """
+        with self._lock:
+            old, stale, outgoing = self._current, self._next, self._outgoing
+            self._next = self._outgoing = None
+            self._start(source, duration, tag, offset)
+        for finished in (old, stale, outgoing):
+            if finished is not None:
+                _cleanup_in_background(finished)
+
+    def _crossfade_due(self) -> bool:
+        """Returns True if the queued track should start fading in now. Must be called with the lock held."""
+        return (self.crossfade > 0 and self.mixer is not None and not self.opus and self._next is not None
+                and self.duration is not None and self._remaining_frames() <= round(self.crossfade / FRAME_SECONDS)
+                and (self.accept_next is None or self.accept_next(self._next_tag)))
+
+    def _remaining_frames(self) -> int:
+        """Returns the frames of the current track left, counting the one just read."""
+        return round((self.duration - self.position) / FRAME_SECONDS) + 1
+
+    def _begin_crossfade(self, data: bytes):
+        """
+        Starts the queued track under the last seconds of the current one. Must be called with the lock held.
+        Returns the frame to play and whether the queued track started.
+        """
+        upcoming, self._next = self._next, None
+        incoming = upcoming.read()
+        if not self._is_frame(incoming):
+            _cleanup_in_background(upcoming)
+            return data, False
+        self._fade_frames = max(1, self._remaining_frames())
+        self._fade_done = 0
+        self._outgoing = self._current
+        self._start(upcoming, self._next_duration, self._next_tag)
+        self._frames = 1
+        return self._mix(data, incoming), True
+
+    def _mix_outgoing(self, incoming: bytes) -> bytes:
+        """Blends the next frame of the fading track into a frame of the new one. Must be called with the lock held."""
+        outgoing = self._outgoing.read()
+        if not self._is_frame(outgoing):
+            _cleanup_in_background(self._outgoing)
+            self._outgoing = None
+            return incoming
+        return self._mix(outgoing, incoming)
+
+    def _mix(self, outgoing: bytes, incoming: bytes) -> bytes:
+        """Mixes one frame of the crossfade, ending it after its last frame."""
+        start = self._fade_done / self._fade_frames
+        self._fade_done += 1
+        data = self.mixer(outgoing, incoming, start, self._fade_done / self._fade_frames)
+        if self._fade_done >= self._fade_frames and self._outgoing is not None:
+            _cleanup_in_background(self._outgoing)
+            self._outgoing = None
+        return data
+
+    def read(self) -> bytes:
+        near_end = started = False
+        with self._lock:
+            data = self._current.read() if self._current is not None else b""
+            if self._is_frame(data):
+                # Silence played while a ReadAheadSource waits for the stream does not move the track on
+                if not getattr(self._current, "underrun", False):
+                    self._frames += 1
+                if (not self._near_end_sent and self.duration is not None
+                        and self.position >= self.duration - self.lead):
+                    self._near_end_sent = near_end = True
+                if self._outgoing is not None:
+                    data = self._mix_outgoing(data)
+                elif self._crossfade_due():
+                    data, started = self._begin_crossfade(data)
+            else:
+                # The current track ended; hand over to the queued one if it is still wanted
+                finished, upcoming = self._current, self._next
+                self._current = self._next = None
+                if upcoming is not None and (self.accept_next is None or self.accept_next(self._next_tag)):
+                    data = upcoming.read()
+                    if self._is_frame(data):
+                        self._start(upcoming, self._next_duration, self._next_tag)
+                        self._frames = 1
+                        started = True
+                    else:
+                        _cleanup_in_background(upcoming)
+                elif upcoming is not None:
+                    _cleanup_in_background(upcoming)
+                if finished is not None:
+                    _cleanup_in_background(finished)
+                if self._outgoing is not None:
+                    _cleanup_in_background(self._outgoing)
+                    self._outgoing = None
+            tag = self.tag
+
+        if near_end and self.on_near_end is not None:
+            self.on_near_end(tag)
+        if started and self.on_track_start is not None:
+            self.on_track_start(tag)
+        return data if self._is_frame(data) else b""
+
+    def cleanup(self):
+        with self._lock:
+            sources = (self._current, self._next, self._outgoing)
+            self._current = self._next = self._outgoing = None
+        for source in sources:
+            if source is not None:
+                source.cleanup()
+
+
+class ReadAheadSource(discord.AudioSource):
+    """
+    Source that reads another source ahead on its own thread into a buffer of up to seconds of frames.
+    The audio thread takes frames from the buffer; if a stalled stream has emptied it, the audio thread
+    gets a frame of silence (an underrun, flagged by underrun until the next read) instead of waiting. Only the first frame is waited for, up to
+    start_timeout seconds, as the wrapped source would have made the audio thread wait for it too.
+    """
+
+    def __init__(self, source: discord.AudioSource, seconds: float = 5.0, start_timeout: float = 10.0):
+        self.source = source
+        self.opus = source.is_opus()
+        self.capacity = max(1, int(seconds / FRAME_SECONDS))
+        self.start_timeout = start_timeout
+        self.underruns = 0
+        self.underrun = False  # True if the last frame read was silence for a stall
+        self._silence = OPUS_SILENCE if self.opus else b"\x00" * FRAME_SIZE
+        self._frames = deque()
+        self._started = False
+        self._ended = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._fill, name="audio-read-ahead", daemon=True)
+        self._thread.start()
+
+    @property
+    def buffered(self) -> int:
+        """Frames waiting in the buffer."""
+        return len(self._frames)
+
+    @property
+    def fill_level(self) -> float:
+        """Share of the buffer that is filled, from 0 to 1."""
+        return len(self._frames) / self.capacity
+
+    def is_opus(self) -> bool:
+        return self.opus
+
+    def _fill(self):
+        """Reads the source until it ends or the source is cleaned up, waiting while the buffer is full."""
+        while True:
+            with self._condition:
+                while len(self._frames) >= self.capacity and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            try:
+                data = self.source.read()
+            except Exception as e:
+                logger.warning(f"ReadAheadSource: Reading the source failed - {e}")
+                data = b""
+            with self._condition:
+                if data and (self.opus or len(data) == FRAME_SIZE):
+                    self._frames.append(data)
+                else:
+                    self._ended = True
+                self._condition.notify_all()
+                if self._ended:
+                    return
+
+    def read(self) -> bytes:
+        with self._condition:
+            if not self._started:
+                self._condition.wait_for(lambda: self._frames or self._ended or self._closed, self.start_timeout)
+                self._started = True
+            self.underrun = False
+            if self._frames:
+                data = self._frames.popleft()
+                self._condition.notify_all()
+                return data
+            if self._ended or self._closed:
+                return b""
+            self.underruns += 1
+            self.underrun = True
+        return self._silence
+
+    def cleanup(self):
+        with self._condition:
+            self._closed = True
+            self._frames.clear()
+            self._condition.notify_all()
+        # Stops FFmpeg, which also ends a read the thread may be blocked in
+        self.source.cleanup()
+        self._thread.join(timeout=1.0)
+        if self.underruns:
+            logger.warning(f"ReadAheadSource: The stream stalled for {self.underruns} frames.")
@@ -0,0 +1,250 @@
+# cogs/helpers/audio_cache.py
+"""
+This file contains the on-disk cache of downloaded audio streams.
+A played track is saved once, keyed by its video id, and later plays read the local file instead of
+streaming it from YouTube again. The cache keeps to a byte budget by deleting the least recently
+played files.
+Disk access of the event loop's callers (lookup_async, remove_async and downloads) runs in the default executor.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import aiohttp
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 16
+
+
+class AudioFileCache:
+    """
+    LRU cache of audio files in one directory, limited to max_bytes.
+    Every track is stored as <video id>.<ext> next to a <video id>.json file with its duration and codec.
+    A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, timeout: float = 300, max_downloads: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_downloads = max_downloads
+        # video id -> (file name, size in bytes, duration, codec), least recently played first
+        self._entries: Optional["OrderedDict[str, Tuple[str, int, Optional[float], Optional[str]]]"] = None
+        self._downloads: Dict[str, asyncio.Task] = {}
+        self._scanning: Optional[asyncio.Future] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the cached files."""
+        return sum(entry[1] for entry in self._load().values())
+
+    def _load(self) -> "OrderedDict[str, Tuple[str, int, Optional[float], Optional[str]]]":
+        """Returns the index of cached files, scanning the directory on first use."""
+        if self._entries is None:
+            self._entries = self._scan()
+        return self._entries
+
+    async def _load_async(self) -> "OrderedDict[str, Tuple[str, int, Optional[float], Optional[str]]]":
+        """Returns the index of cached files like _load, scanning the directory in the default executor."""
+        if self._entries is None:
+            if self._scanning is None:
+                self._scanning = asyncio.get_running_loop().run_in_executor(None, self._scan)
+            entries = await asyncio.shield(self._scanning)
+            if self._entries is None:
+                self._entries = entries
+        return self._entries
+
+    def _scan(self) -> "OrderedDict[str, Tuple[str, int, Optional[float], Optional[str]]]":
+        """Reads the index of cached files from the directory, least recently played first."""
+        found = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        meta = json.load(f)
+                    stat = os.stat(os.path.join(self.directory, meta["file"]))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"AudioFileCache: Ignoring broken entry '{name}' - {e}")
+                    continue
+                entry = (meta["file"], stat.st_size, meta.get("duration"), meta.get("codec"))
+                found.append((stat.st_mtime, name[:-len(".json")], entry))
+        found.sort(key=lambda item: item[0])
+        return OrderedDict((vid, entry) for _, vid, entry in found)
+
+    def lookup(self, video_id: Optional[str]) -> Optional[dict]:
+        """
+        Returns the cached file of a video and marks it as recently played.
+
+        Parameters:
+            video_id (str): The YouTube video id.
+
+        Returns:
+            dict or None: 'url' (local path), 'duration', 'codec' and 'local' True, or None if the video is not cached.
+        """
+        if not self.enabled or not video_id:
+            return None
+        entries = self._load()
+        entry = entries.get(video_id)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry[0])
+        try:
+            os.utime(path)  # The modification time orders the files after a restart
+        except OSError:
+            self.remove(video_id)
+            return None
+        entries.move_to_end(video_id)
+        return {'url': path, 'duration': entry[2], 'codec': entry[3], 'local': True}
+
+    async def lookup_async(self, video_id: Optional[str]) -> Optional[dict]:
+        """
+        Returns the cached file of a video like lookup, without blocking the event loop.
+
+        Parameters:
+            video_id (str): The YouTube video id.
+
+        Returns:
+            dict or None: 'url' (local path), 'duration', 'codec' and 'local' True, or None if the video is not cached.
+        """
+        if not self.enabled or not video_id:
+            return None
+        entries = await self._load_async()
+        entry = entries.get(video_id)
+        if entry is None:
+            return None
+        path = os.path.join(self.directory, entry[0])
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, os.utime, path)
+        except OSError:
+            await self.remove_async(video_id)
+            return None
+        if video_id not in entries:
+            # Evicted while its time was updated
+            return None
+        entries.move_to_end(video_id)
+        return {'url': path, 'duration': entry[2], 'codec': entry[3], 'local': True}
+
+    def schedule(self, video_id: Optional[str], info: dict) -> Optional[asyncio.Task]:
+        """
+        Downloads a video's audio stream in the background unless it is cached or already downloading.
+
+        Parameters:
+            video_id (str): The YouTube video id.
+            info (dict): The yt-dlp information of the stream ('url', 'ext', 'http_headers', 'duration', 'acodec').
+
+        Returns:
+            asyncio.Task or None: The download, or None if nothing was started.
+        """
+        if not self.enabled or not video_id or not info.get("url"):
+            return None
+        if video_id in self._downloads or (self._entries is not None and video_id in self._entries):
+            return None
+        expected = info.get("filesize") or info.get("filesize_approx")
+        if expected and expected > self.max_bytes:
+            return None
+        task = asyncio.ensure_future(self._download(video_id, info))
+        self._downloads[video_id] = task
+        task.add_done_callback(lambda _: self._downloads.pop(video_id, None))
+        return task
+
+    async def _download(self, video_id: str, info: dict):
+        """Saves a stream to a temporary file, then adds it to the cache."""
+        if video_id in await self._load_async():
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_downloads)
+        file = f"{video_id}.{info.get('ext') or 'audio'}"
+        path = os.path.join(self.directory, file)
+        part = path + ".part"
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            try:
+                await loop.run_in_executor(None, lambda: os.makedirs(self.directory, exist_ok=True))
+                size = 0
+                async with aiohttp.ClientSession(timeout=self.timeout) as session:
+                    async with session.get(info["url"], headers=info.get("http_headers")) as response:
+                        response.raise_for_status()
+                        f = await loop.run_in_executor(None, open, part, "wb")
+                        try:
+                            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                                size += len(chunk)
+                                if size > self.max_bytes:
+                                    raise ValueError("larger than the cache")
+                                await loop.run_in_executor(None, f.write, chunk)
+                        finally:
+                            await loop.run_in_executor(None, f.close)
+                await loop.run_in_executor(None, self._save, video_id, file, part, info)
+            except asyncio.CancelledError:
+                await loop.run_in_executor(None, self._discard, part)
+                raise
+            except Exception as e:
+                await loop.run_in_executor(None, self._discard, part)
+                logger.warning(f"AudioFileCache: Could not save '{video_id}' - {e}")
+                return
+
+        (await self._load_async())[video_id] = (file, size, info.get("duration"), info.get("acodec"))
+        logger.info(f"AudioFileCache: Saved '{video_id}' ({size} bytes).")
+        await self._evict()
+
+    def _save(self, video_id: str, file: str, part: str, info: dict):
+        """Moves a finished download into place and writes its metadata file."""
+        os.replace(part, os.path.join(self.directory, file))
+        with open(os.path.join(self.directory, f"{video_id}.json"), "w") as f:
+            json.dump({"file": file, "duration": info.get("duration"), "codec": info.get("acodec"),
+                       "saved_at": time.time()}, f)
+
+    async def _evict(self):
+        """Deletes the least recently played files until the cache fits its budget."""
+        entries = await self._load_async()
+        total = sum(entry[1] for entry in entries.values())
+        while total > self.max_bytes and len(entries) > 1:
+            video_id = next(iter(entries))
+            total -= entries[video_id][1]
+            await self.remove_async(video_id)
+            logger.info(f"AudioFileCache: Evicted '{video_id}'.")
+
+    def remove(self, video_id: str):
+        """
+        Deletes a cached file, e.g. because it could not be played.
+
+        Parameters:
+            video_id (str): The YouTube video id.
+        """
+        self._delete(video_id, self._load().pop(video_id, None))
+
+    async def remove_async(self, video_id: str):
+        """
+        Deletes a cached file like remove, without blocking the event loop.
+
+        Parameters:
+            video_id (str): The YouTube video id.
+        """
+        entry = (await self._load_async()).pop(video_id, None)
+        await asyncio.get_running_loop().run_in_executor(None, self._delete, video_id, entry)
+
+    def _delete(self, video_id: str, entry: Optional[Tuple[str, int, Optional[float], Optional[str]]]):
+        """Deletes the files of a cache entry that was taken out of the index."""
+        if entry is not None:
+            self._discard(os.path.join(self.directory, entry[0]))
+        self._discard(os.path.join(self.directory, f"{video_id}.json"))
+
+    @staticmethod
+    def _discard(path: str):
+        """Deletes a file if it exists."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,117 @@
+# cogs/helpers/bitmaps.py
+"""
+This file contains packed row bitmaps over catalog snapshots.
+A bitmap marks a set of rows with one bit per row, so sets can be combined with AND/OR,
+counted with a popcount and sampled without going back to the dataset.
+"""
+
+import random
+import logging
+from typing import Dict, Tuple
+import numpy as np
+from cogs.helpers.indexes import range_index, rows_in_ranges
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+# For every byte value, the positions of its set bits first (packbits puts row 0 in the high bit)
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1)
+_SELECT = np.argsort(1 - _BYTE_BITS, axis=1, kind="stable")
+
+
+class Bitmap:
+    """
+    Immutable set of row ids stored as a packed bit array.
+    """
+
+    def __init__(self, bits: np.ndarray, size: int):
+        self.bits = bits
+        self.size = size
+        self._cumulative = None
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, size: int) -> "Bitmap":
+        """
+        Creates a bitmap with the given rows set.
+
+        Parameters:
+            rows (np.ndarray): Row ids to set.
+            size (int): Number of rows in the dataset.
+
+        Returns:
+            Bitmap: The bitmap.
+        """
+        mask = np.zeros(size, dtype=bool)
+        mask[rows] = True
+        return cls(np.packbits(mask), size)
+
+    def _check(self, other: "Bitmap"):
+        if self.size != other.size:
+            raise ValueError(f"Cannot combine bitmaps of {self.size} and {other.size} rows.")
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        self._check(other)
+        return Bitmap(self.bits & other.bits, self.size)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        self._check(other)
+        return Bitmap(self.bits | other.bits, self.size)
+
+    def count(self) -> int:
+        """Returns the number of rows in the set."""
+        return int(np.bitwise_count(self.bits).sum())
+
+    def rows(self) -> np.ndarray:
+        """Returns the row ids in the set, in dataset order."""
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.size))
+
+    def sample(self, k: int) -> np.ndarray:
+        """
+        Returns k distinct random rows of the set without unpacking it.
+        Random ranks are mapped to bytes through the running popcount and to bits through a lookup table.
+
+        Parameters:
+            k (int): Number of rows to draw; capped at the size of the set.
+
+        Returns:
+            np.ndarray: Row ids in random order.
+        """
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(np.bitwise_count(self.bits), dtype=np.int64)
+        total = int(self._cumulative[-1]) if self._cumulative.size else 0
+        ranks = np.asarray(random.sample(range(total), min(k, total)), dtype=np.int64)
+
+        byte = np.searchsorted(self._cumulative, ranks, side="right")
+        before = self._cumulative[byte] - np.bitwise_count(self.bits[byte])
+        return byte * 8 + _SELECT[self.bits[byte], ranks - before]
+
+
+def range_bitmap(snapshot, column: str, low, high) -> Bitmap:
+    """
+    Returns the bitmap of the rows of a catalog snapshot with low <= column <= high.
+    The rows come from the sorted column index, so the dataset is not rescanned.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        column (str): Name of a numeric column.
+        low: Lower bound, inclusive.
+        high: Upper bound, inclusive.
+
+    Returns:
+        Bitmap: The matching rows.
+    """
+    return Bitmap.from_rows(range_index(snapshot, column).rows_between(low, high), len(snapshot.frame))
+
+
+def filter_bitmap(snapshot, ranges: Dict[str, Tuple[float, float]]) -> Bitmap:
+    """
+    Returns the bitmap of the rows of a catalog snapshot that fall inside every (min, max) range.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        ranges (dict): Column name -> (min, max), both inclusive. Every column must exist.
+
+    Returns:
+        Bitmap: The matching rows.
+    """
+    return Bitmap.from_rows(rows_in_ranges(snapshot, ranges), len(snapshot.frame))
@@ -0,0 +1,143 @@
+# cogs/helpers/broadcast.py
+"""
+This file contains the broadcast source used to play one track on several voice clients.
+The track is read, and Opus-encoded if it is PCM, once; every voice client plays a listener that
+forwards the shared packets, so adding a voice channel costs neither an FFmpeg process nor an encoder.
+"""
+
+import threading
+import logging
+from collections import deque
+from typing import Optional, Tuple
+import discord
+from discord.opus import Encoder, OPUS_SILENCE
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+
+class Broadcast:
+    """
+    Shares one source between several BroadcastListeners.
+    The first listener to ask for a packet reads it from the source; the others get it from a
+    backlog of recent packets. A listener that falls further behind than the backlog skips ahead.
+    The source is cleaned up when the last listener is. While the broadcast is paused (its owner's
+    voice client is paused), listeners get silence and nobody reads the source.
+    """
+
+    def __init__(self, source: discord.AudioSource, *, encoder=None, backlog: int = 50):
+        self.source = source
+        self._encoder = encoder
+        self._packets = deque(maxlen=backlog)
+        self._first = 0  # Index of the oldest packet in the backlog
+        self._ended = False
+        self._listeners = 0
+        self.paused = False
+        self._lock = threading.Lock()
+
+    def listener(self, primary: bool = False) -> "BroadcastListener":
+        """
+        Creates a listener that starts at the newest packet.
+
+        Parameters:
+            primary (bool): Marks the listener of the voice client that owns the source.
+
+        Returns:
+            BroadcastListener: Opus source for one voice client.
+        """
+        with self._lock:
+            self._listeners += 1
+        return BroadcastListener(self, primary)
+
+    def _encode(self, pcm: bytes) -> bytes:
+        """Encodes one PCM frame, creating the encoder on first use."""
+        if self._encoder is None:
+            self._encoder = Encoder()
+        return self._encoder.encode(pcm, Encoder.SAMPLES_PER_FRAME)
+
+    def live_index(self) -> int:
+        """Returns the index of the newest packet, or of the first one if none was read yet."""
+        with self._lock:
+            return self._first + max(len(self._packets) - 1, 0)
+
+    def packet(self, index: int) -> Optional[Tuple[bytes, int]]:
+        """
+        Returns a packet, reading the source if nobody has asked for it yet.
+
+        Parameters:
+            index (int): Index of the packet.
+
+        Returns:
+            tuple or None: The packet and its index (later than asked if the backlog no longer has it),
+                           or None once the source has ended.
+        """
+        with self._lock:
+            while index >= self._first + len(self._packets):
+                if self._ended:
+                    return None
+                data = self.source.read()
+                if not data:
+                    self._ended = True
+                    return None
+                if not self.source.is_opus():
+                    data = self._encode(data)
+                if len(self._packets) == self._packets.maxlen:
+                    self._first += 1
+                self._packets.append(data)
+            index = max(index, self._first)
+            return self._packets[index - self._first], index
+
+    def pause(self):
+        """Stops reading the source; listeners play silence until resume."""
+        self.paused = True
+
+    def resume(self):
+        """Continues reading the source where pause left it."""
+        self.paused = False
+
+    def close(self):
+        """Ends the broadcast for every listener, e.g. because its owner stopped playing."""
+        with self._lock:
+            self._ended = True
+            self._packets.clear()
+
+    def release(self):
+        """Called by a listener's cleanup; cleans up the source after the last one."""
+        with self._lock:
+            self._listeners -= 1
+            last = self._listeners == 0
+        if last:
+            self.source.cleanup()
+            logger.debug("Broadcast: Last listener left, cleaned up the source.")
+
+
+class BroadcastListener(discord.AudioSource):
+    """
+    Opus source that plays a Broadcast on one voice client.
+    """
+
+    def __init__(self, broadcast: Broadcast, primary: bool = False):
+        self.broadcast = broadcast
+        self.primary = primary
+        self._index: Optional[int] = None
+        self._released = False
+
+    def is_opus(self) -> bool:
+        return True
+
+    def read(self) -> bytes:
+        if self.broadcast.paused:
+            return OPUS_SILENCE
+        if self._index is None:
+            self._index = self.broadcast.live_index()
+        result = self.broadcast.packet(self._index)
+        if result is None:
+            return b""
+        data, index = result
+        self._index = index + 1
+        return data
+
+    def cleanup(self):
+        if not self._released:
+            self._released = True
+            self.broadcast.release()
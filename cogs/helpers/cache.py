@@ -0,0 +1,196 @@
+# cogs/helpers/cache.py
+"""
+This file contains the persistent lookup cache used for remote metadata.
+Entries are kept in a SQLite file so they survive restarts, with an in-memory LRU in front of it,
+so a repeated lookup costs neither a network round trip nor a disk read.
+Coroutines use get_async and set_async, which keep the SQLite reads and writes off the event loop.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+# Returned by PersistentCache.get when a key is not cached
+MISSING = object()
+
+
+class PersistentCache:
+    """
+    Key/value cache with a time-to-live per entry, stored in one table of a SQLite file.
+    Values must be JSON serializable. The file is opened on first use, and any SQLite error
+    turns the cache into a memory-only cache instead of failing the lookup.
+    """
+
+    def __init__(self, path: str, table: str, ttl: float, max_memory: int = 1024):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name '{table}'.")
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """Returns the SQLite connection, opening the file and creating the table on first use."""
+        if self._connection is None and not self._disabled:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                connection = sqlite3.connect(self.path, check_same_thread=False)
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+                connection.commit()
+                self._connection = connection
+            except sqlite3.Error as e:
+                logger.warning(f"PersistentCache: Could not open '{self.path}' - {e}. Caching in memory only.")
+                self._disabled = True
+        return self._connection
+
+    def _remember(self, key: str, expires_at: float, text: str):
+        """Stores an entry in the in-memory LRU, evicting the least recently used entry if full."""
+        self._memory[key] = (expires_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached value for a key.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            Any: The value, or MISSING if the key is not cached or has expired.
+        """
+        now = time.time()
+        with self._lock:
+            value = self._from_memory(key, now)
+            if value is not MISSING:
+                return value
+
+            db = self._db()
+            if db is None:
+                return MISSING
+            try:
+                row = db.execute(
+                    f"SELECT value, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"PersistentCache: Lookup of '{key}' failed - {e}")
+                return MISSING
+            if row is None:
+                return MISSING
+            self._remember(key, row[1], row[0])
+            return json.loads(row[0])
+
+    def _from_memory(self, key: str, now: float) -> Any:
+        """Returns the value of a key from the in-memory LRU, or MISSING. Must be called with the lock held."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return MISSING
+        if entry[0] <= now:
+            del self._memory[key]
+            return MISSING
+        self._memory.move_to_end(key)
+        return json.loads(entry[1])
+
+    async def get_async(self, key: str) -> Any:
+        """
+        Returns the cached value for a key without blocking the event loop.
+        Keys in the in-memory LRU are answered directly; the SQLite lookup runs in the default executor.
+
+        Parameters:
+            key (str): The cache key.
+
+        Returns:
+            Any: The value, or MISSING if the key is not cached or has expired.
+        """
+        with self._lock:
+            value = self._from_memory(key, time.time())
+        if value is not MISSING:
+            return value
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Caches a value.
+
+        Parameters:
+            key (str): The cache key.
+            value (Any): JSON serializable value.
+            ttl (float, optional): Seconds until the entry expires. Defaults to the cache TTL.
+        """
+        text = json.dumps(value)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, text)
+            db = self._db()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, text, expires_at)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"PersistentCache: Could not store '{key}' - {e}")
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Caches a value without blocking the event loop; the SQLite write runs in the default executor.
+
+        Parameters:
+            key (str): The cache key.
+            value (Any): JSON serializable value.
+            ttl (float, optional): Seconds until the entry expires. Defaults to the cache TTL.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.set, key, value, ttl)
+
+    def delete(self, key: str):
+        """
+        Removes a key from the cache.
+
+        Parameters:
+            key (str): The cache key.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+            db = self._db()
+            if db is None:
+                return
+            try:
+                db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"PersistentCache: Could not delete '{key}' - {e}")
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            if db is None:
+                return
+            try:
+                db.execute(f"DELETE FROM {self.table}")
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"PersistentCache: Could not clear '{self.table}' - {e}")
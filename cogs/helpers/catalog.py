@@ -0,0 +1,187 @@
+# cogs/helpers/catalog.py
+"""
+This file is responsible for keeping the song datasets in memory.
+Every helper reads the datasets through a shared catalog instead of parsing the CSV files on every call.
+If a binary snapshot built by scripts/build_snapshot.py exists next to a CSV file, it is mapped
+instead of parsing the CSV.
+"""
+
+import os
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import pandas as pd
+from cogs.helpers.snapshot import snapshot_path, read_snapshot, snapshot_source_version
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Returns a cheap version stamp for a file, or None if the file does not exist.
+
+    Parameters:
+        path (str): Path of the file.
+
+    Returns:
+        tuple or None: (mtime in nanoseconds, size in bytes).
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class CatalogSnapshot:
+    """
+    A consistent, read-only view of one dataset as it was loaded from disk.
+    Callers must not modify the frame; a reload builds a new snapshot instead.
+    Indexes derived from the frame are cached on the snapshot, so they are rebuilt together with it.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: Optional[tuple] = None):
+        self.frame = frame
+        self.version = version
+        self._derived: Dict[Hashable, Any] = {}
+        self._derived_lock = threading.RLock()
+
+    def derived(self, key: Hashable, builder: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        Returns a structure derived from the frame, building it on first use.
+
+        Parameters:
+            key (Hashable): Name of the structure, unique per builder and arguments.
+            builder (Callable): Function that builds the structure from the frame.
+
+        Returns:
+            Any: The cached structure.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            pass
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = builder(self.frame)
+            return self._derived[key]
+
+
+class Catalog:
+    """
+    Process-wide holder for one dataset file.
+    The file is parsed once and only reloaded when its mtime (or size), or that of its
+    snapshot, changes. The new snapshot is swapped in with a single reference assignment,
+    so a request that already holds a snapshot keeps a consistent view while a reload happens.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "Catalog":
+        """
+        Creates a catalog that serves an in-memory frame and never reloads.
+
+        Parameters:
+            frame (pd.DataFrame): The dataset.
+
+        Returns:
+            Catalog: The catalog wrapping the frame.
+        """
+        catalog = cls()
+        catalog._snapshot = CatalogSnapshot(frame)
+        return catalog
+
+    def _version(self) -> Optional[tuple]:
+        """Returns the combined version stamp of the CSV file and its snapshot, or None if neither exists."""
+        csv_version = _file_version(self.path)
+        snap_version = _file_version(snapshot_path(self.path))
+        if csv_version is None and snap_version is None:
+            return None
+        return (csv_version, snap_version)
+
+    def _is_current(self, snapshot: Optional[CatalogSnapshot], version: Optional[tuple]) -> bool:
+        """Returns True if the snapshot can be served for the given file version."""
+        if snapshot is None:
+            return False
+        if self.path is None:
+            return True
+        return version is not None and snapshot.version == version
+
+    def _load(self) -> pd.DataFrame:
+        """
+        Loads the dataset, preferring an up-to-date snapshot over parsing the CSV file.
+
+        Returns:
+            pd.DataFrame: The dataset.
+        """
+        snap = snapshot_path(self.path)
+        if os.path.exists(snap):
+            try:
+                csv_version = _file_version(self.path)
+                if csv_version is None or snapshot_source_version(snap) == csv_version:
+                    frame = read_snapshot(snap)
+                    logger.debug(f"Catalog: Mapped snapshot '{snap}'.")
+                    return frame
+                logger.warning(f"Catalog: Snapshot '{snap}' is older than '{self.path}'. Falling back to CSV.")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Catalog: Could not read snapshot '{snap}' - {e}. Falling back to CSV.")
+        return pd.read_csv(self.path)
+
+    def snapshot(self) -> CatalogSnapshot:
+        """
+        Returns the current snapshot, reloading the file first if it changed on disk.
+
+        Returns:
+            CatalogSnapshot: The snapshot to read from for the whole request.
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist.
+        """
+        version = self._version() if self.path is not None else None
+        snapshot = self._snapshot
+        if self._is_current(snapshot, version):
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we were waiting for the lock
+            snapshot = self._snapshot
+            if self._is_current(snapshot, version):
+                return snapshot
+
+            snapshot = CatalogSnapshot(self._load(), version)
+            if version is not None:
+                self._snapshot = snapshot
+                logger.info(f"Catalog: Loaded {len(snapshot.frame)} rows from '{self.path}'.")
+            return snapshot
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Returns the frame of the current snapshot. Treat it as read-only."""
+        return self.snapshot().frame
+
+
+_catalogs: Dict[str, Catalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str) -> Catalog:
+    """
+    Returns the process-wide catalog for a dataset file, creating it on first use.
+
+    Parameters:
+        path (str): Path of the dataset file.
+
+    Returns:
+        Catalog: The shared catalog for that file.
+    """
+    key = os.path.abspath(path)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.setdefault(key, Catalog(key))
+    return catalog
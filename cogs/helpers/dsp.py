@@ -0,0 +1,372 @@
+# cogs/helpers/dsp.py
+"""
+This file contains the PCM processing applied between FFmpeg and the voice client.
+A DspSource runs a chain of stages (gain, fades, loudness measurement, equalizer) over every frame.
+Frames are processed with NumPy in place, in buffers allocated once per source, so a frame costs a few
+vectorized operations instead of a Python loop or a new array per step. Stages that have nothing to
+do are skipped, and a frame no stage changes is passed on untouched.
+"""
+
+import math
+import logging
+from typing import Callable, Iterable, Optional, Type, TypeVar
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import discord
+from cogs.helpers.audio import FRAME_SIZE, FRAME_SECONDS
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+CHANNELS = 2
+SAMPLES = FRAME_SIZE // 2  # int16 samples of one frame, both channels interleaved
+FRAMES_PER_CHANNEL = SAMPLES // CHANNELS
+SAMPLE_RATE = 48000
+
+# Frames quieter than this are left out of the loudness measurement, so silence does not lower it
+SILENCE_DB = -60.0
+
+
+def loudness_gain(loudness: Optional[float], target: float, min_gain: float = 0.25, max_gain: float = 2.0) -> float:
+    """
+    Returns the gain that brings a track of the measured loudness to the target loudness.
+
+    Parameters:
+        loudness (float or None): Measured loudness in dBFS, None if unknown.
+        target (float): Target loudness in dBFS.
+        min_gain (float): Lowest gain returned (-12 dB by default).
+        max_gain (float): Highest gain returned (+6 dB by default), which limits the boost of quiet tracks.
+
+    Returns:
+        float: Linear gain, 1.0 if the loudness is unknown.
+    """
+    if loudness is None:
+        return 1.0
+    return min(max(10 ** ((target - loudness) / 20), min_gain), max_gain)
+
+
+def _ramp_steps() -> np.ndarray:
+    """Returns the position of every sample frame within a frame, from 1/n to 1, as a column."""
+    return (np.arange(1, FRAMES_PER_CHANNEL + 1, dtype=np.float32) / FRAMES_PER_CHANNEL)[:, None]
+
+
+class DspStage:
+    """
+    One step of a DspSource's chain.
+    process works in place on a frame of float32 samples shaped (FRAMES_PER_CHANNEL, CHANNELS).
+    It is only called while active is True. Stages run on the audio thread; settings may be changed
+    from the event loop at any time.
+    """
+
+    @property
+    def active(self) -> bool:
+        return True
+
+    def process(self, frame: np.ndarray):
+        raise NotImplementedError
+
+    def finish(self, complete: bool):
+        """Called once when the source ends (complete) or is cleaned up before its end."""
+
+
+class GainStage(DspStage):
+    """
+    Scales the frame by a gain. A new gain is reached with a linear ramp over ramp_seconds, so it does not click.
+    """
+
+    def __init__(self, gain: float = 1.0, ramp_seconds: float = 0.2):
+        self._gain = float(gain)
+        self._target = float(gain)
+        self._step = 0.0
+        self.ramp_seconds = ramp_seconds
+        self._steps = _ramp_steps()
+        self._ramp = np.empty_like(self._steps)
+
+    @property
+    def gain(self) -> float:
+        """The gain the stage is ramping to."""
+        return self._target
+
+    @gain.setter
+    def gain(self, value: float):
+        self.ramp_to(value)
+
+    @property
+    def current(self) -> float:
+        """The gain applied to the last frame."""
+        return self._gain
+
+    @property
+    def active(self) -> bool:
+        return bool(self._step) or self._gain != 1.0
+
+    def ramp_to(self, value: float, seconds: Optional[float] = None):
+        """
+        Moves the gain to a new value.
+
+        Parameters:
+            value (float): The new gain, 0 or more.
+            seconds (float, optional): Length of the ramp. Defaults to ramp_seconds.
+        """
+        frames = max(1, int((self.ramp_seconds if seconds is None else seconds) / FRAME_SECONDS))
+        self._target = max(float(value), 0.0)
+        self._step = (self._target - self._gain) / frames
+
+    def process(self, frame: np.ndarray):
+        if not self._step:
+            frame *= self._gain
+            return
+        # Ramp linearly across the frame from the current gain towards the target
+        end = self._gain + self._step
+        if (self._step > 0 and end >= self._target) or (self._step < 0 and end <= self._target):
+            end, self._step = self._target, 0.0
+        np.multiply(self._steps, end - self._gain, out=self._ramp)
+        self._ramp += self._gain
+        frame *= self._ramp
+        self._gain = end
+
+
+class FadeStage(GainStage):
+    """
+    Gain stage for short fades, e.g. on pause, resume and skip, kept apart from the volume.
+    """
+
+    def __init__(self, seconds: float = 0.3):
+        super().__init__(1.0, ramp_seconds=seconds)
+
+    def fade_out(self):
+        """Ramps to silence."""
+        self.ramp_to(0.0)
+
+    def fade_in(self):
+        """Ramps back to full level."""
+        self.ramp_to(1.0)
+
+
+class LoudnessMeter(DspStage):
+    """
+    Measures the loudness of the frames it sees (RMS in dBFS, leaving out silence) without changing them.
+    Passes it to on_measured once, when the source ends or is cleaned up after at least min_seconds of audio.
+    """
+
+    def __init__(self, on_measured: Optional[Callable[[float], None]] = None, min_seconds: float = 30.0):
+        self.on_measured = on_measured
+        self.min_seconds = min_seconds
+        self.measuring = True
+        self._sum_squares = 0.0
+        self._frames = 0
+        self._threshold = SAMPLES * (32768.0 * 10 ** (SILENCE_DB / 20)) ** 2
+
+    @property
+    def active(self) -> bool:
+        return self.measuring
+
+    @property
+    def loudness(self) -> Optional[float]:
+        """Measured loudness in dBFS, None if nothing but silence was measured."""
+        if not self._frames:
+            return None
+        return 10 * math.log10(self._sum_squares / (self._frames * SAMPLES) / 32768.0 ** 2)
+
+    @property
+    def seconds(self) -> float:
+        """Seconds of non-silent audio measured."""
+        return self._frames * FRAME_SECONDS
+
+    def process(self, frame: np.ndarray):
+        energy = float(np.vdot(frame, frame))
+        if energy >= self._threshold:
+            self._sum_squares += energy
+            self._frames += 1
+
+    def finish(self, complete: bool):
+        if not self.measuring:
+            return
+        self.measuring = False
+        if self.on_measured is not None and self._frames and (complete or self.seconds >= self.min_seconds):
+            self.on_measured(self.loudness)
+
+
+class EqualizerStage(DspStage):
+    """
+    Two band equalizer: bass and treble gains in dB around a crossover frequency.
+    Implemented as one linear-phase FIR filter, so both channels cost a single matrix product per frame.
+    Inactive while both gains are 0 dB.
+    """
+
+    def __init__(self, bass_db: float = 0.0, treble_db: float = 0.0, crossover: float = 400.0, taps: int = 63):
+        self.crossover = crossover
+        self.taps = taps
+        # The last taps-1 samples of the previous frame, followed by the current frame
+        self._history = np.zeros((taps - 1 + FRAMES_PER_CHANNEL, CHANNELS), dtype=np.float32)
+        self._windows = sliding_window_view(self._history, taps, axis=0)  # (samples, channels, taps), a view
+        self._kernel = np.zeros(taps, dtype=np.float32)
+        self.bass_db = self.treble_db = 0.0
+        self.set(bass_db, treble_db)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.bass_db or self.treble_db)
+
+    def set(self, bass_db: float, treble_db: float):
+        """
+        Sets the band gains and designs the filter for them.
+
+        Parameters:
+            bass_db (float): Gain below the crossover in dB.
+            treble_db (float): Gain above the crossover in dB.
+        """
+        # Windowed-sinc low-pass; the high band is what the low-pass removes
+        n = np.arange(self.taps) - (self.taps - 1) / 2
+        low = np.sinc(2 * self.crossover / SAMPLE_RATE * n) * np.blackman(self.taps)
+        low /= low.sum()
+        bass, treble = 10 ** (bass_db / 20), 10 ** (treble_db / 20)
+        kernel = (bass - treble) * low
+        kernel[(self.taps - 1) // 2] += treble
+        # Reversed, so the matrix product with the sliding windows is the convolution
+        self._kernel = kernel[::-1].astype(np.float32)
+        if not (bass_db or treble_db):
+            self._history[:] = 0
+        self.bass_db, self.treble_db = float(bass_db), float(treble_db)
+
+    def process(self, frame: np.ndarray):
+        history = self.taps - 1
+        self._history[history:] = frame
+        np.matmul(self._windows, self._kernel, out=frame)
+        self._history[:history] = self._history[FRAMES_PER_CHANNEL:]
+
+
+Stage = TypeVar("Stage", bound=DspStage)
+
+
+class DspSource(discord.AudioSource):
+    """
+    PCM source that runs the frames of another PCM source through a chain of DspStages, in order.
+    """
+
+    def __init__(self, original: discord.AudioSource, stages: Iterable[DspStage] = ()):
+        if original.is_opus():
+            raise discord.ClientException(f"{type(self).__name__} needs a PCM source.")
+        self.original = original
+        self.stages = list(stages)
+        self._finished = False
+        # Work buffers, reused for every frame
+        self._samples = np.empty(SAMPLES, dtype=np.float32)
+        self._frame = self._samples.reshape(FRAMES_PER_CHANNEL, CHANNELS)
+        self._out = np.empty(SAMPLES, dtype=np.int16)
+
+    def find(self, kind: Type[Stage]) -> Optional[Stage]:
+        """Returns the first stage of a kind, or None."""
+        for stage in self.stages:
+            if isinstance(stage, kind):
+                return stage
+        return None
+
+    def is_opus(self) -> bool:
+        return False
+
+    def _finish(self, complete: bool):
+        if not self._finished:
+            self._finished = True
+            for stage in self.stages:
+                stage.finish(complete)
+
+    def read(self) -> bytes:
+        data = self.original.read()
+        if len(data) != FRAME_SIZE:
+            self._finish(complete=True)
+            return b""
+        converted = False
+        for stage in self.stages:
+            if stage.active:
+                if not converted:
+                    np.copyto(self._samples, np.frombuffer(data, dtype=np.int16), casting="unsafe")
+                    converted = True
+                stage.process(self._frame)
+        if not converted:
+            return data
+        np.clip(self._samples, -32768, 32767, out=self._samples)
+        np.copyto(self._out, self._samples, casting="unsafe")
+        # The Opus encoder needs bytes, so the result is the one copy made per frame
+        return self._out.tobytes()
+
+    def cleanup(self):
+        self._finish(complete=False)
+        self.original.cleanup()
+
+
+class GainSource(DspSource):
+    """
+    DspSource scaling another PCM source by a gain, replacing discord.py's PCMVolumeTransformer.
+    With measure=True it also measures the loudness of what it reads, before the gain, and passes it to
+    on_measured (see LoudnessMeter). Further stages run after the gain.
+    """
+
+    def __init__(self, original: discord.AudioSource, gain: float = 1.0, *, ramp_seconds: float = 0.2,
+                 measure: bool = False, min_measure_seconds: float = 30.0,
+                 on_measured: Optional[Callable[[float], None]] = None, stages: Iterable[DspStage] = ()):
+        self.meter = LoudnessMeter(on_measured, min_measure_seconds) if measure else None
+        self.gain_stage = GainStage(gain, ramp_seconds)
+        chain = [self.meter] if self.meter is not None else []
+        super().__init__(original, chain + [self.gain_stage] + list(stages))
+
+    @property
+    def gain(self) -> float:
+        """The gain the source is ramping to."""
+        return self.gain_stage.gain
+
+    @gain.setter
+    def gain(self, value: float):
+        self.gain_stage.gain = value
+
+    # Same name as PCMVolumeTransformer, so callers can set the volume either way
+    volume = gain
+
+    @property
+    def loudness(self) -> Optional[float]:
+        """Measured loudness in dBFS, None if not measuring or nothing but silence was measured."""
+        return self.meter.loudness if self.meter is not None else None
+
+
+class Crossfader:
+    """
+    Mixer for GaplessSource crossfades: blends a frame of the outgoing track with one of the incoming
+    track, with equal-power gains so the level does not dip in the middle of the fade.
+    """
+
+    def __init__(self):
+        self._outgoing = np.empty((FRAMES_PER_CHANNEL, CHANNELS), dtype=np.float32)
+        self._incoming = np.empty((FRAMES_PER_CHANNEL, CHANNELS), dtype=np.float32)
+        self._steps = _ramp_steps()
+        self._ramp = np.empty_like(self._steps)
+        self._gain = np.empty_like(self._steps)
+        self._out = np.empty((FRAMES_PER_CHANNEL, CHANNELS), dtype=np.int16)
+
+    def __call__(self, outgoing: bytes, incoming: bytes, start: float, end: float) -> bytes:
+        """
+        Mixes two PCM frames.
+
+        Parameters:
+            outgoing (bytes): Frame of the track fading out.
+            incoming (bytes): Frame of the track fading in.
+            start (float): Share of the incoming track at the start of the frame, from 0 to 1.
+            end (float): Share of the incoming track at the end of the frame.
+
+        Returns:
+            bytes: The mixed frame.
+        """
+        np.copyto(self._outgoing, np.frombuffer(outgoing, dtype=np.int16).reshape(FRAMES_PER_CHANNEL, CHANNELS),
+                  casting="unsafe")
+        np.copyto(self._incoming, np.frombuffer(incoming, dtype=np.int16).reshape(FRAMES_PER_CHANNEL, CHANNELS),
+                  casting="unsafe")
+        np.multiply(self._steps, end - start, out=self._ramp)
+        self._ramp += start
+        self._ramp *= np.pi / 2
+        np.sin(self._ramp, out=self._gain)
+        self._incoming *= self._gain
+        np.cos(self._ramp, out=self._gain)
+        self._outgoing *= self._gain
+        self._outgoing += self._incoming
+        np.clip(self._outgoing, -32768, 32767, out=self._outgoing)
+        np.copyto(self._out, self._outgoing, casting="unsafe")
+        return self._out.tobytes()
@@ -3,8 +3,28 @@
 Recommendation of songs filtering operations etc.
 """
 
-import pandas as pd
+import numpy as np
 import random
+from cogs.helpers.catalog import get_catalog
+from cogs.helpers.indexes import genre_index, rows_in_ranges
+from cogs.helpers.bitmaps import filter_bitmap, range_bitmap
+import logging
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+# Shared catalogs, loaded once and reloaded only when the files change
+SONGS_CATALOG = get_catalog("./data/songs.csv")
+TCC_CATALOG = get_catalog("./data/tcc_ceds_music.csv")
+
+# Mood filters based on EDA analysis, as (min, max) ranges of tcc_ceds_music.csv features
+MOOD_PRESETS = {
+    'happy': {'valence': (0.7, 1.0), 'energy': (0.5, 1.0)},
+    'sad': {'sadness': (0.5, 1), 'valence': (0.0, 0.3), 'energy': (0.2, 0.5)},
+    'party': {'danceability': (0.7, 1.0), 'valence': (0.6, 1.0), 'energy': (0.6, 1.0)},
+    'chill': {'acousticness': (0.6, 1.0), 'energy': (0.1, 0.5)},
+    'romantic': {'romantic': (0.5, 1.0), 'valence': (0.2, 0.5)},
+}
 
 
 def filtered_songs():
@@ -12,7 +32,7 @@ def filtered_songs():
     This function returns songs and their track_name, artist, year and genre.
     """
 
-    all_songs = pd.read_csv("./data/songs.csv")
+    all_songs = SONGS_CATALOG.frame
     all_songs = all_songs.filter(["track_name", "artist", "year", "genre"])
     return all_songs
 
@@ -20,18 +40,20 @@ def filtered_songs():
 def get_all_songs():
     """
     This function returns all songs in the dataset. Uses tcc_ceds_music.csv
+    The returned frame is shared with other callers and must not be modified.
     """
 
-    all_songs = pd.read_csv("./data/tcc_ceds_music.csv")
+    all_songs = TCC_CATALOG.frame
     return all_songs
 
 
 def get_all_songs_alternate():
     """
     This function returns all songs in the alternate dataset. Uses songs.csv
+    The returned frame is shared with other callers and must not be modified.
     """
 
-    all_songs = pd.read_csv("./data/songs.csv")
+    all_songs = SONGS_CATALOG.frame
     return all_songs
 
 
@@ -40,54 +62,40 @@ def recommend(input_songs):
     This function returns recommended songs based on the songs that the user selected.
     """
 
-    # removing all songs with count = 1
-    songs = get_all_songs()
-    songs = songs.groupby('genre').filter(lambda x: len(x) > 0)
-    # creating dictionary of song track_names and genre
-    playlist = dict(zip(songs['track_name'], songs['genre']))
-    # creating dictionary to count the frequency of each genre
-    freq = {}
-    for item in songs['genre']:
-        if (item in freq):
-            freq[item] += 1
-        else:
-            freq[item] = 1
-    # create list of all songs from the input genre
-    selected_list = []
-    output = []
-    for input in input_songs:
-        if input in playlist.keys():
-            for key, value in playlist.items():
-                if playlist[input] == value:
-                    selected_list.append(key)
-            selected_list.remove(input)
-    if (len(selected_list) >= 10):
-        output = random.sample(selected_list, 10)
+    # The genre index is built once per snapshot, so a request only touches the input genres
+    index = genre_index(TCC_CATALOG.snapshot())
+    name_ids = [index.name_id(input) for input in input_songs]
+    name_ids = np.array([name_id for name_id in name_ids if name_id is not None], dtype=np.intp)
+    # create list of all songs from the input genres, without the input songs themselves
+    selected = np.concatenate([np.empty(0, dtype=np.intp)] + [index.same_genre(name_id) for name_id in name_ids])
+    selected = selected[~np.isin(selected, name_ids)]
+    if (len(selected) >= 10):
+        output = index.names[selected[random.sample(range(len(selected)), 10)]].tolist()
     else:
-        extra_songs = 10 - len(selected_list)
-        song_names = songs['track_name'].to_list()
-        song_names_filtered = [x for x in song_names if x not in selected_list]
-        selected_list.extend(random.sample(song_names_filtered, extra_songs))
-        output = selected_list.copy()
+        extra_songs = 10 - len(selected)
+        output = index.names[selected].tolist()
+        output.extend(index.sample_names(extra_songs, exclude=selected.tolist() + name_ids.tolist()))
     return output
 
 
-def get_recommended_songs_based_on_mood(filters):
+def get_recommended_songs_based_on_mood(filters, limit=20, shuffle=False):
     """
     Filter the dataset based on the provided filter ranges for mood.
     The filters parameter is expected to be a dictionary with keys as feature names and values as a tuple of (min, max).
-    
+    Every feature has a sorted index built once per catalog snapshot, so each range is two binary searches.
+
+    Parameters:
+        filters (dict): Feature name -> (min, max), both inclusive.
+        limit (int): Maximum number of songs to return.
+        shuffle (bool): Return a random selection of the matches instead of the first ones in dataset order.
+
     Returns:
         list of tuples: Each tuple contains (track_name, artist)
     """
-    import pandas as pd
-    import logging
-
-    logger = logging.getLogger(__name__)
-
     # Load the dataset.
     try:
-        tcc_ceds_music_df = pd.read_csv('./data/tcc_ceds_music.csv')
+        snapshot = TCC_CATALOG.snapshot()
+        tcc_ceds_music_df = snapshot.frame
         logger.debug("Dataset loaded successfully.")
     except FileNotFoundError:
         logger.error("Dataset file not found.")
@@ -102,26 +110,92 @@ def get_recommended_songs_based_on_mood(filters):
         logger.error(f"Dataset is missing required columns: {required_columns - set(tcc_ceds_music_df.columns)}")
         return []
 
-    # Start with the dataset and filter it based on the ranges provided in the filters
-    filtered_df = tcc_ceds_music_df.copy()
-    logger.debug("Starting to apply filters to the dataset.")
-
+    ranges = {}
     for feature, (min_val, max_val) in filters.items():
-        if feature in filtered_df.columns:
-            original_count = len(filtered_df)
-            filtered_df = filtered_df[(filtered_df[feature] >= min_val) & (filtered_df[feature] <= max_val)]
-            new_count = len(filtered_df)
-            logger.debug(f"Applied filter on '{feature}': {original_count} -> {new_count} songs.")
+        if feature in tcc_ceds_music_df.columns:
+            ranges[feature] = (min_val, max_val)
         else:
             logger.warning(f"Feature '{feature}' not found in the dataset columns.")
 
+    rows = rows_in_ranges(snapshot, ranges)
+    logger.debug(f"Applied {len(ranges)} filters: {len(tcc_ceds_music_df)} -> {len(rows)} songs.")
+
     # If there are no results, return an empty list
-    if filtered_df.empty:
+    if not rows.size:
         logger.info("No songs found after applying filters.")
         return []
 
-    # Extract the 'track_name' and 'artist' as the recommended songs
+    if shuffle:
+        rows = rows[random.sample(range(len(rows)), min(limit, len(rows)))]
+    else:
+        rows = rows[:limit]
+
     # Return as list of tuples (track_name, artist)
-    recommended_songs = list(filtered_df[['track_name', 'artist']].head(20).itertuples(index=False, name=None))
+    track_names = tcc_ceds_music_df['track_name'].to_numpy()[rows].tolist()
+    artists = tcc_ceds_music_df['artist'].to_numpy()[rows].tolist()
+    recommended_songs = list(zip(track_names, artists))
     logger.info(f"Recommended {len(recommended_songs)} songs based on mood.")
     return recommended_songs
+
+
+def mood_bitmap(snapshot, mood):
+    """
+    Returns the bitmap of the songs matching a mood preset, built once per catalog snapshot.
+    Preset features missing from the dataset are ignored.
+    """
+    def build(frame):
+        ranges = {feature: bounds for feature, bounds in MOOD_PRESETS[mood].items() if feature in frame.columns}
+        return filter_bitmap(snapshot, ranges)
+
+    return snapshot.derived(("mood", mood), build)
+
+
+def get_recommended_songs_for_mood(mood, filters=None, limit=20):
+    """
+    Returns random songs matching one of the MOOD_PRESETS, optionally narrowed by extra ranges,
+    e.g. get_recommended_songs_for_mood('party', {'release_date': (2010, 2020)}).
+    The preset is a precomputed bitmap, so a request is a popcount plus sampling of the set bits.
+
+    Parameters:
+        mood (str): Name of the preset.
+        filters (dict, optional): Extra feature name -> (min, max) ranges, all of which must match.
+        limit (int): Maximum number of songs to return.
+
+    Returns:
+        list of tuples: Each tuple contains (track_name, artist)
+    """
+    if mood not in MOOD_PRESETS:
+        logger.warning(f"Unknown mood '{mood}'.")
+        return []
+
+    try:
+        snapshot = TCC_CATALOG.snapshot()
+    except FileNotFoundError:
+        logger.error("Dataset file not found.")
+        return []
+
+    tcc_ceds_music_df = snapshot.frame
+    required_columns = {'track_name', 'artist'}
+    if not required_columns.issubset(tcc_ceds_music_df.columns):
+        logger.error(f"Dataset is missing required columns: {required_columns - set(tcc_ceds_music_df.columns)}")
+        return []
+
+    bitmap = mood_bitmap(snapshot, mood)
+    for feature, (min_val, max_val) in (filters or {}).items():
+        if feature in tcc_ceds_music_df.columns:
+            bitmap = bitmap & range_bitmap(snapshot, feature, min_val, max_val)
+        else:
+            logger.warning(f"Feature '{feature}' not found in the dataset columns.")
+
+    matches = bitmap.count()
+    logger.debug(f"Mood '{mood}' matches {matches} songs.")
+    if not matches:
+        logger.info(f"No songs found for mood '{mood}'.")
+        return []
+
+    rows = bitmap.sample(limit)
+    track_names = tcc_ceds_music_df['track_name'].to_numpy()[rows].tolist()
+    artists = tcc_ceds_music_df['artist'].to_numpy()[rows].tolist()
+    recommended_songs = list(zip(track_names, artists))
+    logger.info(f"Recommended {len(recommended_songs)} songs for mood '{mood}'.")
+    return recommended_songs
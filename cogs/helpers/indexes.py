@@ -0,0 +1,556 @@
+# cogs/helpers/indexes.py
+"""
+This file contains the lookup indexes built over catalog snapshots.
+Indexes are built once per snapshot, so lookups no longer scan the whole dataset.
+"""
+
+import re
+import random
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name) -> str:
+    """
+    Normalizes a track or artist name for exact lookups.
+    The name is casefolded, punctuation is removed and runs of whitespace collapse to one space.
+
+    Parameters:
+        name: The name to normalize.
+
+    Returns:
+        str: The normalized name, "" for missing values.
+    """
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ""
+    name = _PUNCTUATION.sub("", str(name).casefold())
+    return _WHITESPACE.sub(" ", name).strip()
+
+
+def _normalized_codes(names: pd.Series) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Maps every name of a column to the id of its normalized form.
+    Only distinct names are normalized, which is much cheaper than normalizing every row.
+
+    Parameters:
+        names (pd.Series): Column of names.
+
+    Returns:
+        tuple: (id per row, dict from normalized name to id).
+    """
+    codes, uniques = pd.factorize(names)
+    normalized = [normalize_name(name) for name in uniques.tolist()] + [""]
+    codes[codes < 0] = len(uniques)  # Missing values normalize to ""
+    normalized_codes, normalized_uniques = pd.factorize(np.asarray(normalized, dtype=object))
+    ids = dict(zip(normalized_uniques.tolist(), range(len(normalized_uniques))))
+    return normalized_codes[codes], ids
+
+
+def song_key(track_name, artist) -> Tuple[str, str]:
+    """
+    Returns the lookup key for a song.
+
+    Parameters:
+        track_name: Name of the song.
+        artist: Name of the artist.
+
+    Returns:
+        tuple: (track_name, artist) in normalized form.
+    """
+    return (normalize_name(track_name), normalize_name(artist))
+
+
+class KeyIndex:
+    """
+    Hash index from song_key(track_name, artist) to the ids of all rows with that key.
+    It is built once per catalog snapshot, so an exact lookup costs the same regardless of catalog size.
+    Rows are stored grouped by key, so the rows of one key are a slice of a single array.
+    """
+
+    _NO_ROWS = np.empty(0, dtype=np.intp)
+
+    def __init__(self, frame: pd.DataFrame):
+        self._track_ids: Dict[str, int] = {}
+        self._artist_ids: Dict[str, int] = {}
+        self._key_ids: Dict[int, int] = {}
+        self._artist_count = 0
+        self._order = self._NO_ROWS
+        self._starts = np.zeros(1, dtype=np.intp)
+        if not {"track_name", "artist"}.issubset(frame.columns) or not len(frame):
+            return
+
+        track_codes, self._track_ids = _normalized_codes(frame["track_name"])
+        artist_codes, self._artist_ids = _normalized_codes(frame["artist"])
+        self._artist_count = len(self._artist_ids)
+
+        # One integer per (track, artist) pair, then one key id per distinct pair
+        pairs = track_codes.astype(np.int64) * self._artist_count + artist_codes
+        key_codes, key_pairs = pd.factorize(pairs)
+        self._key_ids = dict(zip(key_pairs.tolist(), range(len(key_pairs))))
+        self._order = np.argsort(key_codes, kind="stable").astype(np.intp)
+        self._starts = np.zeros(len(key_pairs) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(key_codes, minlength=len(key_pairs)), out=self._starts[1:])
+
+    def __len__(self) -> int:
+        return len(self._key_ids)
+
+    def _key_id(self, track_name, artist) -> Optional[int]:
+        """Returns the key id of a song, or None if it is not in the dataset."""
+        track, artist = song_key(track_name, artist)
+        track_id = self._track_ids.get(track)
+        artist_id = self._artist_ids.get(artist)
+        if track_id is None or artist_id is None:
+            return None
+        return self._key_ids.get(track_id * self._artist_count + artist_id)
+
+    def all_rows(self, track_name, artist) -> np.ndarray:
+        """
+        Returns the ids of every row of a song.
+
+        Parameters:
+            track_name: Name of the song.
+            artist: Name of the artist.
+
+        Returns:
+            np.ndarray: Row ids in dataset order, empty if the song is not in the dataset.
+        """
+        key_id = self._key_id(track_name, artist)
+        if key_id is None:
+            return self._NO_ROWS
+        return self._order[self._starts[key_id]:self._starts[key_id + 1]]
+
+    def row(self, track_name, artist) -> Optional[int]:
+        """
+        Returns the row id of a song, or None if it is not in the dataset.
+
+        Parameters:
+            track_name: Name of the song.
+            artist: Name of the artist.
+
+        Returns:
+            int or None: Row id of the first matching row.
+        """
+        key_id = self._key_id(track_name, artist)
+        return None if key_id is None else int(self._order[self._starts[key_id]])
+
+    def rows(self, keys: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """
+        Returns the row ids of several songs.
+
+        Parameters:
+            keys (Iterable[Tuple[str, str]]): Songs as (track_name, artist).
+
+        Returns:
+            np.ndarray: First row id per song, -1 where the song is not in the dataset.
+        """
+        rows: List[int] = []
+        for track_name, artist in keys:
+            row = self.row(track_name, artist)
+            rows.append(-1 if row is None else row)
+        return np.asarray(rows, dtype=np.intp)
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over one text column, for case-insensitive substring search.
+    Every distinct lowercased value gets an id. Each trigram maps to a sorted posting list of the ids
+    of the values that contain it. A query intersects the posting lists of its trigrams and only
+    checks the surviving values. Queries of one or two characters look up a single posting list of
+    character or bigram postings, which are built on first use. The query is treated as plain text,
+    never as a regular expression.
+    """
+
+    _NO_IDS = np.empty(0, dtype=np.int64)
+
+    def __init__(self, names: pd.Series):
+        codes, uniques = pd.factorize(names)
+        self.codes = codes.astype(np.int64)  # Value id per row, -1 for missing values
+        self._names = [str(name).lower() for name in uniques.tolist()]
+
+        # Rows grouped by value id, so the rows of several values can be gathered without a scan
+        valid = self.codes >= 0
+        self._order = np.flatnonzero(valid)[np.argsort(self.codes[valid], kind="stable")]
+        self._counts = np.bincount(self.codes[valid], minlength=len(self._names))
+        self._starts = np.concatenate(([0], np.cumsum(self._counts)))
+
+        # The values back to back as code points, kept for building the postings of short queries
+        self._lengths = np.fromiter(map(len, self._names), dtype=np.int64, count=len(self._names))
+        self._chars = np.frombuffer("".join(self._names).encode("utf-32-le"), dtype=np.uint32)
+        self._trigrams, self._posting_starts, self._postings = self._build_postings(self._chars, self._lengths)
+        self._short_postings: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    @staticmethod
+    def _trigram_codes(text: str) -> np.ndarray:
+        """Returns the code of every trigram in a lowercased text."""
+        return TrigramIndex._encode(np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32), np.arange(max(len(text) - 2, 0)))
+
+    @staticmethod
+    def _encode(chars: np.ndarray, positions: np.ndarray, n: int = 3) -> np.ndarray:
+        """Packs the n (at most three) code points starting at each position into one int64 (21 bits each)."""
+        chars = chars.astype(np.int64)
+        codes = chars[positions]
+        for offset in range(1, n):
+            codes = (codes << 21) | chars[positions + offset]
+        return codes
+
+    @staticmethod
+    def _build_postings(chars: np.ndarray, lengths: np.ndarray, n: int = 3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Builds the n-gram posting lists for all values at once.
+
+        Parameters:
+            chars (np.ndarray): Code points of the values back to back.
+            lengths (np.ndarray): Length of each value.
+            n (int): Characters per n-gram, at most three.
+
+        Returns:
+            tuple: (sorted distinct n-gram codes, start of each posting list, concatenated posting lists).
+        """
+        name_ends = np.repeat(np.cumsum(lengths), lengths)
+        positions = np.flatnonzero(np.arange(len(chars)) + n - 1 < name_ends)
+        grams = TrigramIndex._encode(chars, positions, n)
+        name_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)[positions]
+
+        # Number the distinct n-grams in sorted order. Value ids already ascend, so a stable sort
+        # by n-gram number groups the postings; with fewer than 65536 n-grams this is a radix sort.
+        codes, distinct = pd.factorize(grams)
+        rank = np.empty(len(distinct), dtype=np.int64)
+        rank[np.argsort(distinct)] = np.arange(len(distinct))
+        codes = rank[codes]
+        order = np.argsort(codes.astype(np.uint16 if len(distinct) <= 0xFFFF else np.int64), kind="stable")
+        codes, name_ids = codes[order], name_ids[order]
+
+        # Drop repeated n-grams within one value
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (name_ids[1:] != name_ids[:-1])
+        codes, name_ids = codes[keep], name_ids[keep]
+
+        starts = np.zeros(len(distinct) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(distinct)), out=starts[1:])
+        return np.sort(distinct), starts, name_ids
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def candidates(self, query: str) -> Optional[np.ndarray]:
+        """
+        Returns the ids of the values that may contain the query: a superset of the matches.
+        Queries shorter than three characters have no trigrams; their posting list of characters or
+        bigrams holds exactly the values that contain them.
+
+        Parameters:
+            query (str): Text to look for.
+
+        Returns:
+            np.ndarray or None: Sorted value ids, or None if every value matches (empty query).
+        """
+        query = str(query).lower()
+        if not query:
+            return None
+        if len(query) < 3:
+            return self._short_matches(query)
+
+        trigrams = np.unique(self._trigram_codes(query))
+        slots = np.searchsorted(self._trigrams, trigrams)
+        if np.any(slots >= len(self._trigrams)) or np.any(self._trigrams[np.minimum(slots, len(self._trigrams) - 1)] != trigrams):
+            return self._NO_IDS
+
+        # Intersect the posting lists, shortest first
+        lists = sorted((self._postings[self._posting_starts[slot]:self._posting_starts[slot + 1]] for slot in slots), key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not candidates.size:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return candidates
+
+    def _short_matches(self, query: str) -> np.ndarray:
+        """Returns the sorted ids of the values that contain a lowercased query of one or two characters."""
+        n = len(query)
+        postings = self._short_postings.get(n)
+        if postings is None:
+            postings = self._short_postings[n] = self._build_postings(self._chars, self._lengths, n)
+        grams, starts, name_ids = postings
+        code = self._encode(np.frombuffer(query.encode("utf-32-le"), dtype=np.uint32), np.zeros(1, dtype=np.int64), n)[0]
+        slot = int(np.searchsorted(grams, code))
+        if slot >= len(grams) or grams[slot] != code:
+            return self._NO_IDS
+        return name_ids[starts[slot]:starts[slot + 1]]
+
+    def contains(self, name_id: int, query: str) -> bool:
+        """
+        Returns True if the value with the given id contains the query, ignoring case.
+
+        Parameters:
+            name_id (int): Value id, -1 for a missing value.
+            query (str): Text to look for.
+
+        Returns:
+            bool: Whether the value contains the query.
+        """
+        return name_id >= 0 and str(query).lower() in self._names[name_id]
+
+    def names_containing(self, query: str) -> Optional[np.ndarray]:
+        """
+        Returns the ids of the values that contain the query, ignoring case.
+        The query is matched as plain text, so regex metacharacters have no special meaning.
+
+        Parameters:
+            query (str): Text to look for.
+
+        Returns:
+            np.ndarray or None: Sorted value ids, or None if every value matches (empty query).
+        """
+        candidates = self.candidates(query)
+        if candidates is None:
+            return None
+        # Trigrams can match out of order, so verify the survivors
+        return np.asarray([i for i in candidates.tolist() if self.contains(i, query)], dtype=np.int64)
+
+    def rows_of(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the row ids of the given values.
+
+        Parameters:
+            ids (np.ndarray): Value ids.
+
+        Returns:
+            np.ndarray: Row ids, grouped by value.
+        """
+        counts = self._counts[ids]
+        offsets = np.repeat(self._starts[ids] - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return self._order[offsets + np.arange(counts.sum())]
+
+
+class GenreIndex:
+    """
+    Inverted index from genre to the distinct track names of that genre.
+    Like the track_name -> genre dict it replaces, a track name that appears in several rows
+    belongs to the genre of its last row, and names keep the order of their first appearance.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        name_codes, names = pd.factorize(frame["track_name"])
+        genre_codes, _ = pd.factorize(frame["genre"])
+        self.names = np.asarray(names, dtype=object)
+        self._name_ids: Dict[Any, int] = dict(zip(self.names.tolist(), range(len(self.names))))
+        self._name_codes = name_codes
+        self._row_counts = np.bincount(name_codes[name_codes >= 0], minlength=len(self.names))
+
+        # Genre of the last row of every name
+        reversed_codes = name_codes[::-1]
+        named = np.flatnonzero(reversed_codes >= 0)
+        _, first = np.unique(reversed_codes[named], return_index=True)
+        self._name_genres = genre_codes[::-1][named[first]]
+
+        # Name ids grouped by genre; a stable sort keeps the order of first appearance
+        genres = np.where(self._name_genres >= 0, self._name_genres, genre_codes.max(initial=-1) + 1)
+        self._order = np.argsort(genres, kind="stable")
+        self._starts = np.zeros(genres.max(initial=-1) + 2, dtype=np.intp)
+        np.cumsum(np.bincount(genres, minlength=len(self._starts) - 1), out=self._starts[1:])
+
+    def name_id(self, track_name) -> Optional[int]:
+        """Returns the id of a track name, or None if it is not in the dataset."""
+        try:
+            return self._name_ids.get(track_name)
+        except TypeError:  # Unhashable input
+            return None
+
+    def same_genre(self, name_id: int) -> np.ndarray:
+        """
+        Returns the ids of all track names in the genre of the given name, including the name itself.
+
+        Parameters:
+            name_id (int): Id of the track name.
+
+        Returns:
+            np.ndarray: Name ids in order of first appearance.
+        """
+        genre = self._name_genres[name_id]
+        if genre < 0:  # Missing genres are grouped together after the real ones
+            genre = len(self._starts) - 2
+        return self._order[self._starts[genre]:self._starts[genre + 1]]
+
+    def sample_names(self, count: int, exclude: Iterable[int] = ()) -> List:
+        """
+        Returns the track names of random distinct rows whose name is not excluded.
+        Rows are drawn by rejection, so the cost depends on the number of rows drawn, not the catalog size.
+
+        Parameters:
+            count (int): Number of rows to draw.
+            exclude (Iterable[int]): Name ids that must not be drawn.
+
+        Returns:
+            list: Up to count track names; fewer if not enough rows are eligible.
+        """
+        exclude = set(exclude)
+        eligible = int(self._row_counts.sum() - self._row_counts[list(exclude)].sum())
+        count = min(count, eligible)
+        if count <= 0:
+            return []
+
+        total = len(self._name_codes)
+        if eligible < 4 * count or eligible * 4 < total:
+            # Too few eligible rows for rejection to be cheap, so list them
+            rows = np.flatnonzero((self._name_codes >= 0) & ~np.isin(self._name_codes, list(exclude)))
+            picked = [self._name_codes[row] for row in random.sample(rows.tolist(), count)]
+            return self.names[picked].tolist()
+
+        seen, picked = set(), []
+        while len(picked) < count:
+            row = random.randrange(total)
+            if row in seen:
+                continue
+            seen.add(row)
+            name_id = self._name_codes[row]
+            if name_id >= 0 and name_id not in exclude:
+                picked.append(name_id)
+        return self.names[picked].tolist()
+
+
+class SortedColumnIndex:
+    """
+    Sorted permutation of one numeric column, so the rows with a value in [low, high] are found
+    with two binary searches instead of a full boolean mask. Missing values never match.
+    """
+
+    def __init__(self, column: pd.Series):
+        self.values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        # NaN sorts last, so it is never inside a finite range
+        self.order = np.argsort(self.values, kind="stable")
+        self.sorted_values = self.values[self.order]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def rows_between(self, low, high) -> np.ndarray:
+        """
+        Returns the ids of the rows with low <= value <= high.
+
+        Parameters:
+            low: Lower bound, inclusive.
+            high: Upper bound, inclusive.
+
+        Returns:
+            np.ndarray: Row ids, in value order.
+        """
+        start = np.searchsorted(self.sorted_values, low, side="left")
+        stop = np.searchsorted(self.sorted_values, high, side="right")
+        return self.order[start:max(start, stop)]
+
+    def mask_between(self, rows: np.ndarray, low, high) -> np.ndarray:
+        """Returns a boolean mask of the given rows whose value is in [low, high]."""
+        values = self.values[rows]
+        return (values >= low) & (values <= high)
+
+
+def find_first_row(snapshot, track_query: str, artist_query: str) -> Optional[int]:
+    """
+    Returns the first row whose track_name and artist contain the given texts, ignoring case.
+    The trigram indexes of both columns are built once per snapshot.
+
+    Parameters:
+        snapshot (CatalogSnapshot): Snapshot of a dataset with track_name and artist columns.
+        track_query (str): Part of the song name.
+        artist_query (str): Part of the artist name.
+
+    Returns:
+        int or None: Position of the first matching row, or None if no row matches.
+    """
+    tracks = snapshot.derived(("trigrams", "track_name"), lambda frame: TrigramIndex(frame["track_name"]))
+    artists = snapshot.derived(("trigrams", "artist"), lambda frame: TrigramIndex(frame["artist"]))
+    track_ids = tracks.candidates(track_query)
+    artist_ids = artists.candidates(artist_query)
+
+    if track_ids is None and artist_ids is None:
+        rows = np.flatnonzero((tracks.codes >= 0) & (artists.codes >= 0))
+    elif artist_ids is None or (track_ids is not None and track_ids.size <= artist_ids.size):
+        # Gather the rows of the rarer side and check the other column on those rows only
+        rows = tracks.rows_of(track_ids)
+        other = artists.codes[rows]
+        rows = rows[(other >= 0) if artist_ids is None else np.isin(other, artist_ids)]
+    else:
+        rows = artists.rows_of(artist_ids)
+        other = tracks.codes[rows]
+        rows = rows[(other >= 0) if track_ids is None else np.isin(other, track_ids)]
+
+    # Candidates are a superset of the matches; verify in row order and stop at the first match
+    for row in np.sort(rows).tolist():
+        if tracks.contains(tracks.codes[row], track_query) and artists.contains(artists.codes[row], artist_query):
+            return row
+    return None
+
+
+def key_index(snapshot) -> KeyIndex:
+    """
+    Returns the song key index for a catalog snapshot, building it once per snapshot.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+
+    Returns:
+        KeyIndex: The cached index.
+    """
+    return snapshot.derived("key_index", KeyIndex)
+
+
+def genre_index(snapshot) -> GenreIndex:
+    """
+    Returns the genre index for a catalog snapshot, building it once per snapshot.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+
+    Returns:
+        GenreIndex: The cached index.
+    """
+    return snapshot.derived("genre_index", GenreIndex)
+
+
+def range_index(snapshot, column: str) -> SortedColumnIndex:
+    """
+    Returns the sorted index of a numeric column of a catalog snapshot, building it once per snapshot.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        column (str): Name of the column.
+
+    Returns:
+        SortedColumnIndex: The cached index.
+    """
+    return snapshot.derived(("range", column), lambda frame: SortedColumnIndex(frame[column]))
+
+
+def rows_in_ranges(snapshot, ranges: Dict[str, Tuple[float, float]]) -> np.ndarray:
+    """
+    Returns the rows of a catalog snapshot whose values fall inside every (min, max) range.
+    The narrowest range is resolved by binary search and the other ranges are only checked on its rows.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        ranges (dict): Column name -> (min, max), both inclusive. Every column must exist.
+
+    Returns:
+        np.ndarray: Matching row ids in dataset order.
+    """
+    if not ranges:
+        return np.arange(len(snapshot.frame))
+
+    bounds = [(range_index(snapshot, column), low, high) for column, (low, high) in ranges.items()]
+    matches = sorted(((index.rows_between(low, high), index, low, high) for index, low, high in bounds),
+                     key=lambda match: len(match[0]))
+    rows = matches[0][0]
+    for _, index, low, high in matches[1:]:
+        if not rows.size:
+            break
+        rows = rows[index.mask_between(rows, low, high)]
+    return np.sort(rows)
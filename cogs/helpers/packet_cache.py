@@ -0,0 +1,212 @@
+# cogs/helpers/packet_cache.py
+"""
+This file contains the in-memory cache of Opus packets of recently played tracks.
+While a track is passed through as Opus its packets are recorded; once it played to the end,
+other guilds starting the same track read the packets from memory instead of extracting the
+video and spawning FFmpeg. The cache keeps to a byte budget and never evicts a track that is playing.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+import discord
+from cogs.helpers.audio import FRAME_SECONDS
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+
+class TrackPackets:
+    """
+    The Opus packets of one track, 20ms each. Complete once the track was recorded to its end.
+    """
+
+    def __init__(self, key: str, duration: Optional[float] = None):
+        self.key = key
+        self.duration = duration
+        self.packets: List[bytes] = []
+        self.nbytes = 0
+        self.complete = False
+        self.refs = 0
+
+
+class PacketCache:
+    """
+    LRU cache of TrackPackets keyed by video id, limited to max_bytes including tracks being recorded.
+    Tracks with readers (refs) are never evicted. A max_bytes of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._tracks: "OrderedDict[str, TrackPackets]" = OrderedDict()
+        self._recording = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Bytes held by cached and recording tracks."""
+        return self._bytes
+
+    def get(self, key: Optional[str]) -> Optional[TrackPackets]:
+        """
+        Returns the complete packets of a track and marks it as recently played.
+
+        Parameters:
+            key (str): The video id.
+
+        Returns:
+            TrackPackets or None: The packets, or None if the track is not cached.
+        """
+        with self._lock:
+            track = self._tracks.get(key) if key else None
+            if track is not None:
+                self._tracks.move_to_end(key)
+            return track
+
+    def open(self, track: TrackPackets, offset: float = 0) -> "CachedOpusSource":
+        """
+        Opens a cached track for playback.
+
+        Parameters:
+            track (TrackPackets): Packets returned by get.
+            offset (float): Position in seconds to start at.
+
+        Returns:
+            CachedOpusSource: Opus source reading the packets from memory.
+        """
+        with self._lock:
+            track.refs += 1
+        return CachedOpusSource(self, track, int(offset / FRAME_SECONDS))
+
+    def record(self, key: Optional[str], source: discord.AudioSource, duration: Optional[float] = None) -> discord.AudioSource:
+        """
+        Records the packets of an Opus source as it plays, unless the track is cached or being recorded.
+
+        Parameters:
+            key (str): The video id.
+            source (discord.AudioSource): Opus source playing the track from its start.
+            duration (float, optional): Length of the track in seconds.
+
+        Returns:
+            discord.AudioSource: A RecordingSource wrapping the source, or the source itself.
+        """
+        if self.max_bytes <= 0 or not key or not source.is_opus():
+            return source
+        with self._lock:
+            if key in self._tracks or key in self._recording:
+                return source
+            track = self._recording[key] = TrackPackets(key, duration)
+            track.refs += 1
+        return RecordingSource(self, track, source)
+
+    def _append(self, track: TrackPackets, packet: bytes) -> bool:
+        """Adds a recorded packet, evicting idle tracks for room. Returns False if the recording was given up."""
+        with self._lock:
+            if self._recording.get(track.key) is not track:
+                return False
+            self._bytes += len(packet)
+            if not self._evict():
+                del self._recording[track.key]
+                self._bytes -= track.nbytes + len(packet)
+                track.packets = []
+                logger.debug(f"PacketCache: Gave up recording '{track.key}', the cache is full.")
+                return False
+            track.packets.append(packet)
+            track.nbytes += len(packet)
+            return True
+
+    def _evict(self) -> bool:
+        """Evicts least recently played idle tracks until the budget is kept. Must be called with the lock held."""
+        idle = [key for key, track in self._tracks.items() if track.refs == 0]
+        while self._bytes > self.max_bytes and idle:
+            track = self._tracks.pop(idle.pop(0))
+            self._bytes -= track.nbytes
+            logger.debug(f"PacketCache: Evicted '{track.key}'.")
+        return self._bytes <= self.max_bytes
+
+    def _finish(self, track: TrackPackets, complete: bool):
+        """Ends a recording, keeping the track if it was recorded to its end."""
+        with self._lock:
+            track.refs -= 1
+            if self._recording.get(track.key) is not track:
+                return
+            del self._recording[track.key]
+            if complete and track.duration and len(track.packets) * FRAME_SECONDS < track.duration - 1:
+                # The stream broke off early; replaying the cut track would end it early too
+                complete = False
+            if complete and track.packets:
+                track.complete = True
+                self._tracks[track.key] = track
+                logger.info(f"PacketCache: Cached '{track.key}' ({track.nbytes} bytes).")
+            else:
+                self._bytes -= track.nbytes
+                track.packets = []
+
+    def _release(self, track: TrackPackets):
+        """Drops a reader's reference to a track."""
+        with self._lock:
+            track.refs -= 1
+
+
+class RecordingSource(discord.AudioSource):
+    """
+    Opus source that records the packets it passes on into a PacketCache.
+    """
+
+    def __init__(self, cache: PacketCache, track: TrackPackets, source: discord.AudioSource):
+        self.cache = cache
+        self.track = track
+        self.source = source
+        self._recording = True
+        self._finished = False
+
+    def is_opus(self) -> bool:
+        return True
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if self._recording:
+            if data:
+                self._recording = self.cache._append(self.track, data)
+            else:
+                self._recording = False
+                self._finished = True
+                self.cache._finish(self.track, complete=True)
+        return data
+
+    def cleanup(self):
+        if not self._finished:
+            # Stopped before the end, e.g. skipped; an incomplete track is not kept
+            self._recording = False
+            self._finished = True
+            self.cache._finish(self.track, complete=False)
+        self.source.cleanup()
+
+
+class CachedOpusSource(discord.AudioSource):
+    """
+    Opus source that plays a cached track from memory.
+    """
+
+    def __init__(self, cache: PacketCache, track: TrackPackets, index: int = 0):
+        self.cache = cache
+        self.track = track
+        self._index = index
+        self._released = False
+
+    def is_opus(self) -> bool:
+        return True
+
+    def read(self) -> bytes:
+        packets = self.track.packets
+        if self._index >= len(packets):
+            return b""
+        self._index += 1
+        return packets[self._index - 1]
+
+    def cleanup(self):
+        if not self._released:
+            self._released = True
+            self.cache._release(self.track)
@@ -0,0 +1,241 @@
+# cogs/helpers/players.py
+"""
+This file contains the per-guild playback state.
+Every guild gets its own queue, voice client, prefetcher and playback flags, created on first use
+and evicted once the guild has been idle for a while, so one bot process can serve many guilds
+without them sharing a queue.
+Playback changes of a guild (play, skip, stop, seek, volume, preloads of the next song and track ends
+reported by the audio thread) are commands handled one at a time by the guild's player task, so they
+never race.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+from cogs.helpers.songs_queue import Songs_Queue
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+# Seconds a guild may sit without playing or issuing commands before its player is evicted
+PLAYER_IDLE_TIMEOUT = float(os.getenv("PLAYER_IDLE_TIMEOUT", 1800))
+
+
+class PlayerCommand:
+    """
+    A playback command for a guild's player task.
+    done resolves to the handler's return value once the command was handled.
+    """
+
+    __slots__ = ("kind", "ctx", "value", "done")
+
+    def __init__(self, kind: str, ctx: Any = None, value: Any = None, done: Optional[asyncio.Future] = None):
+        self.kind = kind
+        self.ctx = ctx
+        self.value = value
+        self.done = done
+
+
+class GuildPlayer:
+    """
+    Playback state of one guild.
+    """
+
+    def __init__(self, guild_id: Optional[int]):
+        self.guild_id = guild_id
+        self.queue = Songs_Queue()
+        self.voice_client = None
+        self.prefetcher = None  # Attached by the Songs cog when the guild first plays
+        self.manually_stopped = False
+        self.volume = 1.0
+        self.crossfade: Optional[float] = None  # Seconds; None uses the bot's default
+        self.equalizer = (0.0, 0.0)  # Bass and treble gain in dB
+        # Incremented whenever a new player is started; callbacks of older players are ignored
+        self.generation = 0
+        self.last_used = time.monotonic()
+        self.commands: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        # The song the queue plays next, updated on every queue change; read by the audio thread
+        self.next_tag = None
+        self.queue.on_change = self._queue_changed
+        # The guild's open !poll: its songs, the poll message id and the id of the message that asked for it
+        self.poll_songs = None
+        self.poll_message_id = None
+        self.poll_command_msg_id = None
+
+    def touch(self):
+        """Marks the player as used now."""
+        self.last_used = time.monotonic()
+
+    def is_active(self) -> bool:
+        """Returns True if the guild's voice client is playing or paused."""
+        voice_client = self.voice_client
+        return voice_client is not None and (voice_client.is_playing() or voice_client.is_paused())
+
+    def _queue_changed(self):
+        """
+        Updates next_tag as soon as the queue changes, so a queued track that is no longer next is never played.
+        The queue itself is not read from the audio thread.
+        """
+        upcoming = self.queue.upcoming(1)
+        self.next_tag = upcoming[0] if upcoming else None
+
+    def start(self, handler: Callable[["GuildPlayer", PlayerCommand], Awaitable[Any]]):
+        """
+        Starts the player task if it is not running. It passes every submitted command to the handler, in order.
+
+        Parameters:
+            handler (Callable): Coroutine function called as handler(player, command).
+        """
+        if self.task is not None and not self.task.done():
+            return
+        if self.commands is None:
+            self.commands = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run(handler))
+
+    def stop_task(self):
+        """Cancels the player task. Commands still queued are kept for the next start."""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def _run(self, handler: Callable[["GuildPlayer", PlayerCommand], Awaitable[Any]]):
+        """Handles commands one at a time until cancelled."""
+        while True:
+            command = await self.commands.get()
+            try:
+                result = await handler(self, command)
+            except asyncio.CancelledError:
+                if command.done is not None and not command.done.done():
+                    command.done.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"GuildPlayer: Command '{command.kind}' failed in guild {self.guild_id} - {e}")
+                result = None
+            if command.done is not None and not command.done.done():
+                command.done.set_result(result)
+
+    def submit(self, kind: str, ctx: Any = None, value: Any = None) -> asyncio.Future:
+        """
+        Queues a command for the player task. Must be called on the event loop.
+
+        Parameters:
+            kind (str): The command, e.g. "play" or "skip".
+            ctx (commands.Context, optional): The context the command came from.
+            value (Any): The command's argument.
+
+        Returns:
+            asyncio.Future: Resolves to the handler's result once the command was handled.
+        """
+        if self.commands is None:
+            self.commands = asyncio.Queue()
+        self.touch()
+        done = asyncio.get_running_loop().create_future()
+        self.commands.put_nowait(PlayerCommand(kind, ctx, value, done))
+        return done
+
+    def submit_threadsafe(self, loop: asyncio.AbstractEventLoop, kind: str, ctx: Any = None, value: Any = None):
+        """
+        Queues a command from another thread, e.g. the audio thread. Nobody waits for its result.
+
+        Parameters:
+            loop (asyncio.AbstractEventLoop): The loop the player task runs on.
+            kind (str): The command.
+            ctx (commands.Context, optional): The context the command came from.
+            value (Any): The command's argument.
+        """
+        command = PlayerCommand(kind, ctx, value)
+        loop.call_soon_threadsafe(lambda: self.commands.put_nowait(command))
+
+    async def close(self):
+        """Stops the player task, cancels background work and leaves the voice channel."""
+        self.stop_task()
+        if self.prefetcher is not None:
+            self.prefetcher.cancel()
+        voice_client, self.voice_client = self.voice_client, None
+        if voice_client is not None and voice_client.is_connected():
+            await voice_client.disconnect()
+            logger.info(f"GuildPlayer: Disconnected idle player of guild {self.guild_id}.")
+
+
+class PlayerRegistry:
+    """
+    Registry of GuildPlayers keyed by guild id. Players are created lazily by get.
+    """
+
+    def __init__(self, idle_timeout: float = PLAYER_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._players: Dict[Optional[int], GuildPlayer] = {}
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, guild) -> bool:
+        return self._key(guild) in self._players
+
+    def __iter__(self) -> Iterator[GuildPlayer]:
+        return iter(list(self._players.values()))
+
+    @staticmethod
+    def _key(guild) -> Optional[int]:
+        """Returns the registry key of a guild, guild id or None (direct messages)."""
+        if guild is None or isinstance(guild, int):
+            return guild
+        return guild.id
+
+    def get(self, guild) -> GuildPlayer:
+        """
+        Returns the player of a guild, creating it if needed.
+
+        Parameters:
+            guild (discord.Guild or int or None): The guild, its id, or None for direct messages.
+
+        Returns:
+            GuildPlayer: The guild's player.
+        """
+        key = self._key(guild)
+        player = self._players.get(key)
+        if player is None:
+            player = self._players[key] = GuildPlayer(key)
+            logger.info(f"PlayerRegistry: Created player for guild {key}.")
+        player.touch()
+        return player
+
+    def remove(self, guild) -> Optional[GuildPlayer]:
+        """
+        Removes the player of a guild without closing it.
+
+        Parameters:
+            guild (discord.Guild or int or None): The guild or its id.
+
+        Returns:
+            GuildPlayer or None: The removed player.
+        """
+        return self._players.pop(self._key(guild), None)
+
+    def evict_idle(self, now: Optional[float] = None) -> List[GuildPlayer]:
+        """
+        Removes players that are not playing and have not been used for idle_timeout seconds.
+        The caller closes the returned players.
+
+        Parameters:
+            now (float, optional): Current time.monotonic() value.
+
+        Returns:
+            List[GuildPlayer]: The evicted players.
+        """
+        now = time.monotonic() if now is None else now
+        evicted = [
+            player for player in self._players.values()
+            if not player.is_active() and now - player.last_used >= self.idle_timeout
+        ]
+        for player in evicted:
+            del self._players[player.guild_id]
+            logger.info(f"PlayerRegistry: Evicted idle player of guild {player.guild_id}.")
+        return evicted
+
+
+# Players of all guilds served by this process, shared by the cogs
+PLAYERS = PlayerRegistry()
@@ -0,0 +1,107 @@
+# cogs/helpers/prefetcher.py
+"""
+This file contains the background prefetcher for the song queue.
+While a song plays, the next entries of the queue are resolved to playable stream URLs,
+so a track change only has to open the stream instead of searching and extracting it.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+Song = Tuple[str, str, str, Optional[str]]
+
+
+class Prefetcher:
+    """
+    Resolves the next entries of a Songs_Queue in background tasks.
+    The resolver is expected to cache its results (search and stream caches), so resolving a
+    prefetched song again is immediate. When the queue changes, work for entries that left the
+    prefetch window is cancelled and the new entries are scheduled.
+    """
+
+    def __init__(self, resolve: Callable[[Song], Awaitable[dict]], depth: int = 2):
+        self.resolve_song = resolve
+        self.depth = depth
+        self.queue = None
+        self._tasks: Dict[Song, asyncio.Task] = {}
+
+    def attach(self, queue):
+        """
+        Attaches the prefetcher to a queue, which then calls refresh whenever it changes.
+
+        Parameters:
+            queue (Songs_Queue): The queue to prefetch from.
+        """
+        self.queue = queue
+        queue.prefetcher = self
+
+    def refresh(self):
+        """
+        Prefetches the entries after the current one and cancels work for entries that are no longer upcoming.
+        Does nothing outside a running event loop.
+        """
+        if self.queue is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        wanted = self.queue.upcoming(self.depth)
+        for song in list(self._tasks):
+            if song not in wanted:
+                self._tasks.pop(song).cancel()
+                logger.debug(f"Prefetcher: Cancelled '{song[0]}'.")
+        for song in wanted:
+            if song not in self._tasks:
+                self._tasks[song] = asyncio.ensure_future(self._prefetch(song))
+
+    def cancel(self):
+        """Cancels all prefetch work."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def is_ready(self, song: Song) -> bool:
+        """Returns True if the song was prefetched successfully."""
+        task = self._tasks.get(song)
+        return task is not None and task.done() and not task.cancelled() and task.result()
+
+    async def _prefetch(self, song: Song) -> bool:
+        """Resolves one song, logging instead of raising on failure."""
+        try:
+            await self.resolve_song(song)
+            logger.debug(f"Prefetcher: Prefetched '{song[0]}' by '{song[1]}'.")
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Prefetcher: Could not prefetch '{song[0]}' by '{song[1]}' - {e}")
+            return False
+
+    async def resolve(self, song: Song) -> dict:
+        """
+        Resolves a song for playback, joining its prefetch if one is still running.
+
+        Parameters:
+            song (tuple): The song as (track_name, artist, source, url).
+
+        Returns:
+            dict: Whatever the resolver returns for the song.
+
+        Raises:
+            Exception: Whatever the resolver raised.
+        """
+        task = self._tasks.get(song)
+        if task is not None and not task.done():
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # Only the prefetch was cancelled (the queue changed); resolve it here instead
+                if not task.cancelled():
+                    raise
+        return await self.resolve_song(song)
@@ -3,19 +3,31 @@
 This file contains the enhanced recommendation function that uses cosine similarity to recommend songs.
 """
 
-from cogs.helpers.utils import retrieve_song_attributes, cosine_similarity
-from cogs.helpers.get_all import get_all_songs
+from cogs.helpers import get_all
+from cogs.helpers.indexes import key_index
+from cogs.helpers.similarity import feature_matrix
+import numpy as np
+import pandas as pd
 import logging
 
 # Initialize Logger
 logger = logging.getLogger(__name__)
 
+
+def _genre_codes(frame: pd.DataFrame):
+    """Returns (codes, genres) with one integer genre code per row."""
+    return pd.factorize(frame["genre"])
+
+
 def recommend_enhanced(input_songs: list) -> list:
     """
     Returns recommended songs based on the songs that the user selected.
     It uses cosine similarity to recommend songs. It will return a list of 10 songs that are the most
     similar to the input songs.
 
+    Every song in the genres of the input songs is scored against the mean of the input feature
+    vectors with a single matrix-vector product, and the best 10 are selected with argpartition.
+
     Parameters:
         input_songs (list): List of songs that the user selected. Format as (track_name, artist).
 
@@ -23,72 +35,26 @@ def recommend_enhanced(input_songs: list) -> list:
         list: List of recommended songs as tuples (track_name, artist).
     """
 
-    # Get all songs
-    all_songs = get_all_songs()
-
-    # Iterate through all the songs and get the cosine similarity between the input songs and all the songs
-    # and store it in a list with the song tuple and the similarity score
-
-    # Get the song attributes for the input songs
-    input_song_attributes = {}
-    genres = []
-    for song in input_songs:
-        song_name, artist = song
-        song_attributes = retrieve_song_attributes(song_name, artist)
-        if song_attributes:
-            input_song_attributes[(song_name, artist)] = song_attributes
+    # Read everything from one snapshot so a concurrent reload cannot mix datasets
+    snapshot = get_all.TCC_CATALOG.snapshot()
+    all_songs = snapshot.frame
 
-            # Get the genre of the song
-            genre_series = all_songs.loc[
-                (all_songs["track_name"].str.lower() == song_name.lower()) &
-                (all_songs["artist"].str.lower() == artist.lower())
-            ]["genre"]
-            if not genre_series.empty:
-                genres.append(genre_series.iloc[0])
+    # Find the catalog rows and genres of the input songs in one lookup
+    input_rows = key_index(snapshot).rows(input_songs)
+    input_rows = input_rows[input_rows >= 0].tolist()
 
-    if not input_song_attributes:
+    if not input_rows:
         logger.warning("recommend_enhanced: No valid input songs found for recommendations.")
         return []
 
-    # Filter the songs based on the genres of the input songs
-    all_songs_filtered = all_songs[all_songs["genre"].isin(genres)]
-
-    # Get song attributes for filtered songs
-    all_song_attributes = {}
-    num_retrieved = 0
-    max_retrieved = 500  # Limit to first 500 songs for performance
-
-    # Randomize the order of the songs
-    all_songs_filtered = all_songs_filtered.sample(frac=1).reset_index(drop=True)
-
-    for index, row in all_songs_filtered.iterrows():
-        song_name = row["track_name"]
-        artist = row["artist"]
-        song_attributes = retrieve_song_attributes(song_name, artist)
-        if song_attributes:
-            all_song_attributes[(song_name, artist)] = song_attributes
-            num_retrieved += 1
-        if num_retrieved >= max_retrieved:
-            break
-
-    # Calculate the cosine similarity between the input songs and all the songs
-    similarity_scores = []
-
-    for song_tuple, attributes in all_song_attributes.items():
-        similarity_score = 0.0
-        for input_song_tuple, input_attributes in input_song_attributes.items():
-            sim = cosine_similarity(
-                song_tuple[0], song_tuple[1],
-                input_song_tuple[0], input_song_tuple[1]
-            )
-            similarity_score += sim
-        similarity_score /= len(input_song_attributes)
-        similarity_scores.append((song_tuple, similarity_score))
+    # Only songs in the genres of the input songs are candidates
+    codes, _ = snapshot.derived("genre_codes", _genre_codes)
+    candidates = np.isin(codes, codes[input_rows])
 
-    # Sort the similarity scores in descending order
-    similarity_scores.sort(key=lambda x: x[1], reverse=True)
+    top_rows = feature_matrix(snapshot).top_k(input_rows, k=10, candidates=candidates)
 
-    # Return the top 10 recommended songs
-    recommended_songs = [x[0] for x in similarity_scores[:10]]
+    track_names = all_songs["track_name"].to_numpy()
+    artists = all_songs["artist"].to_numpy()
+    recommended_songs = [(track_names[row], artists[row]) for row in top_rows]
     logger.info(f"recommend_enhanced: Generated {len(recommended_songs)} recommendations.")
     return recommended_songs
@@ -0,0 +1,136 @@
+# cogs/helpers/similarity.py
+"""
+This file contains the vectorized cosine-similarity engine used by the recommender.
+The numeric features of the whole catalog are kept in one L2-normalized float32 matrix,
+so scoring every candidate against the input songs is a single matrix-vector product.
+"""
+
+import logging
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+# Audio and lyric features of tcc_ceds_music.csv, all scored between 0 and 1
+TCC_FEATURES = [
+    'dating', 'violence', 'world/life', 'night/time', 'shake the audience', 'family/gospel',
+    'romantic', 'communication', 'obscene', 'music', 'movement/places', 'light/visual perceptions',
+    'family/spiritual', 'like/girls', 'sadness', 'feelings', 'danceability', 'loudness',
+    'acousticness', 'instrumentalness', 'valence', 'energy'
+]
+
+# Numeric audio features of songs.csv
+SONGS_FEATURES = ['bpm', 'nrgy', 'dnce', 'dB', 'live', 'val', 'dur', 'acous', 'spch', 'pop']
+
+
+class FeatureMatrix:
+    """
+    Row-aligned feature matrix for a catalog frame.
+    Each feature is min-max scaled to [0, 1] so that no single column dominates, and every row
+    is L2-normalized, so the dot product of two rows is their cosine similarity.
+    """
+
+    def __init__(self, frame: pd.DataFrame, columns: Iterable[str]):
+        self.columns = [column for column in columns if column in frame.columns]
+        raw = frame[self.columns].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        # Scale every feature to [0, 1]; missing values become 0
+        finite = np.isfinite(raw)
+        low = np.where(finite, raw, np.inf).min(axis=0, initial=np.inf)
+        high = np.where(finite, raw, -np.inf).max(axis=0, initial=-np.inf)
+        low[~np.isfinite(low)] = 0.0
+        span = high - low
+        span[~np.isfinite(span) | (span == 0)] = 1.0
+        scaled = np.where(finite, (raw - low) / span, 0.0)
+
+        norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = np.ascontiguousarray(scaled / norms, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def scores(self, rows: Iterable[int]) -> np.ndarray:
+        """
+        Returns the mean cosine similarity of every catalog row to the given rows.
+        Because rows are unit vectors, the mean of the similarities equals the similarity to
+        the mean vector, so this is one matrix-vector product.
+
+        Parameters:
+            rows (Iterable[int]): Row ids of the input songs.
+
+        Returns:
+            np.ndarray: float32 score per catalog row.
+        """
+        rows = np.asarray(list(rows), dtype=np.intp)
+        if rows.size == 0:
+            return np.zeros(len(self), dtype=np.float32)
+        query = self.matrix[rows].mean(axis=0)
+        return self.matrix @ query
+
+    def top_k(self, rows: Iterable[int], k: int = 10, candidates: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Returns the k catalog rows most similar to the input rows, excluding the input rows.
+
+        Parameters:
+            rows (Iterable[int]): Row ids of the input songs.
+            k (int): Number of rows to return.
+            candidates (np.ndarray, optional): Boolean mask of rows allowed in the result.
+
+        Returns:
+            list: Row ids ordered from most to least similar.
+        """
+        rows = list(rows)
+        scores = self.scores(rows)
+        if candidates is not None:
+            scores[~candidates] = -np.inf
+        scores[rows] = -np.inf
+
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+
+def _attribute_matrix(frame: pd.DataFrame, columns: Tuple[str, ...]) -> np.ndarray:
+    """Returns the raw values of the feature columns as a read-only float64 matrix."""
+    matrix = np.zeros((len(frame), len(columns)), dtype=np.float64)
+    for i, column in enumerate(columns):
+        if column in frame.columns:
+            matrix[:, i] = pd.to_numeric(frame[column], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def attribute_matrix(snapshot, columns: Iterable[str]) -> np.ndarray:
+    """
+    Returns the unscaled feature values of every row of a catalog snapshot, built once per snapshot.
+    Missing columns and values are 0.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        columns (Iterable[str]): Feature columns, in order.
+
+    Returns:
+        np.ndarray: (rows, len(columns)) float64 matrix.
+    """
+    columns = tuple(columns)
+    return snapshot.derived(("attributes", columns), lambda frame: _attribute_matrix(frame, columns))
+
+
+def feature_matrix(snapshot, columns: Iterable[str] = TCC_FEATURES) -> FeatureMatrix:
+    """
+    Returns the feature matrix for a catalog snapshot, building it once per snapshot.
+
+    Parameters:
+        snapshot (CatalogSnapshot): The catalog snapshot.
+        columns (Iterable[str]): Feature columns to use.
+
+    Returns:
+        FeatureMatrix: The cached feature matrix.
+    """
+    columns = tuple(columns)
+    return snapshot.derived(("features", columns), lambda frame: FeatureMatrix(frame, columns))
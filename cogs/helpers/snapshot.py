@@ -0,0 +1,367 @@
+# cogs/helpers/snapshot.py
+"""
+This file is responsible for the binary catalog snapshot format.
+A snapshot stores a dataset column by column: numeric columns as contiguous typed arrays and
+string columns as an offset-indexed UTF-8 blob. Snapshots are opened with mmap, so numeric
+columns are used without copying and several bot processes share the same page cache.
+Long text columns (e.g. lyrics) stay in the mapped blob as SnapshotTextArrays and are only decoded
+where they are read, so loading a snapshot does not create a Python string per row for them.
+
+Layout:
+    MAGIC (8 bytes) | format version (uint32) | header length (uint32) | JSON header | sections
+Every section starts on a SECTION_ALIGN byte boundary.
+"""
+
+import os
+import json
+import mmap
+import struct
+import logging
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype, take
+from pandas.api.indexers import check_array_indexer
+from pandas.core.arraylike import OpsMixin
+from pandas.core.strings.object_array import ObjectStringArrayMixin
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ENIGSNAP"
+FORMAT_VERSION = 1
+SECTION_ALIGN = 64
+SNAPSHOT_SUFFIX = ".snap"
+
+_PREAMBLE = struct.Struct("<8sII")
+
+# String columns averaging more UTF-8 bytes per row than this are decoded lazily
+LAZY_TEXT_BYTES = 256
+
+
+@register_extension_dtype
+class SnapshotTextDtype(ExtensionDtype):
+    """
+    Dtype of text columns that are decoded from a snapshot blob on access.
+    """
+
+    name = "snapshot_text"
+    type = str
+    kind = "O"
+    na_value = np.nan
+
+    @classmethod
+    def construct_array_type(cls):
+        return SnapshotTextArray
+
+
+class SnapshotTextArray(OpsMixin, ObjectStringArrayMixin, ExtensionArray):
+    """
+    Read-only text column backed by a UTF-8 blob and the byte range of every row.
+    Selecting, reordering and copying rows only touches the ranges; values are decoded when they
+    are read, e.g. by iloc, tolist, comparisons, .str methods or astype(object).
+    """
+
+    def __init__(self, blob, starts: np.ndarray, ends: np.ndarray, nulls: np.ndarray):
+        self._blob = blob
+        self._starts = starts
+        self._ends = ends
+        self._nulls = nulls
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        values = list(scalars)
+        nulls = np.asarray(pd.isna(values), dtype=bool).reshape(len(values))
+        encoded = [b"" if null else str(value).encode("utf-8") for value, null in zip(values, nulls)]
+        ends = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+        starts = ends - [len(value) for value in encoded]
+        return cls(b"".join(encoded), starts, ends, nulls)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values)
+
+    @property
+    def dtype(self) -> SnapshotTextDtype:
+        return SnapshotTextDtype()
+
+    @property
+    def nbytes(self) -> int:
+        return int((self._ends - self._starts).sum()) + self._starts.nbytes + self._ends.nbytes + self._nulls.nbytes
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _decode(self, row: int):
+        """Returns the value of one row."""
+        if self._nulls[row]:
+            return np.nan
+        return str(self._blob[self._starts[row]:self._ends[row]], "utf-8")
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self._decode(item)
+        if not isinstance(item, slice):
+            item = check_array_indexer(self, item)
+        return type(self)(self._blob, self._starts[item], self._ends[item], self._nulls[item])
+
+    def __iter__(self):
+        return iter(self.to_numpy(dtype=object))
+
+    def __array__(self, dtype=None, copy=None):
+        ranges = zip(self._starts.tolist(), self._ends.tolist(), self._nulls.tolist())
+        blob = self._blob
+        if 2 * int((self._ends - self._starts).sum()) >= len(blob):
+            # Most of the blob is read anyway: decode it at once and, if it is ASCII, slice the text
+            text = str(blob, "utf-8")
+            blob = text if len(text) == len(blob) else bytes(blob)
+        values = np.empty(len(self), dtype=object)
+        if isinstance(blob, str):
+            values[:] = [np.nan if null else blob[start:end] for start, end, null in ranges]
+        else:
+            values[:] = [np.nan if null else str(blob[start:end], "utf-8") for start, end, null in ranges]
+        return values if dtype is None or dtype == object else values.astype(dtype)
+
+    def isna(self) -> np.ndarray:
+        return self._nulls.copy()
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        if allow_fill and not pd.isna(fill_value):
+            # Filling with text needs the values themselves
+            return type(self)._from_sequence(take(np.asarray(self), indices, allow_fill=True, fill_value=fill_value))
+        starts = take(self._starts, indices, allow_fill=allow_fill, fill_value=0)
+        ends = take(self._ends, indices, allow_fill=allow_fill, fill_value=0)
+        nulls = take(self._nulls, indices, allow_fill=allow_fill, fill_value=True)
+        return type(self)(self._blob, starts, ends, nulls.astype(bool))
+
+    def copy(self):
+        # The blob is read-only, so only the row ranges are copied
+        return type(self)(self._blob, self._starts.copy(), self._ends.copy(), self._nulls.copy())
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+        if all(array._blob is to_concat[0]._blob for array in to_concat):
+            return cls(
+                to_concat[0]._blob,
+                np.concatenate([array._starts for array in to_concat]),
+                np.concatenate([array._ends for array in to_concat]),
+                np.concatenate([array._nulls for array in to_concat]),
+            )
+        return cls._from_sequence(np.concatenate([np.asarray(array) for array in to_concat]))
+
+    def _cmp_method(self, other, op):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        if pd.api.types.is_list_like(other):
+            other = np.asarray(other, dtype=object)
+        return np.asarray(op(np.asarray(self), other), dtype=bool)
+
+    _str_na_value = np.nan
+
+
+def snapshot_path(csv_path: str) -> str:
+    """
+    Returns the snapshot path that belongs to a CSV dataset.
+
+    Parameters:
+        csv_path (str): Path of the CSV file.
+
+    Returns:
+        str: Path of the snapshot file, e.g. data/songs.snap for data/songs.csv.
+    """
+    return os.path.splitext(csv_path)[0] + SNAPSHOT_SUFFIX
+
+
+def _align(offset: int) -> int:
+    """Rounds an offset up to the next section boundary."""
+    return (offset + SECTION_ALIGN - 1) // SECTION_ALIGN * SECTION_ALIGN
+
+
+def _encode_column(series: pd.Series) -> Tuple[dict, list]:
+    """
+    Encodes one column into its header entry and the list of sections to write.
+
+    Parameters:
+        series (pd.Series): The column.
+
+    Returns:
+        tuple: (column header without offsets, list of (section name, bytes)).
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = np.ascontiguousarray(series.to_numpy())
+        return {"name": series.name, "kind": "numeric", "dtype": values.dtype.str}, [("data", values.tobytes())]
+
+    nulls = series.isna().to_numpy()
+    encoded = [b"" if null else str(value).encode("utf-8") for value, null in zip(series.tolist(), nulls)]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    sections = [("offsets", offsets.tobytes()), ("blob", b"".join(encoded))]
+    column = {"name": series.name, "kind": "string"}
+    if nulls.any():
+        sections.append(("nulls", nulls.astype(np.uint8).tobytes()))
+    return column, sections
+
+
+def write_snapshot(frame: pd.DataFrame, path: str, source_version: Optional[Tuple[int, int]] = None):
+    """
+    Writes a dataset to a snapshot file.
+    The file is written next to the target and renamed into place, so processes that
+    already mapped the old snapshot keep reading it undisturbed.
+
+    Parameters:
+        frame (pd.DataFrame): The dataset.
+        path (str): Path of the snapshot file.
+        source_version (tuple, optional): (mtime in nanoseconds, size) of the CSV the dataset was built from.
+    """
+    columns = []
+    pending = []
+    for name in frame.columns:
+        column, sections = _encode_column(frame[name].rename(str(name)))
+        columns.append(column)
+        pending.append(sections)
+
+    # Lay the sections out, leaving room for a header whose size we only know afterwards
+    def layout(data_start):
+        offset = data_start
+        for column, sections in zip(columns, pending):
+            for section, payload in sections:
+                offset = _align(offset)
+                column[section] = offset
+                if section == "blob":
+                    column["blob_size"] = len(payload)
+                offset += len(payload)
+        return {
+            "rows": len(frame),
+            "source": list(source_version) if source_version else None,
+            "columns": columns,
+        }
+
+    header = layout(0)
+    header_bytes = json.dumps(header).encode("utf-8")
+    # Sizing the header changes the offsets written into it, so iterate until it is stable
+    while True:
+        data_start = _align(_PREAMBLE.size + len(header_bytes))
+        header = layout(data_start)
+        new_header_bytes = json.dumps(header).encode("utf-8")
+        if _align(_PREAMBLE.size + len(new_header_bytes)) == data_start:
+            header_bytes = new_header_bytes
+            break
+        header_bytes = new_header_bytes
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for column, sections in zip(columns, pending):
+            for section, payload in sections:
+                f.seek(column[section])
+                f.write(payload)
+    os.replace(tmp_path, path)
+    logger.info(f"write_snapshot: Wrote {len(frame)} rows to '{path}'.")
+
+
+def read_snapshot_header(path: str) -> Tuple[dict, mmap.mmap]:
+    """
+    Maps a snapshot file and parses its header.
+
+    Parameters:
+        path (str): Path of the snapshot file.
+
+    Returns:
+        tuple: (header dict, read-only mmap of the whole file).
+
+    Raises:
+        ValueError: If the file is not a snapshot of a supported version.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _PREAMBLE.size:
+            raise ValueError(f"'{path}' is too short to be a catalog snapshot.")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, header_size = _PREAMBLE.unpack_from(mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"'{path}' is not a version {FORMAT_VERSION} catalog snapshot.")
+        if _PREAMBLE.size + header_size > len(mapped):
+            raise ValueError(f"The header of '{path}' is truncated.")
+        header = json.loads(mapped[_PREAMBLE.size:_PREAMBLE.size + header_size])
+        _check_sections(header, len(mapped))
+    except ValueError:
+        # json.JSONDecodeError and UnicodeDecodeError are ValueErrors too
+        mapped.close()
+        raise
+    except (KeyError, TypeError) as e:
+        mapped.close()
+        raise ValueError(f"The header of '{path}' is corrupt - {e}")
+    return header, mapped
+
+
+def _check_sections(header: dict, size: int):
+    """
+    Checks that every section named in a snapshot header lies inside the file.
+
+    Parameters:
+        header (dict): The parsed header.
+        size (int): Size of the file in bytes.
+
+    Raises:
+        ValueError: If a section ends past the end of the file.
+    """
+    rows = header["rows"]
+    for column in header["columns"]:
+        if column["kind"] == "numeric":
+            sections = [(column["data"], rows * np.dtype(column["dtype"]).itemsize)]
+        else:
+            sections = [(column["offsets"], (rows + 1) * 8), (column["blob"], column["blob_size"])]
+            if "nulls" in column:
+                sections.append((column["nulls"], rows))
+        for offset, length in sections:
+            if offset < 0 or length < 0 or offset + length > size:
+                raise ValueError(f"Column '{column['name']}' ends past the end of the snapshot.")
+
+
+def read_snapshot(path: str) -> pd.DataFrame:
+    """
+    Opens a snapshot file as a DataFrame.
+    Numeric columns are read-only views of the mapped file. Short string columns are decoded once;
+    long text columns are SnapshotTextArrays decoded where they are read.
+
+    Parameters:
+        path (str): Path of the snapshot file.
+
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    header, mapped = read_snapshot_header(path)
+    rows = header["rows"]
+    data = {}
+    for column in header["columns"]:
+        if column["kind"] == "numeric":
+            data[column["name"]] = np.frombuffer(mapped, dtype=np.dtype(column["dtype"]), count=rows, offset=column["data"])
+            continue
+
+        offsets = np.frombuffer(mapped, dtype="<i8", count=rows + 1, offset=column["offsets"])
+        if "nulls" in column:
+            nulls = np.frombuffer(mapped, dtype=np.uint8, count=rows, offset=column["nulls"]).astype(bool)
+        else:
+            nulls = np.zeros(rows, dtype=bool)
+        blob = memoryview(mapped)[column["blob"]:column["blob"] + column["blob_size"]]
+        text = SnapshotTextArray(blob, offsets[:-1], offsets[1:], nulls)
+        # Short columns such as names and genres are read all the time, so they are decoded once here
+        data[column["name"]] = text if column["blob_size"] > LAZY_TEXT_BYTES * max(rows, 1) else np.asarray(text)
+    return pd.DataFrame(data, copy=False)
+
+
+def snapshot_source_version(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Returns the version stamp of the CSV a snapshot was built from.
+
+    Parameters:
+        path (str): Path of the snapshot file.
+
+    Returns:
+        tuple or None: (mtime in nanoseconds, size) or None if not recorded.
+    """
+    header, mapped = read_snapshot_header(path)
+    mapped.close()
+    return tuple(header["source"]) if header.get("source") else None
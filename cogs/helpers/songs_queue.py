@@ -9,29 +9,18 @@
 # Initialize Logger
 logger = logging.getLogger(__name__)
 
-class Singleton(type):
-    """A metaclass that creates a Singleton base type when called."""
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        """Create a new instance of the class if it does not exist."""
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-            logger.info(f"Creating new instance of {cls.__name__}")
-        return cls._instances[cls]
-
-class Songs_Queue(metaclass=Singleton):
+class Songs_Queue:
     """
-    Singleton class responsible for maintaining the song queue.
+    Class responsible for maintaining the song queue of one guild.
     Songs are stored as tuples: (track_name, artist_name, source, url).
     """
 
     def __init__(self):
-        if not hasattr(self, '_initialized'):
-            self._queue: List[Tuple[str, str, str, Union[str, None]]] = []  # (track_name, artist_name, source, url)
-            self._index: int = 0
-            self._initialized = True
-            logger.info("Songs_Queue initialized with an empty queue.")
+        self._queue: List[Tuple[str, str, str, Union[str, None]]] = []  # (track_name, artist_name, source, url)
+        self._index: int = 0
+        self.prefetcher = None  # Set by Prefetcher.attach
+        self.on_change = None  # Called after every change, set by GuildPlayer
+        logger.debug("Songs_Queue initialized with an empty queue.")
 
     @property
     def queue(self) -> List[Tuple[str, str, str, Union[str, None]]]:
@@ -43,6 +32,26 @@ def index(self) -> int:
         """Returns the current index in the queue."""
         return self._index
 
+    def _changed(self):
+        """Lets the attached prefetcher and player know that the queue or the current index changed."""
+        if self.prefetcher is not None:
+            self.prefetcher.refresh()
+        if self.on_change is not None:
+            self.on_change()
+
+    def upcoming(self, n: int) -> List[Tuple[str, str, str, Union[str, None]]]:
+        """
+        Returns the songs that play after the current one, wrapping around like next_song.
+
+        Parameters:
+            n (int): Maximum number of songs.
+
+        Returns:
+            List[Tuple[str, str, str, Union[str, None]]]: Up to n songs, never including the current one.
+        """
+        count = min(n, len(self._queue) - 1)
+        return [self._queue[(self._index + i) % len(self._queue)] for i in range(1, count + 1)]
+
     async def handle_empty_queue(self, ctx) -> bool:
         """
         Helper function to handle empty song queue.
@@ -65,6 +74,7 @@ def clear(self):
         """Clears the entire queue and resets the index."""
         self._queue.clear()
         self._index = 0
+        self._changed()
         logger.info("Queue cleared and index reset to 0.")
 
     def get_song_at_index(self, idx: int) -> Union[Tuple[str, str, str, Union[str, None]], int]:
@@ -99,6 +109,7 @@ def next_song(self) -> Union[Tuple[str, str, str, Union[str, None]], int]:
             logger.info("next_song: Queue is empty.")
             return -1
         self._index = (self._index + 1) % len(self._queue)
+        self._changed()
         return self.get_song_at_index(self._index)
 
     def prev_song(self) -> Union[Tuple[str, str, str, Union[str, None]], int]:
@@ -113,6 +124,7 @@ def prev_song(self) -> Union[Tuple[str, str, str, Union[str, None]], int]:
             logger.info("prev_song: Queue is empty.")
             return -1
         self._index = (self._index - 1) % len(self._queue)
+        self._changed()
         return self.get_song_at_index(self._index)
 
     def remove_from_queue_by_index(self, idx: int) -> Union[Tuple[str, str, str], int]:
@@ -132,6 +144,7 @@ def remove_from_queue_by_index(self, idx: int) -> Union[Tuple[str, str, str], in
                 self._index = self._index % len(self._queue)
             else:
                 self._index = 0
+        self._changed()
         logger.debug(f"remove_from_queue_by_index: Current index is now {self._index}.")
         logger.debug(f"remove_from_queue_by_index: Current queue: {self._queue}")
         return song
@@ -157,6 +170,7 @@ def move_song_by_index(self, current_idx: int, new_idx: int) -> int:
             self._index += 1
         elif self._index == current_idx:
             self._index = new_idx
+        self._changed()
         logger.debug(f"move_song_by_index: Current index is now {self._index}.")
         logger.debug(f"move_song_by_index: Current queue: {self._queue}")
         return self._index
@@ -194,6 +208,7 @@ def move_song(self, song_name: str, new_position: int) -> int:
         elif self._index == current_idx:
             self._index = new_position - 1
 
+        self._changed()
         return self._index
 
     def get_len(self) -> int:
@@ -217,6 +232,7 @@ def shuffle_queue(self):
         current_song = self._queue.pop(self._index)
         shuffle(self._queue)
         self._queue.insert(self._index, current_song)
+        self._changed()
 
     def add_to_queue(self, songs: Union[Tuple[str, str, str, Union[str, None]], List[Tuple[str, str, str, Union[str, None]]]]):
         """
@@ -229,6 +245,7 @@ def add_to_queue(self, songs: Union[Tuple[str, str, str, Union[str, None]], List
             self._queue.extend(songs)
         else:
             self._queue.append(songs)
+        self._changed()
 
     def remove_from_queue(self, song_name: str) -> Union[Tuple[str, str, str, Union[str, None]], int]:
         """
@@ -247,6 +264,7 @@ def remove_from_queue(self, song_name: str) -> Union[Tuple[str, str, str, Union[
                 # Adjust current index if necessary
                 if index < self._index or self._index >= len(self._queue):
                     self._index = max(0, self._index - 1)
+                self._changed()
                 return removed_song
         return -1
 
@@ -266,5 +284,6 @@ def remove_at_index(self, index: int) -> Union[Tuple[str, str, str, Union[str, N
             # Adjust current index if necessary
             if index <= self._index:
                 self._index = max(0, self._index - 1)
+            self._changed()
             return removed_song
         return -1
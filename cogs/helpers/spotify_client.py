@@ -0,0 +1,162 @@
+# cogs/helpers/spotify_client.py
+"""
+This file contains the asyncio Spotify Web API client used by the cogs.
+All requests share one pooled aiohttp session and the client-credentials token is cached
+until shortly before it expires, so metadata lookups never block the event loop.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Optional
+import aiohttp
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+SEARCH_URL = "https://api.spotify.com/v1/search"
+
+# Refresh the token this many seconds before Spotify says it expires
+TOKEN_EXPIRY_MARGIN = 60
+
+# A rate-limited search is retried this many times, if Spotify asks to wait no longer than MAX_RETRY_AFTER seconds
+RATE_LIMIT_RETRIES = 2
+MAX_RETRY_AFTER = 10.0
+
+
+def retry_after(value: Optional[str]) -> float:
+    """
+    Returns the seconds to wait from a Retry-After header.
+
+    Parameters:
+        value (str or None): The header value in seconds.
+
+    Returns:
+        float: The delay, 1 second if the header is missing or not a number.
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def track_metadata(song: dict) -> dict:
+    """
+    Converts a Spotify track object into the metadata dict used by the bot.
+
+    Parameters:
+        song (dict): Track object from the Spotify Web API.
+
+    Returns:
+        dict: A dictionary containing track metadata.
+    """
+    return {
+        'track_name': song['name'],
+        'artist': ', '.join([artist['name'] for artist in song['artists']]),
+        'album': song['album']['name'],
+        'release_date': song['album']['release_date'],
+        'duration_ms': song['duration_ms'],
+        'popularity': song['popularity'],
+        'external_url': song['external_urls']['spotify'],
+        # Add more attributes if needed
+    }
+
+
+class SpotifyClient:
+    """
+    Minimal asyncio client for the Spotify Web API using the client-credentials flow.
+    The session is created on first use and bound to the running event loop.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, timeout: float = 10.0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the pooled session, creating it if it is missing, closed or bound to another loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            await self.close()
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            self._loop = loop
+            self._token_lock = asyncio.Lock()
+        return self._session
+
+    async def _get_token(self, refresh: bool = False) -> str:
+        """
+        Returns a valid access token, requesting a new one only when the cached one is about to expire.
+
+        Parameters:
+            refresh (bool): Request a new token even if the cached one has not expired.
+
+        Returns:
+            str: The access token.
+        """
+        session = await self._get_session()
+        async with self._token_lock:
+            if not refresh and self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            auth = aiohttp.BasicAuth(self.client_id, self.client_secret)
+            async with session.post(TOKEN_URL, data={"grant_type": "client_credentials"}, auth=auth) as response:
+                response.raise_for_status()
+                payload = await response.json()
+            self._token = payload["access_token"]
+            self._token_expires_at = time.monotonic() + payload.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
+            logger.debug("SpotifyClient: Refreshed access token.")
+            return self._token
+
+    async def search_track(self, query: str) -> Optional[dict]:
+        """
+        Searches Spotify for a track and returns the best match.
+
+        Parameters:
+            query (str): The search query, e.g. "track:Hey Soul Sister".
+
+        Returns:
+            dict or None: The Spotify track object, or None if nothing matched.
+
+        Raises:
+            aiohttp.ClientError: If the request failed, or is still rate limited after RATE_LIMIT_RETRIES retries.
+        """
+        params = {"q": query, "type": "track", "limit": 1}
+        refresh = refreshed = False
+        retries = 0
+        while True:
+            token = await self._get_token(refresh=refresh)
+            refresh = False
+            session = await self._get_session()
+            delay = None
+            async with session.get(SEARCH_URL, params=params, headers={"Authorization": f"Bearer {token}"}) as response:
+                if response.status == 401 and not refreshed:
+                    # The token was revoked early; refresh it once and retry
+                    refresh = refreshed = True
+                    continue
+                if response.status == 429 and retries < RATE_LIMIT_RETRIES:
+                    delay = retry_after(response.headers.get("Retry-After"))
+                if delay is None or delay > MAX_RETRY_AFTER:
+                    response.raise_for_status()
+                    payload = await response.json()
+                    items = payload.get("tracks", {}).get("items", [])
+                    return items[0] if items else None
+            # Rate limited; wait as long as Spotify asks before retrying
+            retries += 1
+            logger.warning(f"SpotifyClient: Rate limited, retrying in {delay:g}s.")
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        """Closes the pooled session. The next request opens a new one."""
+        session, self._session = self._session, None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+        except Exception as e:
+            # A session of a loop that was closed already cannot close its connections; they are gone anyway
+            logger.warning(f"SpotifyClient: Could not close the previous session - {e}")
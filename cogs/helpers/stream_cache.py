@@ -0,0 +1,180 @@
+# cogs/helpers/stream_cache.py
+"""
+This file contains the cache of extracted stream information.
+Extracting a video with yt-dlp takes seconds, but the media URL it returns stays valid until the
+expire= time embedded in it, so replays and prev/next within that window reuse the extraction.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Initialize Logger
+logger = logging.getLogger(__name__)
+
+
+def video_id(url: str) -> Optional[str]:
+    """
+    Returns the id of a YouTube video URL.
+
+    Parameters:
+        url (str): A youtube.com/watch or youtu.be URL.
+
+    Returns:
+        str or None: The video id, or None for other URLs.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.strip("/") or None
+    if "youtube" in host:
+        return parse_qs(parsed.query).get("v", [None])[0]
+    return None
+
+
+def stream_expiry(media_url: str) -> Optional[float]:
+    """
+    Returns the expiry time embedded in a googlevideo media URL.
+    It is either an expire= query parameter or an /expire/<time>/ path segment.
+
+    Parameters:
+        media_url (str): The media URL returned by yt-dlp.
+
+    Returns:
+        float or None: Unix time at which the URL stops working, or None if it has no expiry.
+    """
+    parsed = urlparse(media_url)
+    expire = parse_qs(parsed.query).get("expire", [None])[0]
+    if expire is None:
+        segments = parsed.path.split("/")
+        if "expire" in segments[:-1]:
+            expire = segments[segments.index("expire") + 1]
+    try:
+        return float(expire) if expire is not None else None
+    except ValueError:
+        return None
+
+
+class StreamInfoCache:
+    """
+    Cache of yt-dlp extraction results, keyed by video id (or by URL for other sites).
+    An entry expires margin seconds before its media URL does; media URLs without an expiry
+    are kept for default_ttl seconds. Concurrent requests for the same video share one extraction.
+    """
+
+    def __init__(self, extract: Callable[[str], dict], margin: float = 300, default_ttl: float = 600,
+                 max_entries: int = 256):
+        self.extract = extract
+        self.margin = margin
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key(url: str) -> str:
+        """Returns the cache key of a URL."""
+        return video_id(url) or url
+
+    def _expires_at(self, info: dict) -> float:
+        """Returns the time at which a cached extraction should no longer be used."""
+        expiry = stream_expiry(info.get("url", ""))
+        if expiry is None:
+            return time.time() + self.default_ttl
+        return expiry - self.margin
+
+    def peek(self, url: str) -> Optional[dict]:
+        """
+        Returns the cached stream information of a URL without extracting it.
+
+        Parameters:
+            url (str): The video URL.
+
+        Returns:
+            dict or None: The information, or None if it is not cached or has expired.
+        """
+        key = self.key(url)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, url: str, info: dict):
+        """
+        Caches the stream information of a URL until its media URL is about to expire.
+
+        Parameters:
+            url (str): The video URL.
+            info (dict): The extracted information, with the media URL under "url".
+        """
+        expires_at = self._expires_at(info)
+        if expires_at <= time.time():
+            return
+        key = self.key(url)
+        self._entries[key] = (expires_at, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, url: str):
+        """
+        Forgets the stream information of a URL, e.g. because its media URL was rejected.
+
+        Parameters:
+            url (str): The video URL.
+        """
+        self._entries.pop(self.key(url), None)
+
+    async def get(self, url: str, loop=None) -> Optional[dict]:
+        """
+        Returns the stream information of a URL, extracting it on an executor thread if needed.
+
+        Parameters:
+            url (str): The video URL.
+            loop: Event loop to run the extraction on. Defaults to the running loop.
+
+        Returns:
+            dict or None: The information of the (first) video, or None if nothing was extracted.
+
+        Raises:
+            Exception: Whatever the extractor raised.
+        """
+        info = self.peek(url)
+        if info is not None:
+            logger.debug(f"StreamInfoCache: Hit for '{url}'.")
+            return info
+
+        key = self.key(url)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        # The extraction is shielded and finished by a callback, so a cancelled caller
+        # (e.g. a prefetch that is no longer needed) still leaves its result in the cache
+        loop = loop or asyncio.get_running_loop()
+        future = loop.run_in_executor(None, self._extract_first, url)
+        self._pending[key] = future
+        future.add_done_callback(lambda done: self._finish(key, url, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: str, url: str, future: asyncio.Future):
+        """Caches the result of a finished extraction and forgets it as pending."""
+        if self._pending.get(key) is future:
+            del self._pending[key]
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self.put(url, future.result())
+
+    def _extract_first(self, url: str) -> Optional[dict]:
+        """Runs the extractor and returns the information of the first video, if any."""
+        info = self.extract(url)
+        if info is not None and "entries" in info:
+            entries = list(info["entries"] or [])
+            info = entries[0] if entries else None
+        return info
@@ -4,10 +4,17 @@
 """
 
 import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 from dotenv import load_dotenv
 from youtubesearchpython import VideosSearch
-from cogs.helpers.get_all import filtered_songs, get_all_songs, get_all_songs_alternate
+from cogs.helpers.catalog import CatalogSnapshot, get_catalog
+from cogs.helpers.indexes import key_index, find_first_row, normalize_name
+from cogs.helpers.cache import PersistentCache, MISSING
+from cogs.helpers.spotify_client import SpotifyClient, track_metadata
+from cogs.helpers.similarity import TCC_FEATURES, SONGS_FEATURES, attribute_matrix
 import numpy as np
 import pandas as pd
 from typing import Tuple, List, Union
@@ -30,48 +37,87 @@
 spotify_auth_manager = SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
 spotify = spotipy.Spotify(auth_manager=spotify_auth_manager)
 
+# Non-blocking client used from the cogs
+spotify_client = SpotifyClient(client_id, client_secret)
+
 # Define the data directory
 DATA_DIR = os.getenv("DATA_DIR", "./data")  # Default to ./data if DATA_DIR not set
-
-def load_datasets() -> Tuple[pd.DataFrame, pd.DataFrame]:
+SONGS_CATALOG = get_catalog(os.path.join(DATA_DIR, 'songs.csv'))
+TCC_CATALOG = get_catalog(os.path.join(DATA_DIR, 'tcc_ceds_music.csv'))
+
+# Spotify search results are cached on disk; "no result" answers expire sooner
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join(DATA_DIR, "cache.sqlite3"))
+SPOTIFY_CACHE_TTL = float(os.getenv("SPOTIFY_CACHE_TTL", 7 * 24 * 3600))
+SPOTIFY_CACHE_NEGATIVE_TTL = float(os.getenv("SPOTIFY_CACHE_NEGATIVE_TTL", 3600))
+SPOTIFY_CACHE = PersistentCache(CACHE_PATH, "spotify_metadata", ttl=SPOTIFY_CACHE_TTL)
+
+# YouTube searches are blocking, so the cogs run them on a small dedicated pool with a timeout
+YOUTUBE_SEARCH_TIMEOUT = float(os.getenv("YOUTUBE_SEARCH_TIMEOUT", 10))
+YOUTUBE_SEARCH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("YOUTUBE_SEARCH_WORKERS", 4)), thread_name_prefix="youtube-search"
+)
+
+# The video chosen for a song is cached on disk, so each song is searched once
+YOUTUBE_CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", 365 * 24 * 3600))
+YOUTUBE_CACHE = PersistentCache(CACHE_PATH, "youtube_video_ids", ttl=YOUTUBE_CACHE_TTL)
+
+SONGS_COLUMNS = ['track_name', 'artist', 'genre', 'year', 'bpm', 'nrgy', 'dnce', 'dB', 'live', 'val', 'dur', 'acous', 'spch', 'pop']
+TCC_CEDS_MUSIC_COLUMNS = ['track_name', 'artist', 'release_date', 'genre', 'lyrics', 'len', 'dating', 'violence', 'world/life', 'night/time', 'shake the audience', 'family/gospel', 'romantic', 'communication', 'obscene', 'music', 'movement/places', 'light/visual perceptions', 'family/spiritual', 'like/girls', 'sadness', 'feelings', 'danceability', 'loudness', 'acousticness', 'instrumentalness', 'valence', 'energy', 'topic', 'age']
+
+def _prepare_songs(frame: pd.DataFrame) -> pd.DataFrame:
+    """Selects the songs.csv columns used by the bot and strips the names."""
+    # The catalog frame is shared, so select the columns into a new frame before modifying it
+    songs = frame[SONGS_COLUMNS].copy()
+    songs['track_name'] = songs['track_name'].str.strip()
+    songs['artist'] = songs['artist'].str.strip()
+    return songs
+
+def _prepare_tcc_ceds_music(frame: pd.DataFrame) -> pd.DataFrame:
+    """Selects the tcc_ceds_music.csv columns used by the bot."""
+    return frame[TCC_CEDS_MUSIC_COLUMNS]
+
+def _prepared(catalog, columns: List[str], prepare) -> CatalogSnapshot:
     """
-    Loads and preprocesses datasets, ensuring consistent column names.
+    Returns the prepared dataset of a catalog's current snapshot.
+    It is built once per catalog snapshot, so it follows reloads; indexes over it are cached on the returned snapshot.
+
+    Parameters:
+        catalog (Catalog): The dataset's catalog.
+        columns (list): Columns of the prepared dataset.
+        prepare (Callable): Builds the prepared frame from the catalog frame.
 
     Returns:
-        Tuple[pd.DataFrame, pd.DataFrame]: SONGS and TCC_CEDS_MUSIC DataFrames.
+        CatalogSnapshot: The prepared dataset, empty if the dataset file does not exist.
     """
     try:
-        # Load primary dataset: songs.csv
-        SONGS = pd.read_csv(os.path.join(DATA_DIR, 'songs.csv'))
-        SONGS.rename(columns={'artist': 'artist'}, inplace=True)
-        SONGS = SONGS[['track_name', 'artist', 'genre', 'year', 'bpm', 'nrgy', 'dnce', 'dB', 'live', 'val', 'dur', 'acous', 'spch', 'pop']]
-        SONGS['track_name'] = SONGS['track_name'].str.strip()
-        SONGS['artist'] = SONGS['artist'].str.strip()
-        # logger.info(f"SONGS DataFrame loaded with columns: {SONGS.columns.tolist()}")
+        snapshot = catalog.snapshot()
     except FileNotFoundError:
-        SONGS = pd.DataFrame(columns=['track_name', 'artist', 'genre', 'year', 'bpm', 'nrgy', 'dnce', 'dB', 'live', 'val', 'dur', 'acous', 'spch', 'pop'])
-        logger.error("songs.csv not found. SONGS dataset is empty.")
+        logger.error(f"{os.path.basename(catalog.path)} not found. The dataset is empty.")
+        return CatalogSnapshot(pd.DataFrame(columns=columns))
+    return snapshot.derived("prepared", lambda frame: CatalogSnapshot(prepare(frame), snapshot.version))
 
-    try:
-        # Load alternative dataset: tcc_ceds_music.csv
-        TCC_CEDS_MUSIC = pd.read_csv(os.path.join(DATA_DIR, 'tcc_ceds_music.csv'))
-        # Ensure correct columns are present
-        if 'artist' in TCC_CEDS_MUSIC.columns:
-            TCC_CEDS_MUSIC.rename(columns={'artist': 'artist'}, inplace=True)
-        TCC_CEDS_MUSIC = TCC_CEDS_MUSIC[['track_name', 'artist', 'release_date', 'genre', 'lyrics', 'len', 'dating', 'violence', 'world/life', 'night/time', 'shake the audience', 'family/gospel', 'romantic', 'communication', 'obscene', 'music', 'movement/places', 'light/visual perceptions', 'family/spiritual', 'like/girls', 'sadness', 'feelings', 'danceability', 'loudness', 'acousticness', 'instrumentalness', 'valence', 'energy', 'topic', 'age']]
-        # logger.info(f"TCC_CEDS_MUSIC DataFrame loaded with columns: {TCC_CEDS_MUSIC.columns.tolist()}")
-    except FileNotFoundError:
-        TCC_CEDS_MUSIC = pd.DataFrame(columns=['track_name', 'artist', 'release_date', 'genre', 'lyrics', 'len', 'dating', 'violence', 'world/life', 'night/time', 'shake the audience', 'family/gospel', 'romantic', 'communication', 'obscene', 'music', 'movement/places', 'light/visual perceptions', 'family/spiritual', 'like/girls', 'sadness', 'feelings', 'danceability', 'loudness', 'acousticness', 'instrumentalness', 'valence', 'energy', 'topic', 'age'])
-        logger.error("tcc_ceds_music.csv not found. TCC_CEDS_MUSIC dataset is empty.")
+def songs_snapshot() -> CatalogSnapshot:
+    """Returns the prepared songs.csv dataset of the current catalog snapshot."""
+    return _prepared(SONGS_CATALOG, SONGS_COLUMNS, _prepare_songs)
 
-    return SONGS, TCC_CEDS_MUSIC
+def tcc_ceds_music_snapshot() -> CatalogSnapshot:
+    """Returns the prepared tcc_ceds_music.csv dataset of the current catalog snapshot."""
+    return _prepared(TCC_CATALOG, TCC_CEDS_MUSIC_COLUMNS, _prepare_tcc_ceds_music)
 
-# Initialize datasets
-SONGS, TCC_CEDS_MUSIC = load_datasets()
+def load_datasets() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns the prepared datasets, ensuring consistent column names.
+    They are read from the catalogs on every call, so callers see reloaded files.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: SONGS and TCC_CEDS_MUSIC DataFrames.
+    """
+    return songs_snapshot().frame, tcc_ceds_music_snapshot().frame
 
 def fetch_spotify_metadata(track_name: str) -> dict:
     """
     Fetches metadata for a given track from Spotify using spotipy.
+    Results are cached by normalized query in SPOTIFY_CACHE, so a repeated query makes no request.
 
     Parameters:
         track_name (str): The name of the track.
@@ -79,23 +125,53 @@ def fetch_spotify_metadata(track_name: str) -> dict:
     Returns:
         dict: A dictionary containing track metadata.
     """
+    key = _cache_name(track_name)
+    cached = SPOTIFY_CACHE.get(key)
+    if cached is not MISSING:
+        logger.debug(f"fetch_spotify_metadata: Cache hit for '{track_name}'.")
+        return cached
+
     results = spotify.search(q=f"track:{track_name}", type='track', limit=1)
     tracks = results.get('tracks', {}).get('items', [])
     if not tracks:
         logger.warning(f"No Spotify results found for '{track_name}'.")
+        SPOTIFY_CACHE.set(key, {}, ttl=SPOTIFY_CACHE_NEGATIVE_TTL)
         return {}
 
-    song = tracks[0]
-    metadata = {
-        'track_name': song['name'],
-        'artist': ', '.join([artist['name'] for artist in song['artists']]),
-        'album': song['album']['name'],
-        'release_date': song['album']['release_date'],
-        'duration_ms': song['duration_ms'],
-        'popularity': song['popularity'],
-        'external_url': song['external_urls']['spotify'],
-        # Add more attributes if needed
-    }
+    metadata = track_metadata(tracks[0])
+    SPOTIFY_CACHE.set(key, metadata)
+    return metadata
+
+async def fetch_spotify_metadata_async(track_name: str) -> dict:
+    """
+    Fetches metadata for a given track from Spotify without blocking the event loop.
+    Shares SPOTIFY_CACHE with fetch_spotify_metadata.
+
+    Parameters:
+        track_name (str): The name of the track.
+
+    Returns:
+        dict: A dictionary containing track metadata, empty if nothing was found or the search failed.
+    """
+    key = _cache_name(track_name)
+    cached = await SPOTIFY_CACHE.get_async(key)
+    if cached is not MISSING:
+        logger.debug(f"fetch_spotify_metadata_async: Cache hit for '{track_name}'.")
+        return cached
+
+    try:
+        song = await spotify_client.search_track(f"track:{track_name}")
+    except Exception as e:
+        # Not cached, so the next request asks Spotify again
+        logger.error(f"fetch_spotify_metadata_async: Spotify search for '{track_name}' failed - {e}")
+        return {}
+    if not song:
+        logger.warning(f"No Spotify results found for '{track_name}'.")
+        await SPOTIFY_CACHE.set_async(key, {}, ttl=SPOTIFY_CACHE_NEGATIVE_TTL)
+        return {}
+
+    metadata = track_metadata(song)
+    await SPOTIFY_CACHE.set_async(key, metadata)
     return metadata
 
 def searchSong(name_song: str, artist: str = "") -> str:
@@ -109,6 +185,11 @@ def searchSong(name_song: str, artist: str = "") -> str:
     Returns:
         str: YouTube URL of the song.
     """
+    key = _video_cache_key(name_song, artist)
+    video_id = YOUTUBE_CACHE.get(key)
+    if video_id is not MISSING:
+        return _video_url(video_id)
+
     if artist:
         query = f"{name_song} {artist}"
     else:
@@ -121,19 +202,110 @@ def searchSong(name_song: str, artist: str = "") -> str:
             # Use Spotify metadata to form a better query
             query = f"{metadata['track_name']} {metadata['artist']}"
 
-    videosSearch = VideosSearch(query, limit=1)
-    result = videosSearch.result()
-    if result['result']:
-        link = result["result"][0]["link"]
+    link = _search_youtube(query)
+    if link:
         logger.debug(f"searchSong: Found YouTube URL {link} for '{name_song}'.")
-        return link
+        _remember_video(key, link)
+    return link
+
+async def searchSong_async(name_song: str, artist: str = "", timeout: float = None) -> str:
+    """
+    Searches for a song on YouTube without blocking the event loop.
+    The search runs on YOUTUBE_SEARCH_POOL and is abandoned after the timeout.
+
+    Parameters:
+        name_song (str): The name of the song.
+        artist (str): The name of the artist (optional).
+        timeout (float, optional): Seconds to wait for YouTube. Defaults to YOUTUBE_SEARCH_TIMEOUT.
+
+    Returns:
+        str: YouTube URL of the song, or "" if it was not found in time.
+    """
+    key = _video_cache_key(name_song, artist)
+    video_id = await YOUTUBE_CACHE.get_async(key)
+    if video_id is not MISSING:
+        return _video_url(video_id)
+
+    if artist:
+        query = f"{name_song} {artist}"
     else:
-        logger.warning(f"No YouTube results found for query: {query}")
+        metadata = await fetch_spotify_metadata_async(name_song)
+        # Use Spotify metadata to form a better query, else the original song name
+        query = f"{metadata['track_name']} {metadata['artist']}" if metadata else name_song
+
+    loop = asyncio.get_running_loop()
+    try:
+        link = await asyncio.wait_for(
+            loop.run_in_executor(YOUTUBE_SEARCH_POOL, _search_youtube, query),
+            timeout if timeout is not None else YOUTUBE_SEARCH_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"searchSong_async: YouTube search for '{query}' timed out.")
         return ""
+    except Exception as e:
+        logger.error(f"searchSong_async: YouTube search for '{query}' failed - {e}")
+        return ""
+
+    if link:
+        logger.debug(f"searchSong_async: Found YouTube URL {link} for '{name_song}'.")
+        await loop.run_in_executor(None, _remember_video, key, link)
+    return link
+
+def invalidate_song_url(name_song: str, artist: str = ""):
+    """
+    Forgets the cached YouTube video of a song, e.g. because the video is no longer available.
+    The next search for the song queries YouTube again.
+
+    Parameters:
+        name_song (str): The name of the song.
+        artist (str): The name of the artist (optional).
+    """
+    YOUTUBE_CACHE.delete(_video_cache_key(name_song, artist))
+    logger.info(f"invalidate_song_url: Forgot the YouTube video of '{name_song}' by '{artist}'.")
+
+def _cache_name(name: str) -> str:
+    """
+    Returns a name as used in cache keys: normalized, or only casefolded if normalizing leaves nothing,
+    so queries of only punctuation or symbols do not all share the "" entry.
+    """
+    return normalize_name(name) or str(name or "").casefold().strip()
+
+def _video_cache_key(name_song: str, artist: str) -> str:
+    """Returns the YOUTUBE_CACHE key of a song: its normalized track and artist names."""
+    return f"{_cache_name(name_song)} | {_cache_name(artist)}"
+
+def _video_url(video_id: str) -> str:
+    """Returns the watch URL of a YouTube video."""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _remember_video(key: str, link: str):
+    """Caches the video id of a YouTube watch URL under the given key."""
+    video_id = parse_qs(urlparse(link).query).get("v", [None])[0]
+    if video_id:
+        YOUTUBE_CACHE.set(key, video_id)
+
+def _search_youtube(query: str) -> str:
+    """
+    Runs a blocking YouTube search.
+
+    Parameters:
+        query (str): The search query.
+
+    Returns:
+        str: URL of the first result, or "" if there is none.
+    """
+    videosSearch = VideosSearch(query, limit=1)
+    result = videosSearch.result()
+    if result['result']:
+        return result["result"][0]["link"]
+    logger.warning(f"No YouTube results found for query: {query}")
+    return ""
 
 def get_full_song_name(song_name: str, artist: str) -> Union[List[str], None]:
     """
     Returns the full song name and artist name by searching in the primary and alternate datasets.
+    Both names are matched as case-insensitive substrings through trigram indexes, which are
+    cached on the prepared dataset of the current catalog snapshot and rebuilt when it reloads.
 
     Parameters:
         song_name (str): Partial or full name of the song.
@@ -142,42 +314,51 @@ def get_full_song_name(song_name: str, artist: str) -> Union[List[str], None]:
     Returns:
         list or None: [full_song_name, full_artist] or None if not found.
     """
-    # Search in primary dataset
-    song = SONGS.loc[
-        (SONGS["track_name"].str.contains(song_name, case=False, na=False)) &
-        (SONGS["artist"].str.contains(artist, case=False, na=False))
-    ]
+    # Search in primary dataset, then in the alternate dataset
+    for snapshot in (songs_snapshot(), tcc_ceds_music_snapshot()):
+        row = find_first_row(snapshot, song_name, artist)
+        if row is not None:
+            dataset = snapshot.frame
+            # Return the first match
+            return [dataset.iloc[row]['track_name'], dataset.iloc[row]['artist']]
+
+    logger.warning(f"Song '{song_name}' by '{artist}' not found in datasets.")
+    return None
+
+def retrieve_attributes_batch(keys: List[Tuple[str, str]]) -> np.ndarray:
+    """
+    Retrieves the audio and lyric features of several songs in one call.
 
-    if song.empty:
-        # Search in alternate dataset
-        song = TCC_CEDS_MUSIC.loc[
-            (TCC_CEDS_MUSIC["track_name"].str.contains(song_name, case=False, na=False)) &
-            (TCC_CEDS_MUSIC["artist"].str.contains(artist, case=False, na=False))
-        ]
+    Parameters:
+        keys (list): Songs as (track_name, artist) tuples.
 
-    if song.empty:
-        logger.warning(f"Song '{song_name}' by '{artist}' not found in datasets.")
-        return None
+    Returns:
+        np.ndarray: (len(keys), len(TCC_FEATURES)) array. Rows of songs that are not in the dataset are all 0.
+    """
+    keys = list(keys)
+    try:
+        snapshot = TCC_CATALOG.snapshot()
+    except FileNotFoundError:
+        logger.error("retrieve_attributes_batch: tcc_ceds_music.csv not found.")
+        return np.zeros((len(keys), len(TCC_FEATURES)))
 
-    # Return the first match
-    full_song_name = song.iloc[0]['track_name']
-    full_artist = song.iloc[0]['artist']
-    return [full_song_name, full_artist]
+    rows = key_index(snapshot).rows(keys)
+    attributes = attribute_matrix(snapshot, TCC_FEATURES)[np.maximum(rows, 0)]
+    attributes[rows < 0] = 0.0
+    return attributes
 
 def retrieve_song_attributes(songName: str, artistName: str) -> List[float]:
     """
-    Retrieves attributes of a song using Spotify metadata.
+    Retrieves the audio and lyric features of a song from the dataset.
 
     Parameters:
         songName (str): The name of the song.
         artistName (str): The name of the artist.
 
     Returns:
-        list: A list of attributes for the song.
+        list: A list of attributes for the song, all 0 if the song is not found.
     """
-    # For this example, we'll return dummy attributes
-    # In a real implementation, you would fetch audio features from Spotify
-    return [0.5] * 22  # Replace with actual attributes
+    return retrieve_attributes_batch([(songName, artistName)])[0].tolist()
 
 def retrieve_attributes_alternate(songName: str, artistName: str) -> List[float]:
     """
@@ -191,24 +372,19 @@ def retrieve_attributes_alternate(songName: str, artistName: str) -> List[float]
         list: A list of attributes from the alternate dataset.
     """
     try:
-        # Get the songs from the alternate dataset
-        all_songs_alt = get_all_songs_alternate()
-
-        # Get the attributes of the song
-        song = all_songs_alt.loc[
-            (all_songs_alt["track_name"].str.lower() == songName.lower()) &
-            (all_songs_alt["artist"].str.lower() == artistName.lower())
-        ]
+        # Look the song up in the alternate dataset
+        snapshot = SONGS_CATALOG.snapshot()
+        row = key_index(snapshot).row(songName, artistName)
 
-        if song.empty:
+        if row is None:
             logger.warning(f"Song '{songName}' by '{artistName}' not found in alternate dataset.")
-            return [0] * 9
+            return [0] * len(SONGS_FEATURES)
 
         # Return the attributes
-        return song.iloc[0][2:].tolist()
+        return attribute_matrix(snapshot, SONGS_FEATURES)[row].tolist()
     except Exception as e:
         logger.error(f"Error retrieving attributes from alternate dataset: {e}")
-        return [0] * 9
+        return [0] * len(SONGS_FEATURES)
 
 def cosine_similarity(songName1: str, artistName1: str, songName2: str, artistName2: str) -> float:
     """
@@ -223,22 +399,21 @@ def cosine_similarity(songName1: str, artistName1: str, songName2: str, artistNa
     Returns:
         float: Cosine similarity score.
     """
-    # Get the attributes of the songs
-    song1 = retrieve_song_attributes(songName1, artistName1)
-    song2 = retrieve_song_attributes(songName2, artistName2)
+    # Get the attributes of both songs with one lookup
+    vector1, vector2 = retrieve_attributes_batch([(songName1, artistName1), (songName2, artistName2)])
 
-    if song1 == [0] * 22 or song2 == [0] * 22:
+    if not vector1.any() or not vector2.any():
         # Try to get both the songs from the alternate dataset
         song1 = retrieve_attributes_alternate(songName1, artistName1)
         song2 = retrieve_attributes_alternate(songName2, artistName2)
 
-        if song1 == [0] * 9 or song2 == [0] * 9:
+        if song1 == [0] * len(SONGS_FEATURES) or song2 == [0] * len(SONGS_FEATURES):
             # If the song is not found in the alternate dataset, return 0
             return 0.0
 
-    # Convert lists to numpy arrays
-    vector1 = np.array(song1)
-    vector2 = np.array(song2)
+        # Convert lists to numpy arrays
+        vector1 = np.array(song1)
+        vector2 = np.array(song2)
 
     # Calculate cosine similarity
     dot_product = np.dot(vector1, vector2)
@@ -259,10 +434,11 @@ def random_n(n: int) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame containing n random songs.
     """
-    if SONGS.empty:
+    songs = songs_snapshot().frame
+    if songs.empty:
         logger.warning("random_n: SONGS dataset is empty.")
         return pd.DataFrame()
-    return SONGS.sample(n=n).reset_index(drop=True)
+    return songs.sample(n=n).reset_index(drop=True)
 
 def random_25() -> pd.DataFrame:
     """
@@ -3,7 +3,7 @@
 """
 
 from discord.ext import commands
-from cogs.helpers.songs_queue import Songs_Queue
+from cogs.helpers.players import PLAYERS
 import logging
 import discord
 
@@ -18,7 +18,18 @@ class Queue(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.songs_queue = Songs_Queue()
+
+    def get_queue(self, ctx):
+        """
+        Returns the queue of the guild a command was sent in.
+
+        Parameters:
+            ctx (commands.Context): The context from Discord.
+
+        Returns:
+            Songs_Queue: The guild's queue.
+        """
+        return PLAYERS.get(ctx.guild).queue
 
     @commands.command(name="queue", help="Show active queue of songs.\nUsage: !queue")
     async def songs_queue(self, ctx):
@@ -26,11 +37,12 @@ async def songs_queue(self, ctx):
         Display all songs in the queue with sections:
         Already Played, Now Playing, and Up Next.
         """
-        empty_queue = await self.songs_queue.handle_empty_queue(ctx)
+        songs_queue = self.get_queue(ctx)
+        empty_queue = await songs_queue.handle_empty_queue(ctx)
         if empty_queue:
             return
 
-        queue, current_index = self.songs_queue.return_queue()
+        queue, current_index = songs_queue.return_queue()
         if not queue:
             await ctx.send("🎵 The queue is currently empty.")
             logger.info("songs_queue: Queue is empty.")
@@ -89,7 +101,7 @@ async def clear_queue(self, ctx):
         """
         Clear the song queue.
         """
-        self.songs_queue.clear()
+        self.get_queue(ctx).clear()
         await ctx.send("🗑️ Queue cleared.")
         logger.info("clear_queue: Cleared the entire queue.")
 
@@ -101,13 +113,14 @@ async def remove_song(self, ctx, index: int):
         Parameters:
             index (int): 1-based index of the song to remove.
         """
-        queue, current_index = self.songs_queue.return_queue()
+        songs_queue = self.get_queue(ctx)
+        queue, current_index = songs_queue.return_queue()
         if index < 1 or index > len(queue):
             await ctx.send("❌ Invalid index provided.")
             logger.warning(f"remove_song: Invalid index '{index}'.")
             return
 
-        removed_song = self.songs_queue.remove_from_queue_by_index(index - 1)
+        removed_song = songs_queue.remove_from_queue_by_index(index - 1)
         if removed_song == -1:
             await ctx.send("❌ Unable to remove the song. Invalid index.")
             logger.error(f"remove_song: Failed to remove song at index '{index - 1}'.")
@@ -127,7 +140,8 @@ async def move_song(self, ctx, current_index: int, new_index: int):
             current_index (int): Current 1-based index of the song.
             new_index (int): New 1-based index where the song should be moved.
         """
-        queue, _ = self.songs_queue.return_queue()
+        songs_queue = self.get_queue(ctx)
+        queue, _ = songs_queue.return_queue()
         if (current_index < 1 or current_index > len(queue)) or (new_index < 1 or new_index > len(queue)):
             await ctx.send("❌ Invalid indices provided.")
             logger.warning(f"move_song: Invalid indices '{current_index}' or '{new_index}'.")
@@ -136,7 +150,7 @@ async def move_song(self, ctx, current_index: int, new_index: int):
         new_idx_zero = new_index - 1
         current_idx_zero = current_index - 1
 
-        result = self.songs_queue.move_song_by_index(current_idx_zero, new_idx_zero)
+        result = songs_queue.move_song_by_index(current_idx_zero, new_idx_zero)
         if result == -1:
             await ctx.send("❌ Unable to move the song. Please check the indices.")
             logger.error(f"move_song: Failed to move song from '{current_index}' to '{new_index}'.")
@@ -150,7 +164,7 @@ async def shuffle_queue(self, ctx):
         """
         Shuffle songs in the queue.
         """
-        self.songs_queue.shuffle_queue()
+        self.get_queue(ctx).shuffle_queue()
         await ctx.send("🔀 Playlist shuffled.")
         logger.info("shuffle_queue: Queue shuffled.")
 
@@ -11,7 +11,7 @@
 from discord.ext import commands
 from cogs.helpers import utils
 from cogs.helpers.recommend_enhanced import recommend_enhanced as recommend
-from cogs.helpers.songs_queue import Songs_Queue
+from cogs.helpers.players import PLAYERS
 import logging
 
 # Initialize Logger
@@ -25,11 +25,6 @@ class Recommender(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.message_id = None
-        self.command_msg_id = None
-
-        # Get the queue instance
-        self.queue = Songs_Queue()
 
         self.emoji_list = [
             "1️⃣",
@@ -47,6 +42,10 @@ def __init__(self, bot):
             "❌"
         ]
 
+    async def cog_unload(self):
+        # The Spotify session is shared with the other cogs; the next lookup opens a new one
+        await utils.spotify_client.close()
+
     def random_color(self):
         """
         Returns a random color for the embed message.
@@ -58,29 +57,31 @@ async def poll(self, ctx):
         """
         Function to poll the user for their song preferences.
         """
+        # Polls are kept per guild, so polls in different guilds do not replace each other
+        player = PLAYERS.get(ctx.guild)
 
         # Delete the previous poll message and command message if they exist
-        if self.message_id and self.command_msg_id:
+        if player.poll_message_id and player.poll_command_msg_id:
             try:
-                message = await ctx.fetch_message(self.message_id)
+                message = await ctx.fetch_message(player.poll_message_id)
                 await message.delete()
-                command_msg = await ctx.fetch_message(self.command_msg_id)
+                command_msg = await ctx.fetch_message(player.poll_command_msg_id)
                 await command_msg.delete()
                 logger.info("Deleted previous poll and command messages.")
             except Exception as e:
                 logger.error(f"Error deleting previous messages: {e}")
 
         # Get 10 random songs from the dataset
-        self.songs = utils.random_n(10).filter(["track_name", "artist"]).reset_index(drop=True)
+        songs = utils.random_n(10).filter(["track_name", "artist"]).reset_index(drop=True)
 
-        if self.songs.empty:
+        if songs.empty:
             await ctx.send("❌ No songs available to poll.")
             logger.warning("poll: No songs available to display in poll.")
             return
 
         # Create the poll message
         poll_description = ""
-        for index, song in self.songs.iterrows():
+        for index, song in songs.iterrows():
             emoji_icon = self.emoji_list[index]
             poll_description += f"{emoji_icon} **{song['track_name']}** by *{song['artist']}*\n"
 
@@ -95,12 +96,13 @@ async def poll(self, ctx):
         poll_message = await ctx.send(embed=embed)
 
         # Add reactions to the poll message
-        for reaction in self.emoji_list[:len(self.songs)]:
+        for reaction in self.emoji_list[:len(songs)]:
             await poll_message.add_reaction(reaction)
 
-        # Store message IDs for future reference
-        self.message_id = poll_message.id
-        self.command_msg_id = ctx.message.id
+        # Store the songs and message IDs for future reference
+        player.poll_songs = songs
+        player.poll_message_id = poll_message.id
+        player.poll_command_msg_id = ctx.message.id
 
         logger.info("poll: Poll created and reactions added.")
 
@@ -110,15 +112,18 @@ async def recommend_command(self, ctx):
         Function to recommend songs based on the user's preferences.
         """
 
+        player = PLAYERS.get(ctx.guild)
+        songs = player.poll_songs
+
         # Check if the user has run the poll command
-        if not self.message_id:
+        if not player.poll_message_id:
             await ctx.send("❌ Please run the `!poll` command first to choose your preferences.")
             logger.warning("recommend: Poll has not been run yet.")
             return
 
         # Get the poll message
         try:
-            message = await ctx.fetch_message(self.message_id)
+            message = await ctx.fetch_message(player.poll_message_id)
         except Exception as e:
             await ctx.send("❌ Unable to fetch the poll message. Please try running the `!poll` command again.")
             logger.error(f"recommend: Error fetching poll message: {e}")
@@ -130,13 +135,13 @@ async def recommend_command(self, ctx):
         # Get the user's preferences
         preferences = []
         for reaction in reactions:
-            if str(reaction.emoji) in self.emoji_list[:len(self.songs)]:
+            if str(reaction.emoji) in self.emoji_list[:len(songs)]:
                 # Get the users who reacted to this reaction
                 users = [u async for u in reaction.users() if not u.bot]
                 if ctx.author in users:
                     index = self.emoji_list.index(str(reaction.emoji))
-                    if index < len(self.songs):
-                        song = self.songs.iloc[index]
+                    if index < len(songs):
+                        song = songs.iloc[index]
                         preferences.append((song['track_name'], song['artist']))
                         logger.debug(f"recommend: User selected song '{song['track_name']}' by '{song['artist']}'.")
 
@@ -151,9 +156,10 @@ async def recommend_command(self, ctx):
             for song in preferences:
                 choose_message += f"**{song[0]}** by *{song[1]}*\n"
 
-        # Clear the message references
-        self.message_id = None
-        self.command_msg_id = None
+        # Clear the poll
+        player.poll_songs = None
+        player.poll_message_id = None
+        player.poll_command_msg_id = None
 
         embedded_message = discord.Embed(
             title="Chosen Songs",
@@ -225,6 +231,7 @@ def check(reaction, user):
         # Wait for the user's response
         try:
             reaction, user = await self.bot.wait_for('reaction_add', timeout=60.0, check=check)
+            songs_queue = player.queue
 
             if reaction.emoji == self.emoji_list[0]:
                 # Add the songs to the end of the queue
@@ -232,17 +239,17 @@ def check(reaction, user):
                 # Add songs with the appropriate source
                 for song in recommendations:
                     if isinstance(song, tuple) and len(song) == 2:
-                        self.queue.add_to_queue((song[0], song[1], 'dataset', None))
+                        songs_queue.add_to_queue((song[0], song[1], 'dataset', None))
                 await ctx.send(f"Songs added to the queue. Start playback with the `!start` command.")
                 logger.info("recommend_command: Added recommended songs to the end of the queue.")
             elif reaction.emoji == self.emoji_list[1]:
                 # Clear the queue and add the songs
                 await ctx.send("🗑️ Clearing the queue and adding the songs.")
-                self.queue.clear()
+                songs_queue.clear()
                 # Add songs with the appropriate source
                 for song in recommendations:
                     if isinstance(song, tuple) and len(song) == 2:
-                        self.queue.add_to_queue((song[0], song[1], 'dataset', None))
+                        songs_queue.add_to_queue((song[0], song[1], 'dataset', None))
                 await ctx.send(f"Songs added to the queue. Start playback with the `!start` command.")
                 logger.info("recommend_command: Cleared the queue and added recommended songs.")
             elif reaction.emoji == self.emoji_list[2]:
@@ -282,7 +289,7 @@ async def myrecommend(self, ctx, *, song_names: str):
         added_songs = []
 
         # Use asyncio.gather to fetch metadata concurrently
-        tasks = [self.fetch_and_add_song(song_name) for song_name in song_list]
+        tasks = [self.fetch_and_add_song(ctx, song_name) for song_name in song_list]
         results = await asyncio.gather(*tasks)
 
         for song_name, result in zip(song_list, results):
@@ -302,22 +309,22 @@ async def myrecommend(self, ctx, *, song_names: str):
             await ctx.send("❌ No songs were added to the queue.")
             logger.warning("myrecommend: No songs were added to the queue.")
 
-    async def fetch_and_add_song(self, song_name):
+    async def fetch_and_add_song(self, ctx, song_name):
         """
-        Asynchronously fetches song metadata and adds it to the queue.
+        Asynchronously fetches song metadata and adds it to the guild's queue.
 
         Parameters:
+            ctx (commands.Context): The context from Discord.
             song_name (str): Name of the song.
 
         Returns:
             tuple or None: Song tuple if added, None otherwise.
         """
-        # Fetch metadata in a separate thread
-        loop = asyncio.get_event_loop()
-        metadata = await loop.run_in_executor(None, utils.fetch_spotify_metadata, song_name)
+        # Fetch metadata without blocking the event loop
+        metadata = await utils.fetch_spotify_metadata_async(song_name)
         if metadata:
             song_tuple = ( metadata['track_name'], metadata['artist'], 'yt', None)
-            self.queue.add_to_queue(song_tuple)
+            PLAYERS.get(ctx.guild).queue.add_to_queue(song_tuple)
             logger.info(f"myrecommend: Added '{song_tuple[0]}' by '{song_tuple[1]}' to the queue.")
             return song_tuple
         else:
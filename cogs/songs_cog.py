@@ -4,22 +4,35 @@
 !next_song for playing the next song, and so on.
 """
 
+import os
 import asyncio
+import threading
 import discord
 import random
 import shlex
-from discord.ext import commands
+from discord.ext import commands, tasks
 from cogs.helpers.get_all import *
 from cogs.helpers.utils import (
-    searchSong,
-    fetch_spotify_metadata,
-    random_n
+    searchSong_async,
+    invalidate_song_url,
+    DATA_DIR,
+    CACHE_PATH,
+    fetch_spotify_metadata_async,
+    random_n,
+    spotify_client
 )
-from cogs.helpers.songs_queue import Songs_Queue
+from cogs.helpers.players import PLAYERS, GuildPlayer
+from cogs.helpers.stream_cache import StreamInfoCache, video_id
+from cogs.helpers.audio_cache import AudioFileCache
+from cogs.helpers.packet_cache import PacketCache
+from cogs.helpers.prefetcher import Prefetcher
+from cogs.helpers.audio import GaplessSource, ReadAheadSource
+from cogs.helpers.broadcast import Broadcast, BroadcastListener
+from cogs.helpers.dsp import GainSource, FadeStage, EqualizerStage, Crossfader, loudness_gain
+from cogs.helpers.cache import PersistentCache, MISSING
 import yt_dlp as youtube_dl
 import logging
 from typing import Tuple, Union
-from discord import PCMVolumeTransformer
 
 # Initialize Logger
 logger = logging.getLogger(__name__)
@@ -56,7 +69,201 @@
 
 ytdl = youtube_dl.YoutubeDL(YDL_OPTIONS)
 
-async def get_audio_source(url: str, song_name: str, artist: str, *, loop=None, stream=False) -> Union[PCMVolumeTransformer, dict]:
+# Extracted stream info is reused until shortly before its media URL expires
+STREAM_CACHE = StreamInfoCache(
+    lambda url: ytdl.extract_info(url, download=False),
+    margin=float(os.getenv("STREAM_CACHE_MARGIN", 300))
+)
+
+# Played tracks are saved here and replayed from disk; AUDIO_CACHE_MAX_MB=0 (the default) disables it
+AUDIO_CACHE = AudioFileCache(
+    os.getenv("AUDIO_CACHE_DIR", os.path.join(DATA_DIR, "audio_cache")),
+    max_bytes=int(float(os.getenv("AUDIO_CACHE_MAX_MB", 0)) * 1024 * 1024)
+)
+
+# Opus packets of tracks played to the end are kept in memory and shared by all guilds; PACKET_CACHE_MB=0 disables it
+PACKET_CACHE = PacketCache(max_bytes=int(float(os.getenv("PACKET_CACHE_MB", 64)) * 1024 * 1024))
+
+# Number of upcoming queue entries resolved in the background while a song plays
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", 2))
+
+# FFmpeg options for songs played by play_song
+STREAM_FFMPEG_OPTIONS = {
+    'options': '-vn',  # No video
+    'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+}
+LOCAL_FFMPEG_OPTIONS = {
+    'options': '-vn',
+    'before_options': ''
+}
+
+# Pass Opus streams to Discord without decoding them while the volume is at 100% (OPUS_PASSTHROUGH=0 turns it off)
+OPUS_PASSTHROUGH = os.getenv("OPUS_PASSTHROUGH", "1") != "0"
+
+# Songs are normalized to this loudness in dBFS when set, e.g. LOUDNESS_TARGET_DB=-16 (needs the PCM path,
+# so it turns off Opus passthrough). Each song's loudness is measured the first time it plays and cached.
+LOUDNESS_TARGET_DB = float(os.environ["LOUDNESS_TARGET_DB"]) if os.getenv("LOUDNESS_TARGET_DB") else None
+LOUDNESS_CACHE = PersistentCache(CACHE_PATH, "track_loudness", ttl=float(os.getenv("LOUDNESS_CACHE_TTL", 365 * 24 * 3600)))
+
+# Seconds of a remote stream read ahead to cover network stalls (READ_AHEAD_SECONDS=0 turns it off)
+READ_AHEAD_SECONDS = float(os.getenv("READ_AHEAD_SECONDS", 5))
+
+# Seconds before the end of a song at which the next song's stream is opened
+GAPLESS_LEAD = float(os.getenv("GAPLESS_LEAD", 10))
+
+# Seconds consecutive songs overlap by default (0 plays them back to back); !crossfade changes it per server
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", 0))
+
+# Length of the fades on !pause, !resume and !skip
+FADE_SECONDS = float(os.getenv("FADE_SECONDS", 0.3))
+
+async def resolve_stream_url(song_tuple: tuple, packets: bool = True) -> dict:
+    """
+    Resolves a queue entry to a stream that FFmpeg can play.
+    Dataset and Spotify songs are searched on YouTube and extracted; both steps are cached.
+
+    Parameters:
+        song_tuple (tuple): The song as (song_name, artist, source, url).
+        packets (bool): Return the track's cached Opus 'packets' instead of extracting it, if the packet cache has it.
+
+    Returns:
+        dict: 'url' of the stream (a local file if the audio cache has it), its 'duration' in seconds and
+              audio 'codec' (None if unknown). Streams of YouTube videos also carry their 'video_id' and yt-dlp 'info'.
+              A track from the packet cache has 'packets' instead of 'info', and can only be played as Opus.
+
+    Raises:
+        LookupError: If no YouTube video was found for the song.
+        Exception: If the stream could not be extracted.
+    """
+    song_name, artist, source, url = song_tuple
+    if source.lower() == "url":
+        return {'url': url if url else song_name, 'duration': None, 'codec': None}  # Use 'url' if available, else 'song_name'
+
+    video_url = await searchSong_async(song_name, artist)
+    if not video_url:
+        raise LookupError(f"No YouTube video found for '{song_name}' by '{artist}'.")
+
+    cached_packets = PACKET_CACHE.get(video_id(video_url)) if packets else None
+    if cached_packets is not None:
+        return {
+            'url': video_url,
+            'duration': cached_packets.duration,
+            'codec': 'opus',
+            'video_id': video_id(video_url),
+            'packets': cached_packets
+        }
+
+    cached = await AUDIO_CACHE.lookup_async(video_id(video_url))
+    if cached is not None:
+        cached['video_id'] = video_id(video_url)
+        return cached
+
+    info = await STREAM_CACHE.get(video_url)
+    stream_url = info.get('url') if info else None
+    if not stream_url:
+        STREAM_CACHE.invalidate(video_url)
+        raise Exception("youtube_dl did not return a valid audio URL.")
+    return {
+        'url': stream_url,
+        'duration': info.get('duration'),
+        'codec': info.get('acodec'),
+        'video_id': video_id(video_url),
+        'info': info
+    }
+
+
+async def forget_stream(song_tuple: tuple):
+    """
+    Forgets the cached stream of a song that failed to play, so the next play extracts it again.
+    A cached audio file is deleted as well, as resolve_stream_url plays it instead of extracting the stream.
+
+    Parameters:
+        song_tuple (tuple): The song as (song_name, artist, source, url).
+    """
+    song_name, artist, source, url = song_tuple
+    if source.lower() == "url":
+        return
+    video_url = await searchSong_async(song_name, artist)
+    if video_url:
+        STREAM_CACHE.invalidate(video_url)
+        await AUDIO_CACHE.remove_async(video_id(video_url))
+        logger.info(f"forget_stream: Forgot the stream of '{song_name}' by '{artist}'.")
+
+
+def ffmpeg_options(stream: dict, offset: float = 0) -> dict:
+    """
+    Returns the FFmpeg options for playing a resolved stream.
+
+    Parameters:
+        stream (dict): The stream as returned by resolve_stream_url.
+        offset (float): Position in seconds to start at.
+
+    Returns:
+        dict: 'before_options' and 'options' for FFmpegPCMAudio.
+    """
+    options = dict(LOCAL_FFMPEG_OPTIONS if stream.get('local') else STREAM_FFMPEG_OPTIONS)
+    if offset:
+        options['before_options'] = f"-ss {offset:.2f} {options['before_options']}".strip()
+    return options
+
+
+def open_audio(stream: dict, offset: float = 0, opus: bool = False) -> discord.AudioSource:
+    """
+    Opens a resolved stream with FFmpeg, or from the packet cache.
+
+    Parameters:
+        stream (dict): The stream as returned by resolve_stream_url.
+        offset (float): Position in seconds to start at.
+        opus (bool): Pass the stream's Opus packets through instead of decoding to PCM.
+
+    Returns:
+        discord.AudioSource: The cached packets or FFmpegOpusAudio if opus is set, FFmpegPCMAudio otherwise.
+                             Opus tracks played from their start are recorded into the packet cache,
+                             remote streams are read ahead by a ReadAheadSource, and PCM is normalized
+                             to LOUDNESS_TARGET_DB if it is set.
+    """
+    if opus:
+        if stream.get('packets') is not None:
+            return PACKET_CACHE.open(stream['packets'], offset)
+        source = discord.FFmpegOpusAudio(stream['url'], codec='copy', **ffmpeg_options(stream, offset))
+        if not offset:
+            source = PACKET_CACHE.record(stream.get('video_id'), source, stream.get('duration'))
+    else:
+        source = discord.FFmpegPCMAudio(stream['url'], **ffmpeg_options(stream, offset))
+        if LOUDNESS_TARGET_DB is not None and stream.get('video_id'):
+            source = normalize_loudness(source, stream['video_id'], offset)
+    # Outermost, so the GaplessSource sees which frames are silence for a stall
+    if READ_AHEAD_SECONDS > 0 and not stream.get('local'):
+        source = ReadAheadSource(source, READ_AHEAD_SECONDS)
+    return source
+
+
+def normalize_loudness(source: discord.AudioSource, video_id: str, offset: float = 0) -> GainSource:
+    """
+    Wraps a PCM source in a GainSource that brings the track to LOUDNESS_TARGET_DB.
+    A track whose loudness is not cached yet plays unchanged and is measured, for its later plays.
+
+    Parameters:
+        source (discord.AudioSource): The track's PCM source.
+        video_id (str): The YouTube video id, the key of the loudness cache.
+        offset (float): Position in seconds the source starts at.
+
+    Returns:
+        GainSource: The normalizing source.
+    """
+    loudness = LOUDNESS_CACHE.get(video_id)
+    if loudness is not MISSING:
+        return GainSource(source, loudness_gain(loudness, LOUDNESS_TARGET_DB))
+
+    def store(measured: float):
+        LOUDNESS_CACHE.set(video_id, measured)
+        logger.info(f"normalize_loudness: Measured '{video_id}' at {measured:.1f} dBFS.")
+
+    # Only a measurement from the start covers the whole track; the cache write happens off the audio thread
+    return GainSource(source, measure=not offset,
+                      on_measured=lambda measured: threading.Thread(target=store, args=(measured,), daemon=True).start())
+
+async def get_audio_source(url: str, song_name: str, artist: str, *, loop=None, stream=False) -> Union[GainSource, dict]:
     """
     Asynchronously retrieves the audio source from YouTube.
 
@@ -66,11 +273,14 @@ async def get_audio_source(url: str, song_name: str, artist: str, *, loop=None,
         artist (str): Name of the artist.
 
     Returns:
-        Tuple[PCMVolumeTransformer, dict]: Audio source and video data.
+        Tuple[GainSource, dict]: Audio source and video data.
     """
     loop = loop or asyncio.get_event_loop()
     try:
-        data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=False))
+        if stream:
+            data = await STREAM_CACHE.get(url, loop=loop)
+        else:
+            data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=False))
     except Exception as e:
         logger.error(f"get_audio_source: Error extracting info from {url} - {e}")
         return None
@@ -87,11 +297,11 @@ async def get_audio_source(url: str, song_name: str, artist: str, *, loop=None,
 
     try:
         audio_source = discord.FFmpegPCMAudio(filename, **FFMPEG_OPTIONS)
-        # Wrap with PCMVolumeTransformer for volume control
+        # Wrap with GainSource for volume control
         volume = 1.0  # Default volume at 100%
-        audio_source = PCMVolumeTransformer(audio_source, volume=volume)
+        audio_source = GainSource(audio_source, volume)
     except Exception as e:
-        logger.error(f"get_audio_source: Error creating PCMVolumeTransformer - {e}")
+        logger.error(f"get_audio_source: Error creating GainSource - {e}")
         return None
 
     return (audio_source, data)
@@ -103,17 +313,123 @@ class Songs(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.manually_stopped = False
-        # Initialize the songs queue
-        self.songs_queue = Songs_Queue()
+        # Queues and playback state of every guild
+        self.players = PLAYERS
+
+    async def cog_load(self):
+        self.evict_idle_players.start()
+
+    async def cog_unload(self):
+        self.evict_idle_players.cancel()
+        for player in self.players:
+            player.stop_task()
+        await spotify_client.close()
+
+    @tasks.loop(seconds=60)
+    async def evict_idle_players(self):
+        """Closes the players of guilds that have been idle for a while."""
+        for player in self.players.evict_idle():
+            await player.close()
 
     # -----------Helper Functions-----------#
 
+    def get_player(self, ctx) -> GuildPlayer:
+        """
+        Returns the player of the guild a command was sent in, starting its player task if needed.
+
+        Parameters:
+            ctx (commands.Context): The context from Discord.
+
+        Returns:
+            GuildPlayer: The guild's player.
+        """
+        player = self.players.get(ctx.guild)
+        if player.prefetcher is None:
+            # Resolve upcoming songs in the background so track changes start right away
+            player.prefetcher = Prefetcher(resolve_stream_url, depth=PREFETCH_DEPTH)
+            player.prefetcher.attach(player.queue)
+        player.start(self.handle_command)
+        return player
+
+    async def handle_command(self, player: GuildPlayer, command):
+        """
+        Handles one playback command on the guild's player task.
+        Commands of a guild are handled one at a time, so the handlers never race each other.
+
+        Parameters:
+            player (GuildPlayer): The guild's player.
+            command (PlayerCommand): The command.
+
+        Returns:
+            The result of the command, e.g. the song that was started.
+        """
+        ctx = command.ctx
+        if command.kind == "play":
+            return await self.start_song(player, ctx, command.value)
+        if command.kind in ("skip", "prev"):
+            song = player.queue.next_song() if command.kind == "skip" else player.queue.prev_song()
+            if isinstance(song, int):
+                return song
+            await self.start_song(player, ctx, song, fade=True)
+            return song
+        if command.kind == "stop":
+            player.manually_stopped = True
+            player.generation += 1
+            if player.voice_client is not None:
+                self._end_mirrors(player.voice_client)
+                player.voice_client.stop()
+            return True
+        if command.kind == "seek":
+            return await self.seek_song(player, ctx, command.value)
+        if command.kind in ("volume", "equalizer", "crossfade"):
+            setattr(player, command.kind, command.value)
+            gapless = self._gapless_source(player.voice_client) if player.voice_client is not None else None
+            if gapless is not None and gapless.is_opus() and (player.volume != 1.0 or self._needs_pcm(player)):
+                # Opus packets cannot be processed; continue the song decoded to PCM from where it is
+                return await self.start_song(player, ctx, gapless.tag, offset=gapless.position)
+            if gapless is not None:
+                gapless.crossfade = self._crossfade(player)
+                gapless.lead = max(GAPLESS_LEAD, gapless.crossfade + GAPLESS_LEAD / 2)
+            source = self._owned_source(player.voice_client) if player.voice_client is not None else None
+            if isinstance(source, GainSource):
+                source.gain = player.volume  # Ramps to the new volume instead of jumping
+                equalizer = source.find(EqualizerStage)
+                if equalizer is not None:
+                    equalizer.set(*player.equalizer)
+                return True
+            return command.kind != "volume"
+        if command.kind == "mirror":
+            return self.start_mirror(player, command.value)
+        if command.kind == "preload":
+            await self.preload_next_song(ctx, player, command.value)
+            return None
+        if command.kind == "track_started":
+            await self.handle_gapless_transition(ctx, player, command.value)
+            return None
+        if command.kind == "track_end":
+            generation, error, gapless = command.value
+            if generation != player.generation or player.manually_stopped:
+                # Replaced by a newer player or stopped on purpose
+                return None
+            if error or gapless.elapsed == 0:
+                # The stream failed or was rejected before its first frame (e.g. its media URL expired early)
+                await forget_stream(gapless.tag)
+            if error:
+                logger.error(f"Playback error: {error}")
+                await ctx.send(f"❌ An error occurred during playback: {error}")
+                return None
+            await self.handle_play_next(ctx)
+            return None
+        logger.warning(f"handle_command: Unknown command '{command.kind}'.")
+        return None
+
     async def handle_play_next(self, ctx):
         """
         Handles playing the next song in the queue after the current song finishes.
+        Runs on the guild's player task.
         """
-        next_song = self.songs_queue.next_song()
+        player = self.get_player(ctx)
+        next_song = player.queue.next_song()
         if isinstance(next_song, int):
             await ctx.send("❌ No more songs in the queue.")
             logger.info("handle_play_next: No more songs in the queue.")
@@ -124,17 +440,44 @@ async def handle_play_next(self, ctx):
                 logger.info("handle_play_next: Disconnected from voice channel due to empty queue.")
             return
 
-        await self.play_song(ctx, next_song)
+        await self.start_song(player, ctx, next_song)
         logger.info(f"handle_play_next: Playing next song '{next_song[0]}' by '{next_song[1]}'.")
 
     async def play_song(self, song_tuple: Union[tuple, int], ctx):
         """
         Helper function for playing a song in the voice channel.
+        The song is started by the guild's player task; this returns once it started (or failed).
 
         Parameters:
             song_tuple (tuple or int): The song to play as (song_name, artist, source, url) or an error code.
             ctx (commands.Context): The context from Discord.
         """
+        await self.get_player(ctx).submit("play", ctx, song_tuple)
+
+    async def start_song(self, player: GuildPlayer, ctx, song_tuple: Union[tuple, int], offset: float = 0,
+                         fade: bool = False):
+        """
+        Starts playing a song. Runs on the guild's player task.
+        If the guild's GaplessSource is playing, it switches to the song at the next frame.
+
+        Parameters:
+            player (GuildPlayer): The guild's player.
+            ctx (commands.Context): The context from Discord.
+            song_tuple (tuple or int): The song to play as (song_name, artist, source, url) or an error code.
+            offset (float): Position in seconds to start the song at.
+            fade (bool): Fade the current song out before switching, e.g. for a skip.
+
+        Returns:
+            bool: True if the song started playing.
+        """
+        try:
+            return await self._start_song(player, ctx, song_tuple, offset, fade)
+        finally:
+            # Also when the song could not be started, the current one must not stay faded out
+            self.fade_in(player.voice_client)
+
+    async def _start_song(self, player: GuildPlayer, ctx, song_tuple: Union[tuple, int], offset: float, fade: bool):
+        """Body of start_song; the song is resolved and opened before the current one is faded out."""
 
         logger.debug(f"play_song: Received song_tuple: {song_tuple}, type: {type(song_tuple)}")
 
@@ -142,52 +485,36 @@ async def play_song(self, song_tuple: Union[tuple, int], ctx):
         if isinstance(song_tuple, int):
             await ctx.send("❌ Unable to retrieve the next song.")
             logger.error(f"play_song: Received error code {song_tuple}.")
-            return
+            return False
 
         # Validate song_tuple structure
         if not isinstance(song_tuple, tuple) or len(song_tuple) != 4:
             await ctx.send("❌ Invalid song format.")
             logger.error("play_song: Invalid song format received.")
-            return
+            return False
 
         logger.info(f"Tuple after play_song access '{song_tuple}'.")
         song_name, artist, source, url = song_tuple
         logger.debug(f"play_song: Preparing to play '{song_name}' by '{artist}'.")
 
-        # Determine the song URL based on the source
-        if source.lower() == "url":
-            song_url = url if url else song_name  # Use 'url' if available, else 'song_name'
-        else:
-            song_url = searchSong(song_name, artist)  # Ensure this returns a valid YouTube URL
-
-        if not song_url:
+        # Resolve the stream URL, reusing the background prefetch of this song if there is one
+        passthrough = (OPUS_PASSTHROUGH and player.volume == 1.0 and LOUDNESS_TARGET_DB is None
+                       and not self._needs_pcm(player))
+        try:
+            stream = await player.prefetcher.resolve(song_tuple)
+            if stream.get('packets') is not None and not passthrough:
+                # Cached packets cannot be decoded for the volume; extract the stream instead
+                stream = await resolve_stream_url(song_tuple, packets=False)
+        except LookupError:
             await ctx.send(f"❌ Unable to find a YouTube link for **{song_name}** by *{artist}*.")
             logger.warning(f"play_song: No YouTube URL found for '{song_name}' by '{artist}'.")
-            return
-
-        # If source is not 'url', extract the direct audio stream using youtube_dl
-        if source.lower() != "url":
-            try:
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'quiet': True,
-                    'noplaylist': True,
-                    'nocheckcertificate': True,
-                    'ignoreerrors': True,
-                    'source_address': '0.0.0.0'  # Bind to IPv4 to prevent IPv6 issues
-                }
-                with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                    logger.debug(f"play_song: Extracting audio URL for '{song_url}' using youtube_dl.")
-                    info = ydl.extract_info(song_url, download=False)
-                    if 'entries' in info:
-                        info = info['entries'][0]
-                    song_url = info.get('url')
-                    if not song_url:
-                        raise Exception("youtube_dl did not return a valid audio URL.")
-            except Exception as e:
-                await ctx.send("❌ Could not extract audio URL from the song.")
-                logger.error(f"play_song: Error extracting audio URL from '{song_url}' - {e}")
-                return
+            return False
+        except Exception as e:
+            # The cached video may have been removed; search again next time
+            invalidate_song_url(song_name, artist)
+            await ctx.send("❌ Could not extract audio URL from the song.")
+            logger.error(f"play_song: Error extracting audio URL for '{song_name}' - {e}")
+            return False
 
         # Get or connect to the voice client
         voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
@@ -199,68 +526,264 @@ async def play_song(self, song_tuple: Union[tuple, int], ctx):
             except AttributeError:
                 await ctx.send("❌ You are not connected to a voice channel.")
                 logger.warning("play_song: User is not in a voice channel.")
-                return
+                return False
             except Exception as e:
                 await ctx.send(f"❌ Error connecting to voice channel: {e}")
                 logger.error(f"play_song: Error connecting to voice channel - {e}")
-                return
+                return False
+        player.voice_client = voice_client
 
-        # Stop current playback if any
+        # Opus streams are passed through unless the volume has to be applied to decoded PCM
+        opus = passthrough and stream.get('codec') == 'opus'
+        try:
+            source = open_audio(stream, offset, opus)
+            logger.debug(f"play_song: Opened '{stream['url']}' ({'Opus passthrough' if opus else 'PCM'}).")
+        except Exception as e:
+            await forget_stream(song_tuple)
+            await ctx.send("❌ An error occurred while processing the audio.")
+            logger.error(f"play_song: Error creating FFmpegPCMAudio - {e}")
+            return False
+
+        if fade:
+            await self.fade_out(voice_client)
+        player.manually_stopped = False
+        # If our player is already running, switch tracks at the next frame instead of restarting it
+        gapless = self._gapless_source(voice_client)
+        if gapless is not None and gapless.is_opus() == opus:
+            gapless.switch_to(source, duration=stream['duration'], tag=song_tuple, offset=offset)
+            if voice_client.is_paused():
+                self._resume(voice_client)
+            logger.info(f"play_song: Switched to '{song_name}' by '{artist}'.")
+        else:
+            try:
+                self._start_gapless(player, ctx, voice_client, source, stream['duration'], song_tuple, offset, opus)
+                logger.info(f"play_song: Playing '{song_name}' by '{artist}'.")
+            except Exception as e:
+                await ctx.send("❌ An error occurred while trying to play the song.")
+                logger.error(f"play_song: Exception occurred - {e}")
+                return False
+
+        if not offset:
+            await ctx.send(f"🎶 Now playing: **{song_name}** by *{artist}*")
+        # Save the track for later plays, and start resolving the songs after this one
+        AUDIO_CACHE.schedule(stream.get('video_id'), stream.get('info', {}))
+        player.prefetcher.refresh()
+        return True
+
+    def _start_gapless(self, player: GuildPlayer, ctx, voice_client, source, duration, song_tuple: tuple,
+                       offset: float = 0, opus: bool = False):
+        """
+        Starts a new GaplessSource on the voice client, replacing whatever else it was playing.
+        Events of the audio thread are handed to the guild's player task as commands.
+        PCM sources run through the guild's DSP chain (volume, fades and equalizer) and crossfade into the
+        next song if the guild has a crossfade; Opus sources are sent as they are.
+        """
+        # Whatever played before is replaced; its track_end is ignored because the generation changes
+        player.generation += 1
+        generation = player.generation
         if voice_client.is_playing() or voice_client.is_paused():
+            self._end_mirrors(voice_client)
             voice_client.stop()
             logger.info("play_song: Stopped current playback.")
-            await asyncio.sleep(0.5)  # Small delay to ensure playback has stopped
-            if voice_client.is_playing():
-                await ctx.send("❌ Unable to stop the current song.")
-                logger.error("play_song: Unable to stop the current song.")
-                return
 
-        # Define FFmpeg options to prevent multiple -ac and -ar warnings
-        ffmpeg_options = {
-            'options': '-vn',  # No video
-            'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
-        }
+        loop = self.bot.loop
+        gapless = GaplessSource(
+            source,
+            duration=duration,
+            tag=song_tuple,
+            offset=offset,
+            opus=opus,
+            lead=max(GAPLESS_LEAD, self._crossfade(player) + GAPLESS_LEAD / 2),
+            crossfade=self._crossfade(player),
+            mixer=Crossfader(),
+            on_near_end=lambda tag: player.submit_threadsafe(loop, "preload", ctx, generation),
+            on_track_start=lambda tag: player.submit_threadsafe(loop, "track_started", ctx, tag),
+            accept_next=lambda tag: player.next_tag == tag,
+        )
+        audio = gapless if opus else GainSource(
+            gapless, player.volume, stages=[FadeStage(FADE_SECONDS), EqualizerStage(*player.equalizer)]
+        )
+        voice_client.play(
+            audio,
+            after=lambda error: player.submit_threadsafe(loop, "track_end", ctx, (generation, error, gapless))
+        )
+
+    async def seek_song(self, player: GuildPlayer, ctx, position: float) -> bool:
+        """
+        Restarts the current song at a position. Runs on the guild's player task.
+
+        Parameters:
+            player (GuildPlayer): The guild's player.
+            ctx (commands.Context): The context from Discord.
+            position (float): Position in seconds.
+
+        Returns:
+            bool: True if the song is now playing from the position.
+        """
+        voice_client = player.voice_client
+        gapless = self._gapless_source(voice_client) if voice_client is not None else None
+        if gapless is None:
+            return False
+        return await self.start_song(player, ctx, gapless.tag, offset=position)
+
+    def start_mirror(self, player: GuildPlayer, source_client) -> bool:
+        """
+        Plays what another voice client is playing on the guild's voice client. Runs on the guild's player task.
+        The other client's source is shared through a Broadcast, so it is read and encoded only once.
+
+        Parameters:
+            player (GuildPlayer): The guild's player, connected to a voice channel.
+            source_client (discord.VoiceClient): The voice client to mirror.
+
+        Returns:
+            bool: True if the mirror started.
+        """
+        if not (source_client.is_playing() or source_client.is_paused()):
+            return False
+        source = source_client.source
+        if isinstance(source, BroadcastListener):
+            broadcast = source.broadcast
+        else:
+            broadcast = Broadcast(source)
+            paused = source_client.is_paused()
+            if paused:
+                broadcast.pause()
+            source_client.source = broadcast.listener(primary=True)
+            if paused:
+                # Swapping the source resumes the voice client; the owner stays paused
+                source_client.pause()
+
+        voice_client = player.voice_client
+        player.generation += 1
+        if voice_client.is_playing() or voice_client.is_paused():
+            voice_client.stop()
+        voice_client.play(broadcast.listener())
+        return True
+
+    def _end_mirrors(self, voice_client):
+        """Ends the playback of servers mirroring this voice client before its source is replaced."""
+        source = voice_client.source
+        if isinstance(source, BroadcastListener) and source.primary:
+            source.broadcast.close()
+
+    def _pause(self, voice_client):
+        """Pauses the voice client and the broadcast it shares with mirroring servers."""
+        voice_client.pause()
+        source = voice_client.source
+        if isinstance(source, BroadcastListener) and source.primary:
+            source.broadcast.pause()
+
+    def _resume(self, voice_client):
+        """Resumes the voice client and the broadcast it shares with mirroring servers."""
+        source = voice_client.source
+        if isinstance(source, BroadcastListener) and source.primary:
+            source.broadcast.resume()
+        voice_client.resume()
+
+    def _owned_source(self, voice_client) -> Union[discord.AudioSource, None]:
+        """
+        Returns the source the guild's own player gave the voice client, looking through a broadcast it shares.
+        Returns None while the voice client mirrors another server.
+        """
+        source = voice_client.source
+        if isinstance(source, BroadcastListener):
+            return source.broadcast.source if source.primary else None
+        return source
+
+    def _gapless_source(self, voice_client) -> Union[GaplessSource, None]:
+        """Returns the GaplessSource the voice client is playing, or None if it is playing something else."""
+        if not (voice_client.is_playing() or voice_client.is_paused()):
+            return None
+        source = self._owned_source(voice_client)
+        if isinstance(source, GainSource):
+            source = source.original
+        return source if isinstance(source, GaplessSource) else None
+
+    @staticmethod
+    def _crossfade(player: GuildPlayer) -> float:
+        """Returns the seconds a guild's songs overlap."""
+        return CROSSFADE_SECONDS if player.crossfade is None else player.crossfade
+
+    def _needs_pcm(self, player: GuildPlayer) -> bool:
+        """Returns True if the guild's settings need decoded audio, so Opus cannot be passed through."""
+        return self._crossfade(player) > 0 or any(player.equalizer)
+
+    def _fade_stage(self, voice_client) -> Union[FadeStage, None]:
+        """Returns the fade stage of the chain the voice client is playing, None for Opus and mirrors."""
+        source = self._owned_source(voice_client) if voice_client is not None else None
+        return source.find(FadeStage) if isinstance(source, GainSource) else None
+
+    async def fade_out(self, voice_client):
+        """Fades the voice client's playback out and waits for the fade to finish."""
+        stage = self._fade_stage(voice_client)
+        if stage is not None and FADE_SECONDS > 0 and voice_client.is_playing():
+            stage.fade_out()
+            await asyncio.sleep(FADE_SECONDS)
+
+    def fade_in(self, voice_client):
+        """Fades the voice client's playback back in after fade_out."""
+        stage = self._fade_stage(voice_client)
+        if stage is not None:
+            stage.fade_in()
+
+    async def preload_next_song(self, ctx, player: GuildPlayer, generation: int):
+        """
+        Opens the stream of the next song in the queue while the current one is ending,
+        so the player can switch to it without a gap. Runs on the guild's player task.
 
-        # Create FFmpegPCMAudio source and wrap with PCMVolumeTransformer
+        Parameters:
+            ctx (commands.Context): The context from Discord.
+            player (GuildPlayer): The guild's player.
+            generation (int): The player generation that asked for the preload.
+        """
+        upcoming = player.queue.upcoming(1)
+        if not upcoming or generation != player.generation or player.voice_client is None:
+            return
+        gapless = self._gapless_source(player.voice_client)
+        if gapless is None:
+            return
+
+        song_tuple, current = upcoming[0], gapless.tag
         try:
-            source = discord.FFmpegPCMAudio(song_url, **ffmpeg_options)
-            player = PCMVolumeTransformer(source, volume=1.0)  # Default volume at 100%
-            logger.debug(f"play_song: Created PCMVolumeTransformer for '{song_url}'.")
+            stream = await player.prefetcher.resolve(song_tuple)
+            if stream.get('packets') is not None and not gapless.is_opus():
+                stream = await resolve_stream_url(song_tuple, packets=False)
         except Exception as e:
-            await ctx.send("❌ An error occurred while processing the audio.")
-            logger.error(f"play_song: Error creating PCMVolumeTransformer - {e}")
+            # The song is played the regular way when the current one ends
+            logger.warning(f"preload_next_song: Could not preload '{song_tuple[0]}' - {e}")
+            return
+        # The resolve may have taken a while; only queue the song if nothing has changed meanwhile
+        if (generation != player.generation or player.voice_client is None
+                or self._gapless_source(player.voice_client) is not gapless
+                or gapless.tag != current or player.next_tag != song_tuple):
+            logger.debug(f"preload_next_song: Dropped the preload of '{song_tuple[0]}', playback changed.")
+            return
+        if gapless.is_opus() and stream.get('codec') != 'opus':
+            # An Opus player cannot take PCM; the song starts its own player when this one ends
             return
-
-        # Define the after callback function
-        def after_playback(error):
-            if error:
-                logger.error(f"Playback error: {error}")
-                # Schedule the coroutine to send a message about the error
-                asyncio.run_coroutine_threadsafe(
-                    ctx.send(f"❌ An error occurred during playback: {error}"),
-                    self.bot.loop
-                )
-            else:
-                # Schedule the coroutine to handle the next song
-                asyncio.run_coroutine_threadsafe(
-                    self.handle_play_next(ctx),
-                    self.bot.loop
-                )
-
-        # Play the audio with the after callback
         try:
-            voice_client.play(player, after=after_playback)
-            await ctx.send(f"🎶 Now playing: **{song_name}** by *{artist}*")
-            logger.info(f"play_song: Playing '{song_name}' by '{artist}'.")
+            source = open_audio(stream, opus=gapless.is_opus())
         except Exception as e:
-            await ctx.send("❌ An error occurred while trying to play the song.")
-            logger.error(f"play_song: Exception occurred - {e}")
+            logger.warning(f"preload_next_song: Could not preload '{song_tuple[0]}' - {e}")
             return
+        gapless.queue_next(source, duration=stream['duration'], tag=song_tuple)
+        AUDIO_CACHE.schedule(stream.get('video_id'), stream.get('info', {}))
+        logger.debug(f"preload_next_song: Preloaded '{song_tuple[0]}' by '{song_tuple[1]}'.")
 
-        self.manually_stopped = False
-
-
+    async def handle_gapless_transition(self, ctx, player: GuildPlayer, song_tuple: tuple):
+        """
+        Advances the queue after the player switched to the preloaded song by itself.
+        Runs on the guild's player task.
 
+        Parameters:
+            ctx (commands.Context): The context from Discord.
+            player (GuildPlayer): The guild's player.
+            song_tuple (tuple): The song that started playing.
+        """
+        player.touch()
+        player.queue.next_song()
+        await ctx.send(f"🎶 Now playing: **{song_tuple[0]}** by *{song_tuple[1]}*")
+        logger.info(f"handle_gapless_transition: Playing '{song_tuple[0]}' by '{song_tuple[1]}'.")
 
     # -----------Commands-----------#
 
@@ -304,7 +827,7 @@ async def join(self, ctx, channel_name: str = None):
                 return
         else:
             try:
-                await channel.connect()
+                self.get_player(ctx).voice_client = await channel.connect()
                 await ctx.send(f"✅ Connected to voice channel: '{channel.name}'.")
                 logger.info(f"join: Connected to voice channel '{channel.name}'.")
             except Exception as e:
@@ -319,7 +842,8 @@ async def resume(self, ctx):
 
         voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
         if voice_client and voice_client.is_paused():
-            voice_client.resume()
+            self._resume(voice_client)
+            self.fade_in(voice_client)
             await ctx.send("▶️ Resumed the song.")
             logger.info("resume: Resumed the song.")
         else:
@@ -332,12 +856,13 @@ async def start(self, ctx):
         Function for starting the song.
         """
 
-        if self.songs_queue.get_len() == 0:
+        songs_queue = self.get_player(ctx).queue
+        if songs_queue.get_len() == 0:
             await ctx.send("❌ No songs in the queue. Please add songs to the queue.")
             logger.warning("start: No songs in the queue to play.")
             return
 
-        current_song = self.songs_queue.current_song()
+        current_song = songs_queue.current_song()
         if isinstance(current_song, int):
             await ctx.send("❌ Unable to retrieve the current song.")
             logger.error(f"start: Received error code {current_song}.")
@@ -363,16 +888,16 @@ async def add(self, ctx, source: str, *, query: str):
 
         if source == "url":
             song_tuple = (query, "Unknown", "url", query)
-            self.songs_queue.add_to_queue([song_tuple])
+            self.get_player(ctx).queue.add_to_queue([song_tuple])
             logger.info(f"add: Added URL '{query}' to the queue.")
         else:
-            metadata = fetch_spotify_metadata(query)
+            metadata = await fetch_spotify_metadata_async(query)
             if not metadata:
                 await ctx.send(f"❌ Could not find the song **{query}**.")
                 logger.warning(f"add: Song '{query}' not found in Spotify metadata.")
                 return
             song_tuple = (metadata['track_name'], metadata['artist'], source, None)
-            self.songs_queue.add_to_queue([song_tuple])
+            self.get_player(ctx).queue.add_to_queue([song_tuple])
             logger.info(f"add: Added '{metadata['track_name']}' by '{metadata['artist']}' from source '{source}' to the queue.")
 
         await ctx.send(f"✅ Added **{query}** to the queue.")
@@ -390,7 +915,7 @@ async def play(self, ctx, source: str, *, query: str):
 
         # Fetch the current song from the queue if not explicitly provided
         if source is None and query is None:
-            song_tuple = self.songs_queue.current_song()
+            song_tuple = self.get_player(ctx).queue.current_song()
 
         source = source.lower()
         if source not in ["yt", "sc", "url"]:
@@ -402,7 +927,7 @@ async def play(self, ctx, source: str, *, query: str):
             song_tuple = (query, "Unknown", "url", query)
             logger.info(f"Found Song: Playing URL '{query}' Now.")
         else:
-            metadata = fetch_spotify_metadata(query)
+            metadata = await fetch_spotify_metadata_async(query)
             if not metadata:
                 await ctx.send(f"❌ Could not find the song **{query}**.")
                 logger.warning(f"play: Song '{query}' not found in Spotify metadata.")
@@ -414,69 +939,29 @@ async def play(self, ctx, source: str, *, query: str):
             await ctx.send("❌ No valid song found in the queue.")
             logger.warning(f"play_song: Invalid song data: {song_tuple}")
             return
-        song_name, artist, source, url = song_tuple
-        logger.debug(f"play_song: Attempting to play '{song_name}' by '{artist}' from source '{source}'.")
-
-        # Determine the URL based on the source
-        if source == "url":
-            song_url = url
-        else:
-            song_url = searchSong(song_name, artist)
-
-        if not song_url:
-            await ctx.send(f"❌ Could not find the song **{song_name}**.")
-            logger.warning(f"play_song: Song URL not found for '{song_name}' by '{artist}'.")
-            return
-
-        # Get or connect to the voice client
-        voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
-        if not voice_client:
-            try:
-                channel = ctx.author.voice.channel
-                voice_client = await channel.connect()
-                logger.info(f"play_song: Connected to voice channel '{channel.name}'.")
-            except AttributeError:
-                await ctx.send("❌ You are not connected to a voice channel.")
-                logger.warning("play_song: User is not in a voice channel.")
-                return
-
-        if voice_client.is_playing():
-            voice_client.stop()
-
-        # Fetch and play the audio source
-        try:
-            async with ctx.typing():
-                audio_data = await get_audio_source(song_url, song_name, artist, loop=self.bot.loop, stream=True)
-                if audio_data is None:
-                    await ctx.send("❌ Could not retrieve the audio source.")
-                    logger.error(f"play_song: Failed to retrieve audio for '{song_name}'.")
-                    return
-                player, data = audio_data
-                voice_client.play(player, after=lambda _: asyncio.run_coroutine_threadsafe(self.next_song(ctx), self.bot.loop))
-                await ctx.send(f"🎶 Now playing: **{song_name}** by *{artist}* ({source}).")
-                logger.info(f"play_song: Playing '{song_name}' by '{artist}' ({source}).")
-        except Exception as e:
-            await ctx.send("❌ An error occurred while trying to play the song.")
-            logger.error(f"play_song: Exception occurred - {e}")
+        logger.debug(f"play_song: Attempting to play '{song_tuple[0]}' by '{song_tuple[1]}' from source '{source}'.")
 
+        # The guild's player task searches, extracts and starts the song
+        async with ctx.typing():
+            await self.play_song(song_tuple, ctx)
 
-    async def fetch_and_add_song(self, song_name):
+    async def fetch_and_add_song(self, ctx, song_name):
         """
-        Asynchronously fetches song metadata and adds it to the queue.
+        Asynchronously fetches song metadata and adds it to the guild's queue.
 
         Parameters:
+            ctx (commands.Context): The context from Discord.
             song_name (str): Name of the song.
 
         Returns:
             tuple or None: Song tuple if added, None otherwise.
         """
-        # Fetch metadata in a separate thread
-        loop = asyncio.get_event_loop()
-        metadata = await loop.run_in_executor(None, fetch_spotify_metadata, song_name)
+        # Fetch metadata without blocking the event loop
+        metadata = await fetch_spotify_metadata_async(song_name)
         logger.info(f"metadata:'{metadata}'.")
         if metadata:
             song_tuple = (metadata['track_name'], metadata['artist'], 'spotify', None)
-            self.songs_queue.add_to_queue([song_tuple])
+            self.get_player(ctx).queue.add_to_queue([song_tuple])
             logger.info(f"fetch_and_add_song: Added '{song_tuple[0]}' by '{song_tuple[1]}' to the queue.")
             return song_tuple
         else:
@@ -491,7 +976,8 @@ async def pause(self, ctx):
 
         voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
         if voice_client and voice_client.is_playing():
-            voice_client.pause()
+            await self.fade_out(voice_client)
+            self._pause(voice_client)
             await ctx.send("⏸️ Paused the song.")
             logger.info("pause: Paused the song.")
         else:
@@ -506,8 +992,9 @@ async def stop(self, ctx):
 
         voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
         if voice_client and voice_client.is_playing():
-            self.manually_stopped = True
-            voice_client.stop()
+            player = self.get_player(ctx)
+            player.voice_client = voice_client
+            await player.submit("stop", ctx)
             await ctx.send("⏹️ Stopped the song.")
             logger.info("stop: Stopped the song.")
         else:
@@ -521,7 +1008,8 @@ async def next_song_command(self, ctx):
         """
 
         # Handle empty queue
-        empty_queue = await self.songs_queue.handle_empty_queue(ctx)
+        player = self.get_player(ctx)
+        empty_queue = await player.queue.handle_empty_queue(ctx)
         if empty_queue:
             return
 
@@ -533,19 +1021,13 @@ async def next_song_command(self, ctx):
             logger.warning("next_song_command: Bot is not connected to any voice channel.")
             return
 
-        if voice_client.is_playing():
-            voice_client.stop()  # Stop the currently playing song
-            logger.info("next_song_command: Stopped the current song.")
-
-        # Retrieve the next song from the queue
-        next_song = self.songs_queue.next_song()
-        if isinstance(next_song, int):
+        # The player task advances the queue and switches to the next song
+        next_song = await player.submit("skip", ctx)
+        if not isinstance(next_song, tuple):
             await ctx.send("❌ Unable to retrieve the next song.")
             logger.error(f"next_song_command: Received error code {next_song}.")
             return
 
-        # Play the next song
-        await self.play_song(next_song, ctx)
         logger.info(f"next_song_command: Skipped to the next song '{next_song[0]}' by '{next_song[1]}'.")
         await ctx.send(f"✅ Skipped to **{next_song[0]}** by *{next_song[1]}*.")
 
@@ -556,7 +1038,8 @@ async def prev_song_command(self, ctx):
         """
 
         # Handle empty queue
-        empty_queue = await self.songs_queue.handle_empty_queue(ctx)
+        player = self.get_player(ctx)
+        empty_queue = await player.queue.handle_empty_queue(ctx)
         if empty_queue:
             return
 
@@ -568,19 +1051,13 @@ async def prev_song_command(self, ctx):
             logger.warning("prev_song_command: Bot is not connected to any voice channel.")
             return
 
-        if voice_client.is_playing():
-            voice_client.stop()  # Stop the currently playing song
-            logger.info("prev_song_command: Stopped the current song.")
-
-        # Retrieve the previous song from the queue
-        prev_song = self.songs_queue.prev_song()
-        if isinstance(prev_song, int):
+        # The player task moves back in the queue and switches to the previous song
+        prev_song = await player.submit("prev", ctx)
+        if not isinstance(prev_song, tuple):
             await ctx.send("❌ Unable to retrieve the previous song.")
             logger.error(f"prev_song_command: Received error code {prev_song}.")
             return
 
-        # Play the previous song
-        await self.play_song(prev_song, ctx)
         logger.info(f"prev_song_command: Moved to the previous song '{prev_song[0]}' by '{prev_song[1]}'.")
         await ctx.send(f"✅ Moved to previous song: **{prev_song[0]}** by *{prev_song[1]}*.")
 
@@ -591,7 +1068,8 @@ async def replay_song(self, ctx):
         """
 
         # Handle empty queue
-        empty_queue = await self.songs_queue.handle_empty_queue(ctx)
+        songs_queue = self.get_player(ctx).queue
+        empty_queue = await songs_queue.handle_empty_queue(ctx)
         if empty_queue:
             return
 
@@ -603,12 +1081,8 @@ async def replay_song(self, ctx):
             logger.warning("replay_song: Bot is not connected to any voice channel.")
             return
 
-        if voice_client.is_playing():
-            voice_client.stop()  # Stop the currently playing song
-            logger.info("replay_song: Stopped the current song for replay.")
-
         # Retrieve the current song from the queue
-        current_song = self.songs_queue.current_song()
+        current_song = songs_queue.current_song()
         if isinstance(current_song, int):
             await ctx.send("❌ Unable to retrieve the current song.")
             logger.error(f"replay_song: Received error code {current_song}.")
@@ -644,14 +1118,126 @@ async def volume(self, ctx, volume: int):
             logger.warning(f"volume: Invalid volume level {volume}.")
             return
 
-        # Access the PCMVolumeTransformer
-        if isinstance(voice_client.source, PCMVolumeTransformer):
-            voice_client.source.volume = volume / 100.0
+        # The player task applies the volume to the current and all following songs
+        player = self.get_player(ctx)
+        player.voice_client = voice_client
+        if await player.submit("volume", ctx, volume / 100.0):
             await ctx.send(f"🔊 Volume set to {volume}%")
             logger.info(f"volume: Volume set to {volume}%.")
         else:
             await ctx.send("❌ Unable to adjust volume.")
-            logger.error("volume: Current audio source is not a PCMVolumeTransformer.")
+            logger.error("volume: Current audio source is not a GainSource.")
+
+    @commands.command(name="seek", help="Jumps to a position in the current song.\nUsage: !seek <seconds>")
+    async def seek(self, ctx, seconds: int):
+        """
+        Restarts the current song at a position.
+
+        Parameters:
+            seconds (int): Position in seconds from the start of the song.
+        """
+        voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
+        if not voice_client or not (voice_client.is_playing() or voice_client.is_paused()):
+            await ctx.send("❌ No audio is playing currently.")
+            logger.warning("seek: No audio is playing.")
+            return
+
+        if seconds < 0:
+            await ctx.send("❌ Please provide a position of 0 seconds or more.")
+            logger.warning(f"seek: Invalid position {seconds}.")
+            return
+
+        player = self.get_player(ctx)
+        player.voice_client = voice_client
+        if await player.submit("seek", ctx, seconds):
+            await ctx.send(f"⏩ Jumped to {seconds // 60}:{seconds % 60:02d}.")
+            logger.info(f"seek: Jumped to {seconds} seconds.")
+        else:
+            await ctx.send("❌ Unable to seek in the current song.")
+            logger.warning("seek: Current audio source does not support seeking.")
+
+    @commands.command(name="eq", help="Sets the bass and treble in dB, from -12 to 12.\nUsage: !eq <bass> <treble>")
+    async def equalizer(self, ctx, bass: int, treble: int):
+        """
+        Sets the equalizer of the server's playback. 0 0 turns it off.
+
+        Parameters:
+            bass (int): Gain of the bass in dB (-12 to 12).
+            treble (int): Gain of the treble in dB (-12 to 12).
+        """
+        if not (-12 <= bass <= 12 and -12 <= treble <= 12):
+            await ctx.send("❌ Please provide bass and treble between -12 and 12 dB.")
+            logger.warning(f"equalizer: Invalid gains {bass} {treble}.")
+            return
+
+        # The player task applies the equalizer to the current and all following songs
+        player = self.get_player(ctx)
+        player.voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild) or player.voice_client
+        await player.submit("equalizer", ctx, (float(bass), float(treble)))
+        await ctx.send(f"🎚️ Bass set to {bass:+d} dB, treble to {treble:+d} dB.")
+        logger.info(f"equalizer: Set bass {bass} dB, treble {treble} dB.")
+
+    @commands.command(name="crossfade", help="Sets how many seconds songs overlap, from 0 to 10.\nUsage: !crossfade <seconds>")
+    async def crossfade(self, ctx, seconds: int):
+        """
+        Sets how long the end of a song is blended into the start of the next. 0 plays them back to back.
+
+        Parameters:
+            seconds (int): Length of the crossfade (0 to 10).
+        """
+        if not 0 <= seconds <= 10:
+            await ctx.send("❌ Please provide a crossfade between 0 and 10 seconds.")
+            logger.warning(f"crossfade: Invalid length {seconds}.")
+            return
+
+        player = self.get_player(ctx)
+        player.voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild) or player.voice_client
+        await player.submit("crossfade", ctx, float(seconds))
+        await ctx.send(f"🔀 Crossfade set to {seconds} seconds." if seconds else "🔀 Crossfade turned off.")
+        logger.info(f"crossfade: Set to {seconds} seconds.")
+
+    @commands.command(name="amplify", help="Plays what the bot is playing in another server in your voice channel too.\nUsage: !amplify <server_id>")
+    async def amplify(self, ctx, guild_id: int):
+        """
+        Mirrors the playback of another server in the author's voice channel, e.g. to use several speakers.
+
+        Parameters:
+            guild_id (int): The id of the server whose playback to mirror.
+        """
+        source_guild = self.bot.get_guild(guild_id)
+        if source_guild is None or source_guild == ctx.guild:
+            await ctx.send("❌ Please provide the id of another server the bot is in.")
+            logger.warning(f"amplify: Invalid server id {guild_id}.")
+            return
+
+        if source_guild.get_member(ctx.author.id) is None:
+            await ctx.send("❌ You are not a member of that server.")
+            logger.warning(f"amplify: Author is not a member of server {guild_id}.")
+            return
+
+        source_client = discord.utils.get(self.bot.voice_clients, guild=source_guild)
+        if not source_client or not (source_client.is_playing() or source_client.is_paused()):
+            await ctx.send("❌ The bot is not playing anything in that server.")
+            logger.warning(f"amplify: Nothing is playing in server {guild_id}.")
+            return
+
+        voice_client = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
+        if not voice_client:
+            try:
+                voice_client = await ctx.author.voice.channel.connect()
+            except AttributeError:
+                await ctx.send("❌ You are not connected to a voice channel.")
+                logger.warning("amplify: User is not in a voice channel.")
+                return
+
+        player = self.get_player(ctx)
+        player.voice_client = voice_client
+        if await player.submit("mirror", ctx, source_client):
+            await ctx.send(f"🔊 Playing along with **{source_guild.name}**.")
+            logger.info(f"amplify: Mirroring server {guild_id}.")
+        else:
+            await ctx.send("❌ Unable to play along with that server.")
+            logger.warning(f"amplify: Could not mirror server {guild_id}.")
 
     @commands.command(name='mood', help='Recommend songs based on your mood or activity.\nUsage: !mood')
     async def mood_recommend(self, ctx):
@@ -703,17 +1289,8 @@ def check(reaction, user):
             logger.warning("mood_recommend: User did not respond in time.")
             return
 
-        # Define mood filters based on EDA analysis.
-        mood_map = {
-            'happy': {'valence': (0.7, 1.0), 'energy': (0.5, 1.0)},
-            'sad': {'sadness': (0.5, 1), 'valence': (0.0, 0.3), 'energy': (0.2, 0.5)},
-            'party': {'danceability': (0.7, 1.0), 'valence': (0.6, 1.0), 'energy': (0.6, 1.0)},
-            'chill': {'acousticness': (0.6, 1.0), 'energy': (0.1, 0.5)},
-            'romantic': {'romantic': (0.5, 1.0), 'valence': (0.2, 0.5)},
-        }
-
-        filters = mood_map[selected_mood]
-        recommended_songs = get_recommended_songs_based_on_mood(filters)
+        # Mood presets are precomputed bitmaps over the catalog (see get_all.MOOD_PRESETS).
+        recommended_songs = get_recommended_songs_for_mood(selected_mood)
         logger.info(f"recommended_songs: {recommended_songs}")
 
         if not recommended_songs:
@@ -761,9 +1338,10 @@ def check(reaction, user):
             return
 
         # Add recommendations to queue and play.
-        self.songs_queue.clear()
-        self.songs_queue.add_to_queue(song_tuples)
-        current_song = self.songs_queue.current_song()
+        songs_queue = self.get_player(ctx).queue
+        songs_queue.clear()
+        songs_queue.add_to_queue(song_tuples)
+        current_song = songs_queue.current_song()
         await self.play_song(current_song, ctx)
         logger.info(f"mood_recommend: Added and playing recommended songs for mood '{selected_mood}'.")
 
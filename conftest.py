@@ -4,6 +4,7 @@
 
 import os
 import sys
+import tempfile
 
 import discord.ext.test as dpytest
 import pytest_asyncio
@@ -17,6 +18,9 @@
 root_dir = d(d(abspath("test/test_bot.py")))
 sys.path.append(root_dir)
 
+# Keep the lookup caches of test runs out of the data directory
+os.environ.setdefault("CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="enigma-tests-"), "cache.sqlite3"))
+
 
 @pytest_asyncio.fixture
 async def bot():
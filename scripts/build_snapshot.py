@@ -0,0 +1,41 @@
+"""
+Compiles the song datasets into binary catalog snapshots.
+The bot maps a snapshot instead of parsing the CSV file whenever the snapshot is up to date.
+
+Usage: python scripts/build_snapshot.py [csv_file ...]
+Without arguments, songs.csv and tcc_ceds_music.csv in DATA_DIR (default ./data) are compiled.
+"""
+
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.helpers.snapshot import snapshot_path, write_snapshot  # noqa: E402
+
+DATA_DIR = os.getenv("DATA_DIR", "./data")
+DATASETS = ["songs.csv", "tcc_ceds_music.csv"]
+
+
+def build(csv_path):
+    """
+    Compiles one CSV dataset into a snapshot next to it.
+    """
+    stat = os.stat(csv_path)
+    frame = pd.read_csv(csv_path)
+    write_snapshot(frame, snapshot_path(csv_path), source_version=(stat.st_mtime_ns, stat.st_size))
+    print(f"{csv_path}: {len(frame)} rows -> {snapshot_path(csv_path)}")
+
+
+def main():
+    paths = sys.argv[1:] or [os.path.join(DATA_DIR, name) for name in DATASETS]
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"{path}: not found, skipping.")
+            continue
+        build(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import time
+import threading
+import discord
+from cogs.helpers.audio import GaplessSource, ReadAheadSource, FRAME_SIZE, FRAME_SECONDS
+
+
+class FakeSource(discord.AudioSource):
+    """PCM source that plays a fixed number of frames filled with one byte value."""
+
+    def __init__(self, frames, fill=0):
+        self.frames = frames
+        self.frame = bytes([fill]) * FRAME_SIZE
+        self.cleaned = False
+
+    def read(self):
+        if self.frames <= 0:
+            return b""
+        self.frames -= 1
+        return self.frame
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_switches_to_queued_track_at_frame_boundary():
+    """
+    Test that the queued track's first frame directly follows the last frame of the current one.
+    """
+    first, second = FakeSource(2, fill=1), FakeSource(2, fill=2)
+    started = []
+    player = GaplessSource(first, tag="first", on_track_start=started.append)
+    player.queue_next(second, tag="second")
+
+    frames = [player.read() for _ in range(5)]
+    assert [frame[:1] for frame in frames] == [b"\x01", b"\x01", b"\x02", b"\x02", b""]
+    assert started == ["second"]
+    assert wait_for(lambda: first.cleaned)
+
+
+def test_rejected_next_track_ends_the_source():
+    """
+    Test that the source ends instead of playing a queued track the queue no longer wants next.
+    """
+    second = FakeSource(2)
+    player = GaplessSource(FakeSource(1), tag="first", accept_next=lambda tag: False)
+    player.queue_next(second, tag="second")
+
+    assert len(player.read()) == FRAME_SIZE
+    assert player.read() == b""
+    assert wait_for(lambda: second.cleaned)
+
+
+def test_near_end_callback_fires_once():
+    """
+    Test that on_near_end fires once when the current track enters its last lead seconds.
+    """
+    near_end = []
+    player = GaplessSource(FakeSource(10), duration=10 * FRAME_SECONDS, tag="first",
+                           lead=3 * FRAME_SECONDS, on_near_end=near_end.append)
+    for _ in range(6):
+        player.read()
+    assert near_end == []
+    player.read()
+    player.read()
+    assert near_end == ["first"]
+
+
+def test_switch_to_replaces_current_track():
+    """
+    Test that switch_to takes over on the next read and drops the queued track.
+    """
+    first, queued, skipped_to = FakeSource(5, fill=1), FakeSource(5), FakeSource(1, fill=3)
+    player = GaplessSource(first, tag="first")
+    player.queue_next(queued, tag="queued")
+    player.read()
+
+    player.switch_to(skipped_to, tag="skipped_to")
+    assert player.read()[:1] == b"\x03"
+    assert player.tag == "skipped_to"
+    assert player.read() == b""
+    assert wait_for(lambda: first.cleaned and queued.cleaned)
+
+
+class FakeOpusSource(discord.AudioSource):
+    """Opus source returning packets of varying length."""
+
+    def __init__(self, packets):
+        self.packets = list(packets)
+
+    def read(self):
+        return self.packets.pop(0) if self.packets else b""
+
+    def is_opus(self):
+        return True
+
+
+def test_opus_packets_pass_through():
+    """
+    Test that an Opus player forwards packets of any length and tracks its position from the seek offset.
+    """
+    near_end = []
+    player = GaplessSource(FakeOpusSource([b"\xfc" * 60, b"\xfc" * 7]), duration=30, tag="first", offset=29.97,
+                           opus=True, lead=0, on_near_end=near_end.append)
+    player.queue_next(FakeOpusSource([b"\xfc" * 90]), tag="second")
+
+    assert player.is_opus()
+    assert [len(player.read()) for _ in range(4)] == [60, 7, 90, 0]
+    assert near_end == ["first"]
+
+
+class StallingSource(FakeSource):
+    """PCM source that blocks on a given frame until released."""
+
+    def __init__(self, frames, stall_at):
+        super().__init__(frames, fill=1)
+        self.stall_at = stall_at
+        self.released = threading.Event()
+
+    def read(self):
+        if self.frames == self.stall_at:
+            self.released.wait(1.0)
+        return super().read()
+
+
+def test_read_ahead_plays_silence_while_the_stream_stalls():
+    """
+    Test that a stalled stream yields silent frames, counted as underruns, instead of blocking the reader.
+    """
+    stalling = StallingSource(4, stall_at=2)
+    source = ReadAheadSource(stalling, seconds=10 * FRAME_SECONDS)
+    assert source.read()[:1] == b"\x01"
+    assert wait_for(lambda: source.buffered == 1)
+    assert source.read()[:1] == b"\x01"
+    assert source.read() == b"\x00" * FRAME_SIZE
+    assert source.underruns == 1
+
+    stalling.released.set()
+    assert wait_for(lambda: source.buffered == 2)
+    assert source.fill_level == 0.2
+    assert [source.read()[:1] for _ in range(3)] == [b"\x01", b"\x01", b""]
+    source.cleanup()
+    assert stalling.cleaned
+
+
+def test_read_ahead_stops_at_buffer_capacity():
+    """
+    Test that the reader thread buffers no more than its capacity.
+    """
+    inner = FakeSource(100)
+    source = ReadAheadSource(inner, seconds=5 * FRAME_SECONDS)
+    assert wait_for(lambda: source.buffered == 5)
+    time.sleep(0.05)
+    assert inner.frames == 95
+    source.cleanup()
+
+
+def test_crossfade_overlaps_the_next_track():
+    """
+    Test that the queued track starts crossfade seconds before the current one ends and both are mixed.
+    """
+    mixed = []
+
+    def mixer(outgoing, incoming, start, end):
+        mixed.append((outgoing[:1], incoming[:1], start, end))
+        return incoming
+
+    started = []
+    first, second = FakeSource(10, fill=1), FakeSource(5, fill=2)
+    player = GaplessSource(first, duration=10 * FRAME_SECONDS, tag="first", crossfade=2 * FRAME_SECONDS,
+                           mixer=mixer, on_track_start=started.append)
+    player.queue_next(second, tag="second")
+
+    frames = [player.read()[:1] for _ in range(10)]
+    assert frames == [b"\x01"] * 8 + [b"\x02"] * 2
+    assert mixed == [(b"\x01", b"\x02", 0.0, 0.5), (b"\x01", b"\x02", 0.5, 1.0)]
+    assert started == ["second"] and player.tag == "second"
+    assert [player.read()[:1] for _ in range(4)] == [b"\x02", b"\x02", b"\x02", b""]
+    assert wait_for(lambda: first.cleaned)
+
+
+def test_underruns_do_not_advance_the_position():
+    """
+    Test that silence played during a stall is not counted as played track time.
+    """
+    stalling = StallingSource(4, stall_at=2)
+    player = GaplessSource(ReadAheadSource(stalling, seconds=10 * FRAME_SECONDS), duration=4 * FRAME_SECONDS)
+    player.read()
+    assert wait_for(lambda: player._current.buffered == 1)
+    player.read()
+    assert player.read() == b"\x00" * FRAME_SIZE
+    assert player.read() == b"\x00" * FRAME_SIZE
+    assert player.position == 2 * FRAME_SECONDS
+
+    stalling.released.set()
+    assert wait_for(lambda: player._current.buffered == 2)
+    player.read()
+    assert player.position == 3 * FRAME_SECONDS
+    player.cleanup()
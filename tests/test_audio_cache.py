@@ -0,0 +1,73 @@
+import os
+import json
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from cogs.helpers.audio_cache import AudioFileCache
+
+
+def write_entry(directory, vid, size, mtime):
+    path = os.path.join(directory, f"{vid}.webm")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    with open(os.path.join(directory, f"{vid}.json"), "w") as f:
+        json.dump({"file": f"{vid}.webm", "duration": 120, "codec": "opus"}, f)
+    os.utime(path, (mtime, mtime))
+
+
+def test_lookup_reads_existing_files(tmp_path):
+    """
+    Test that files saved by an earlier run are found, and that a disabled cache finds nothing.
+    """
+    write_entry(tmp_path, "abc", 10, 1000)
+    cache = AudioFileCache(str(tmp_path), max_bytes=100)
+    assert cache.lookup("abc") == {"url": os.path.join(tmp_path, "abc.webm"), "duration": 120, "codec": "opus", "local": True}
+    assert cache.lookup("missing") is None
+    assert AudioFileCache(str(tmp_path), max_bytes=0).lookup("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_download_evicts_least_recently_played(tmp_path):
+    """
+    Test that a downloaded stream is cached and that the least recently played file makes room for it.
+    """
+    write_entry(tmp_path, "old", 40, 1000)
+    write_entry(tmp_path, "recent", 40, 2000)
+    cache = AudioFileCache(str(tmp_path), max_bytes=100)
+    cache.lookup("old")  # Playing it makes "recent" the least recently played file
+
+    async def audio(request):
+        return web.Response(body=b"\1" * 30)
+
+    app = web.Application()
+    app.router.add_get("/audio", audio)
+    async with TestServer(app) as server:
+        task = cache.schedule("new", {"url": str(server.make_url("/audio")), "ext": "webm", "duration": 60})
+        assert cache.schedule("new", {"url": "ignored"}) is None  # Already downloading
+        await task
+
+    assert cache.lookup("new")["duration"] == 60
+    with open(cache.lookup("new")["url"], "rb") as f:
+        assert f.read() == b"\1" * 30
+    assert cache.lookup("recent") is None
+    assert not os.path.exists(os.path.join(tmp_path, "recent.webm"))
+    assert cache.lookup("old") is not None
+    assert cache.size == 70
+
+
+@pytest.mark.asyncio
+async def test_async_access_matches_the_synchronous_api(tmp_path):
+    """
+    Test that lookup_async finds and refreshes files like lookup, and that remove_async deletes them.
+    """
+    write_entry(tmp_path, "abc", 10, 1000)
+    cache = AudioFileCache(str(tmp_path), max_bytes=100)
+    assert await cache.lookup_async("abc") == {"url": os.path.join(tmp_path, "abc.webm"), "duration": 120,
+                                               "codec": "opus", "local": True}
+    assert os.path.getmtime(os.path.join(tmp_path, "abc.webm")) > 1000
+    assert await cache.lookup_async("missing") is None
+
+    await cache.remove_async("abc")
+    assert await cache.lookup_async("abc") is None
+    assert not os.path.exists(os.path.join(tmp_path, "abc.webm"))
+    assert not os.path.exists(os.path.join(tmp_path, "abc.json"))
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from cogs.helpers.bitmaps import Bitmap, range_bitmap
+from cogs.helpers.catalog import Catalog
+
+
+def test_bitmap_set_operations():
+    """
+    Test that bitmaps combine with AND/OR and count their rows.
+    """
+    a = Bitmap.from_rows(np.array([0, 3, 9, 10]), 11)
+    b = Bitmap.from_rows(np.array([3, 4, 10]), 11)
+    assert (a & b).rows().tolist() == [3, 10]
+    assert (a | b).rows().tolist() == [0, 3, 4, 9, 10]
+    assert (a | b).count() == 5
+
+
+def test_bitmap_sample():
+    """
+    Test that sampling draws distinct rows of the set only.
+    """
+    rows = np.arange(0, 1000, 7)
+    bitmap = Bitmap.from_rows(rows, 1000)
+    sample = bitmap.sample(50)
+    assert len(set(sample.tolist())) == 50
+    assert set(sample.tolist()) <= set(rows.tolist())
+    assert sorted(bitmap.sample(10000).tolist()) == rows.tolist()
+
+
+def test_range_bitmap():
+    """
+    Test that range bitmaps are built from the sorted column index.
+    """
+    snapshot = Catalog.from_frame(pd.DataFrame({"release_date": [1999, 2010, 2015, np.nan]})).snapshot()
+    assert range_bitmap(snapshot, "release_date", 2010, 2020).rows().tolist() == [1, 2]
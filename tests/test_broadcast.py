@@ -0,0 +1,136 @@
+from unittest.mock import MagicMock, patch
+import discord
+from discord.opus import OPUS_SILENCE
+from cogs.helpers.broadcast import Broadcast, BroadcastListener
+from cogs.helpers.players import GuildPlayer
+
+# Patch Spotify before importing the Songs cog
+with patch("spotipy.oauth2.SpotifyClientCredentials", MagicMock()), \
+     patch("cogs.helpers.utils.spotify", MagicMock()):
+    from cogs.songs_cog import Songs
+
+
+class CountingSource(discord.AudioSource):
+    """Source that returns numbered packets and counts its reads."""
+
+    def __init__(self, count, opus=True):
+        self.count = count
+        self.reads = 0
+        self.opus = opus
+        self.cleaned = False
+
+    def read(self):
+        if self.reads >= self.count:
+            return b""
+        self.reads += 1
+        return bytes([self.reads])
+
+    def is_opus(self):
+        return self.opus
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+def test_listeners_share_each_packet():
+    """
+    Test that every listener gets every packet while the source is read only once per packet.
+    """
+    source = CountingSource(3)
+    broadcast = Broadcast(source)
+    first, second = broadcast.listener(primary=True), broadcast.listener()
+
+    packets = [(first.read(), second.read()) for _ in range(4)]
+    assert packets == [(b"\x01", b"\x01"), (b"\x02", b"\x02"), (b"\x03", b"\x03"), (b"", b"")]
+    assert source.reads == 3
+
+    first.cleanup()
+    assert not source.cleaned
+    second.cleanup()
+    second.cleanup()
+    assert source.cleaned
+
+
+def test_pcm_is_encoded_once_and_late_listeners_skip_ahead():
+    """
+    Test that PCM frames are encoded once for all listeners and that a listener behind the backlog jumps forward.
+    """
+    encoder = MagicMock()
+    encoder.encode.side_effect = lambda pcm, samples: b"opus" + pcm
+    broadcast = Broadcast(CountingSource(10, opus=False), encoder=encoder, backlog=2)
+    leader, follower = broadcast.listener(primary=True), broadcast.listener()
+
+    assert follower.read() == b"opus\x01"
+    assert [leader.read() for _ in range(4)] == [b"opus\x01", b"opus\x02", b"opus\x03", b"opus\x04"]
+    assert follower.read() == b"opus\x03"
+    assert encoder.encode.call_count == 4
+
+    broadcast.close()
+    assert leader.read() == b"" and follower.read() == b""
+
+
+def test_paused_broadcast_plays_silence_without_reading():
+    """
+    Test that mirrors of a paused owner get silence, and that no packet is lost when the owner resumes.
+    """
+    source = CountingSource(5)
+    broadcast = Broadcast(source)
+    owner, mirror = broadcast.listener(primary=True), broadcast.listener()
+    assert (owner.read(), mirror.read()) == (b"\x01", b"\x01")
+
+    broadcast.pause()
+    assert [mirror.read() for _ in range(60)] == [OPUS_SILENCE] * 60
+    assert source.reads == 1
+
+    broadcast.resume()
+    assert (owner.read(), mirror.read()) == (b"\x02", b"\x02")
+
+
+class FakeVoiceClient:
+    """Voice client that, like discord.py, pauses and resumes the player when its source is swapped."""
+
+    def __init__(self, source=None, paused=False):
+        self._source = source
+        self._paused = paused
+        self.played = None
+
+    @property
+    def source(self):
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        self._paused = True
+        self._source = value
+        self._paused = False
+
+    def is_playing(self):
+        return self._source is not None and not self._paused
+
+    def is_paused(self):
+        return self._source is not None and self._paused
+
+    def pause(self):
+        self._paused = True
+
+    def stop(self):
+        self._source = None
+
+    def play(self, source):
+        self._source = source
+        self._paused = False
+
+
+def test_mirroring_a_paused_owner_keeps_it_paused():
+    """
+    Test that starting a mirror of a paused owner leaves both the owner's voice client and the broadcast paused.
+    """
+    owner = FakeVoiceClient(CountingSource(5), paused=True)
+    player = GuildPlayer(2)
+    player.voice_client = FakeVoiceClient()
+
+    assert Songs(MagicMock()).start_mirror(player, owner)
+    assert isinstance(owner.source, BroadcastListener) and owner.source.primary
+    assert owner.is_paused()
+    assert owner.source.broadcast.paused
+    assert player.voice_client.source.read() == OPUS_SILENCE
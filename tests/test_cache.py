@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch
+from cogs.helpers.cache import MISSING, PersistentCache
+
+
+def test_cache_survives_restart(tmp_path):
+    """
+    Test that cached values are read back from the file by a new cache instance.
+    """
+    path = str(tmp_path / "cache.sqlite3")
+    PersistentCache(path, "metadata", ttl=60).set("hey soul sister", {"artist": "Train"})
+    assert PersistentCache(path, "metadata", ttl=60).get("hey soul sister") == {"artist": "Train"}
+    assert PersistentCache(path, "metadata", ttl=60).get("missing") is MISSING
+
+
+def test_cache_expiry(tmp_path):
+    """
+    Test that entries expire after their own TTL.
+    """
+    cache = PersistentCache(str(tmp_path / "cache.sqlite3"), "metadata", ttl=60)
+    cache.set("found", {"artist": "Train"})
+    cache.set("not found", {}, ttl=1)
+    with patch("cogs.helpers.cache.time.time", return_value=cache._memory["found"][0] - 30):
+        assert cache.get("not found") is MISSING
+        assert cache.get("found") == {"artist": "Train"}
+
+
+def test_cache_memory_lru_and_delete(tmp_path):
+    """
+    Test that the in-memory LRU is bounded and that deleted keys are gone from the file too.
+    """
+    cache = PersistentCache(str(tmp_path / "cache.sqlite3"), "metadata", ttl=60, max_memory=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert list(cache._memory) == ["b", "c"]
+    assert cache.get("a") == "a"  # Served from the file
+    cache.delete("a")
+    assert cache.get("a") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_cache_async_reads_and_writes(tmp_path):
+    """
+    Test that get_async and set_async see the same entries as get and set, including ones only in the file.
+    """
+    path = str(tmp_path / "cache.sqlite3")
+    await PersistentCache(path, "metadata", ttl=60).set_async("hey soul sister", {"artist": "Train"})
+    cache = PersistentCache(path, "metadata", ttl=60)
+    assert await cache.get_async("hey soul sister") == {"artist": "Train"}  # Read from the file
+    assert await cache.get_async("missing") is MISSING
+    assert cache.get("hey soul sister") == {"artist": "Train"}
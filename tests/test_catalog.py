@@ -0,0 +1,66 @@
+import os
+import pytest
+import pandas as pd
+from unittest.mock import patch
+from cogs.helpers.catalog import Catalog, get_catalog
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_catalog_loads_once(tmp_path):
+    """
+    Test that the dataset is parsed only once while the file is unchanged.
+    """
+    path = tmp_path / "songs.csv"
+    write_csv(path, {"track_name": ["Song1"], "artist": ["Artist1"]})
+    catalog = Catalog(str(path))
+
+    with patch("cogs.helpers.catalog.pd.read_csv", wraps=pd.read_csv) as mock_read_csv:
+        first = catalog.frame
+        second = catalog.frame
+    assert mock_read_csv.call_count == 1
+    assert first is second
+
+
+def test_catalog_reloads_on_change(tmp_path):
+    """
+    Test that a changed file is reloaded and that an old snapshot stays consistent.
+    """
+    path = tmp_path / "songs.csv"
+    write_csv(path, {"track_name": ["Song1"], "artist": ["Artist1"]})
+    catalog = Catalog(str(path))
+    old_snapshot = catalog.snapshot()
+
+    write_csv(path, {"track_name": ["Song1", "Song2"], "artist": ["Artist1", "Artist2"]})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert len(catalog.frame) == 2
+    assert len(old_snapshot.frame) == 1
+
+
+def test_catalog_missing_file(tmp_path):
+    """
+    Test that a missing dataset raises FileNotFoundError.
+    """
+    catalog = Catalog(str(tmp_path / "missing.csv"))
+    with pytest.raises(FileNotFoundError):
+        catalog.snapshot()
+
+
+def test_get_catalog_shared(tmp_path):
+    """
+    Test that the same file always maps to the same catalog.
+    """
+    path = str(tmp_path / "songs.csv")
+    assert get_catalog(path) is get_catalog(path)
+
+
+def test_catalog_from_frame():
+    """
+    Test that an in-memory catalog serves its frame.
+    """
+    frame = pd.DataFrame({"track_name": ["Song1"]})
+    assert Catalog.from_frame(frame).frame is frame
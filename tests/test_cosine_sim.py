@@ -161,9 +161,9 @@ def test_search_song_no_results(mock_videos_search):
     assert youtube_url == ""
 
 
-@patch("cogs.helpers.utils.retrieve_song_attributes")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
 def test_cosine_similarity_with_identical_songs(mock_retrieve):
-    mock_retrieve.return_value = [1] * 22
+    mock_retrieve.return_value = np.ones((2, 22))
     song_name1 = "Same Song"
     artist_name1 = "Same Artist"
     song_name2 = "Same Song"
@@ -174,9 +174,9 @@ def test_cosine_similarity_with_identical_songs(mock_retrieve):
     assert actual_cosine_similarity == 1.0
 
 
-@patch("cogs.helpers.utils.retrieve_song_attributes")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
 def test_cosine_similarity_with_zero_vectors(mock_retrieve):
-    mock_retrieve.return_value = [0] * 22
+    mock_retrieve.return_value = np.zeros((2, 22))
     song_name1 = "Song A"
     artist_name1 = "Artist A"
     song_name2 = "Song B"
@@ -216,3 +216,13 @@ def test_search_song_edge_case(mock_search_song):
     mock_search_song.return_value = "https://youtube.com/edge_case_song"
     youtube_url = utils.searchSong("", "")
     assert youtube_url == "https://youtube.com/edge_case_song"
+
+
+@patch("cogs.helpers.utils.retrieve_attributes_alternate")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
+def test_cosine_similarity_looks_both_songs_up_at_once(mock_batch, mock_alternate):
+    mock_batch.return_value = np.array([[1.0, 0.0], [1.0, 1.0]])
+    similarity = utils.cosine_similarity("cry", "johnnie ray", "the carioca", "les paul")
+    mock_batch.assert_called_once_with([("cry", "johnnie ray"), ("the carioca", "les paul")])
+    mock_alternate.assert_not_called()
+    assert similarity == pytest.approx(1 / np.sqrt(2))
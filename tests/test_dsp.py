@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import discord
+from cogs.helpers.audio import FRAME_SIZE
+from cogs.helpers.dsp import (
+    GainSource, DspSource, FadeStage, EqualizerStage, Crossfader, loudness_gain, SAMPLES
+)
+
+
+class ToneSource(discord.AudioSource):
+    """PCM source that plays a number of frames with every sample set to one value."""
+
+    def __init__(self, frames, value=1000):
+        self.frames = frames
+        self.frame = np.full(SAMPLES, value, dtype=np.int16).tobytes()
+
+    def read(self):
+        if self.frames <= 0:
+            return b""
+        self.frames -= 1
+        return self.frame
+
+
+def samples(data):
+    return np.frombuffer(data, dtype=np.int16)
+
+
+def test_gain_scales_and_clips():
+    """
+    Test that a fixed gain scales every sample and clips instead of wrapping around.
+    """
+    assert set(samples(GainSource(ToneSource(1), 0.5).read())) == {500}
+    assert set(samples(GainSource(ToneSource(1, value=30000), 2.0).read())) == {32767}
+    assert len(GainSource(ToneSource(1), 1.0).read()) == FRAME_SIZE
+
+
+def test_gain_change_ramps():
+    """
+    Test that a new gain is reached gradually over the ramp frames, without a jump inside a frame.
+    """
+    source = GainSource(ToneSource(10), 1.0, ramp_seconds=0.04)
+    source.gain = 0.0
+    first = samples(source.read())
+    assert first[0] < 1000 and first[-1] == 500
+    assert np.all(np.diff(first[::2]) <= 0)
+    assert set(samples(source.read())[-2:]) == {0}
+    assert set(samples(source.read())) == {0}
+
+
+def test_loudness_is_measured_once_at_the_end():
+    """
+    Test that the measured loudness of a full-scale tone is reported when the source ends.
+    """
+    measured = []
+    source = GainSource(ToneSource(3, value=16384), measure=True, on_measured=measured.append)
+    while source.read():
+        pass
+    source.cleanup()
+    assert measured == [pytest.approx(-6.02, abs=0.01)]
+
+
+def test_loudness_gain_limits():
+    """
+    Test that the normalization gain is 1 for unknown tracks and is limited in both directions.
+    """
+    assert loudness_gain(None, -16) == 1.0
+    assert loudness_gain(-22, -16) == pytest.approx(1.995, abs=0.001)
+    assert loudness_gain(-40, -16) == 2.0
+    assert loudness_gain(0, -16) == pytest.approx(0.25)
+
+
+def test_equalizer_is_flat_at_zero_and_scales_the_bass():
+    """
+    Test that the equalizer leaves frames untouched at 0 dB and applies the bass gain to a constant signal.
+    """
+    source = DspSource(ToneSource(1), [EqualizerStage()])
+    assert source.read() == ToneSource(1).read()
+
+    source = DspSource(ToneSource(5), [EqualizerStage(bass_db=6.0)])
+    for _ in range(4):
+        source.read()
+    assert np.allclose(samples(source.read()), 1995, atol=2)
+
+
+def test_fade_out_and_in():
+    """
+    Test that a fade stage reaches silence and returns to full level.
+    """
+    fade = FadeStage(seconds=0.04)
+    source = DspSource(ToneSource(5), [fade])
+    fade.fade_out()
+    source.read()
+    assert set(samples(source.read())[-2:]) == {0}
+    fade.fade_in()
+    source.read()
+    assert samples(source.read())[-1] == 1000
+    assert set(samples(source.read())) == {1000}
+    assert not fade.active
+
+
+def test_crossfader_blends_with_equal_power():
+    """
+    Test that a crossfade frame starts on the outgoing track and ends on the incoming one.
+    """
+    outgoing, incoming = ToneSource(1, value=1000).read(), ToneSource(1, value=-1000).read()
+    mixed = samples(Crossfader()(outgoing, incoming, 0.0, 1.0))
+    assert mixed[0] == pytest.approx(1000, abs=5)
+    assert mixed[-1] == -1000
@@ -1,5 +1,8 @@
 import warnings
+import pandas as pd
+from unittest.mock import MagicMock, patch
 from cogs.helpers import get_all
+from cogs.helpers.catalog import CatalogSnapshot
 
 warnings.filterwarnings("ignore")
 
@@ -22,3 +25,21 @@ def test_recommend():
     print(songs)
     # test = {"track_name": "Living For Love", "genre": "dance pop"}
     assert len(songs) == 10
+
+
+def test_recommend_excludes_the_input_songs():
+    """
+    Test that recommend draws from the input genres without returning the input songs.
+    """
+    frame = pd.DataFrame({
+        "track_name": [f"pop{i}" for i in range(6)] + [f"rock{i}" for i in range(6)] + ["jazz"],
+        "genre": ["pop"] * 6 + ["rock"] * 6 + ["jazz"],
+    })
+    catalog = MagicMock(snapshot=MagicMock(return_value=CatalogSnapshot(frame)))
+    with patch.object(get_all, "TCC_CATALOG", catalog):
+        songs = get_all.recommend(["pop0", "rock0", "unknown"])
+        assert sorted(songs) == [f"pop{i}" for i in range(1, 6)] + [f"rock{i}" for i in range(1, 6)]
+
+        songs = get_all.recommend(["pop0", "pop1"])
+        assert sorted(songs[:4]) == ["pop2", "pop3", "pop4", "pop5"]
+        assert not {"pop0", "pop1"} & set(songs)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from cogs.helpers.catalog import CatalogSnapshot
+from cogs.helpers.indexes import GenreIndex, KeyIndex, SortedColumnIndex, TrigramIndex, find_first_row, normalize_name
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "track_name": ["Hey, Soul Sister", "Don't Stop  Believin'", "hey soul sister", np.nan],
+        "artist": ["Train", "Journey", " TRAIN", "Nobody"],
+    })
+
+
+def test_normalize_name():
+    """
+    Test that names are casefolded, stripped of punctuation and whitespace-collapsed.
+    """
+    assert normalize_name("  Don't Stop  Believin'!") == "dont stop believin"
+    assert normalize_name("STRASSE") == normalize_name("straße")
+    assert normalize_name(None) == ""
+
+
+def test_key_index_lookup():
+    """
+    Test exact lookups through the key index.
+    """
+    index = KeyIndex(sample_frame())
+    assert index.all_rows("HEY SOUL SISTER", "train").tolist() == [0, 2]
+    assert index.row("dont stop believin", "journey") == 1
+    assert index.row("Missing", "Nobody") is None
+    assert index.rows([("Missing", "Nobody"), ("Hey, Soul Sister", "Train")]).tolist() == [-1, 0]
+
+
+def test_key_index_without_columns():
+    """
+    Test that a dataset without track_name/artist columns gives an empty index.
+    """
+    index = KeyIndex(pd.DataFrame({"valence": [0.5]}))
+    assert len(index) == 0
+    assert index.row("Song1", "Artist1") is None
+
+
+def test_trigram_index_substring_search():
+    """
+    Test case-insensitive substring search through the trigram index.
+    """
+    index = TrigramIndex(sample_frame()["track_name"])
+    names = [index._names[i] for i in index.names_containing("SOUL")]
+    assert names == ["hey, soul sister", "hey soul sister"]
+    assert index.names_containing("sister hey").size == 0
+    assert index.names_containing("") is None
+    assert len(index.names_containing("'")) == 1
+
+
+def test_trigram_index_short_queries():
+    """
+    Test that queries too short for trigrams find exactly the values containing them, never a match
+    spanning two values.
+    """
+    names = pd.Series(["ab", "ba", "", "xa", "Bx", np.nan, "c"])
+    index = TrigramIndex(names)
+    for query in ["a", "B", "ab", "ba", "ax", "xb", "c", "z", "ac"]:
+        expected = [i for i, name in enumerate(index._names) if query.lower() in name]
+        assert index.candidates(query).tolist() == expected
+        assert index.names_containing(query).tolist() == expected
+
+
+def test_trigram_index_ignores_regex_metacharacters():
+    """
+    Test that regex metacharacters in the query are matched literally.
+    """
+    index = TrigramIndex(pd.Series(["What's (Up)?", "Whats Up"]))
+    assert index.names_containing("(up)?").tolist() == [0]
+    assert index.names_containing(".*").size == 0
+
+
+def test_find_first_row():
+    """
+    Test that the first row matching both the track and the artist is returned.
+    """
+    snapshot = CatalogSnapshot(sample_frame())
+    assert find_first_row(snapshot, "soul", "train") == 0
+    assert find_first_row(snapshot, "soul", " train") == 2
+    assert find_first_row(snapshot, "", "journey") == 1
+    assert find_first_row(snapshot, "soul", "journey") is None
+
+
+def test_genre_index():
+    """
+    Test that a track belongs to the genre of its last row and that sampling skips excluded names.
+    """
+    frame = pd.DataFrame({
+        "track_name": ["a", "b", "c", "a", "d"],
+        "genre": ["pop", "rock", "pop", "rock", "rock"],
+    })
+    index = GenreIndex(frame)
+    assert index.name_id("missing") is None
+    assert index.names[index.same_genre(index.name_id("a"))].tolist() == ["a", "b", "d"]
+    assert index.names[index.same_genre(index.name_id("c"))].tolist() == ["c"]
+    assert sorted(index.sample_names(10, exclude=[index.name_id("a")])) == ["b", "c", "d"]
+
+
+def test_sorted_column_index():
+    """
+    Test that range lookups are inclusive and never match missing values.
+    """
+    index = SortedColumnIndex(pd.Series([0.5, np.nan, 0.2, 0.9, 0.5]))
+    assert sorted(index.rows_between(0.2, 0.5).tolist()) == [0, 2, 4]
+    assert index.rows_between(0.95, 1.0).tolist() == []
+    assert index.rows_between(0.6, 0.4).tolist() == []
+    assert index.mask_between(np.array([1, 3]), 0.0, 1.0).tolist() == [False, True]
@@ -2,11 +2,18 @@
 import unittest
 from unittest.mock import patch
 from cogs.songs_cog import get_recommended_songs_based_on_mood
+from cogs.helpers import get_all
+from cogs.helpers.catalog import Catalog
 
 
 class TestSongsCog(unittest.TestCase):
-    @patch('pandas.read_csv')
-    def test_get_recommended_songs_based_on_mood_happy(self, mock_read_csv):
+    def use_dataset(self, frame):
+        # Serve the frame from the shared catalog instead of tcc_ceds_music.csv
+        patcher = patch.object(get_all, 'TCC_CATALOG', Catalog.from_frame(frame))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_recommended_songs_based_on_mood_happy(self):
         # Mock dataset with required columns
         mock_data = pd.DataFrame({
             'track_name': ['Song1', 'Song2', 'Song3', 'Song4', 'Song5'],
@@ -14,7 +21,7 @@ def test_get_recommended_songs_based_on_mood_happy(self, mock_read_csv):
             'valence': [0.8, 0.9, 0.6, 0.85, 0.75],
             'energy': [0.7, 0.8, 0.65, 0.9, 0.85]
         })
-        mock_read_csv.return_value = mock_data
+        self.use_dataset(mock_data)
 
         # Define filters for happy mood
         filters = {'valence': (0.7, 1.0), 'energy': (0.5, 1.0)}
@@ -31,8 +38,7 @@ def test_get_recommended_songs_based_on_mood_happy(self, mock_read_csv):
         ]
         self.assertEqual(result, expected)
 
-    @patch('pandas.read_csv')
-    def test_get_recommended_songs_based_on_mood_sad(self, mock_read_csv):
+    def test_get_recommended_songs_based_on_mood_sad(self):
         # Mock dataset with required columns
         mock_data = pd.DataFrame({
             'track_name': ['Song1', 'Song2', 'Song3', 'Song4', 'Song5'],
@@ -41,7 +47,7 @@ def test_get_recommended_songs_based_on_mood_sad(self, mock_read_csv):
             'valence': [0.2, 0.4, 0.3, 0.25, 0.1],
             'energy': [0.3, 0.45, 0.5, 0.2, 0.15]
         })
-        mock_read_csv.return_value = mock_data
+        self.use_dataset(mock_data)
 
         # Define filters for sad mood
         filters = {'sadness': (0.5, 1), 'valence': (0.0, 0.3), 'energy': (0.2, 0.5)}
@@ -57,10 +63,9 @@ def test_get_recommended_songs_based_on_mood_sad(self, mock_read_csv):
         ]
         self.assertEqual(result, expected)
 
-    @patch('pandas.read_csv')
-    def test_get_recommended_songs_based_on_empty_dataset(self, mock_read_csv):
+    def test_get_recommended_songs_based_on_empty_dataset(self):
         # Mock empty dataset
-        mock_read_csv.return_value = pd.DataFrame(columns=['track_name', 'artist', 'valence', 'energy'])
+        self.use_dataset(pd.DataFrame(columns=['track_name', 'artist', 'valence', 'energy']))
 
         # Define filters
         filters = {'valence': (0.7, 1.0), 'energy': (0.5, 1.0)}
@@ -71,15 +76,14 @@ def test_get_recommended_songs_based_on_empty_dataset(self, mock_read_csv):
         # Validate results
         self.assertEqual(result, [])
 
-    @patch('pandas.read_csv')
-    def test_get_recommended_songs_with_missing_columns(self, mock_read_csv):
+    def test_get_recommended_songs_with_missing_columns(self):
         # Mock dataset missing a required column
         mock_data = pd.DataFrame({
             'track_name': ['Song1', 'Song2'],
             'valence': [0.8, 0.9],
             'energy': [0.7, 0.8]
         })
-        mock_read_csv.return_value = mock_data
+        self.use_dataset(mock_data)
 
         # Define filters
         filters = {'valence': (0.7, 1.0), 'energy': (0.5, 1.0)}
@@ -90,8 +94,7 @@ def test_get_recommended_songs_with_missing_columns(self, mock_read_csv):
             self.assertEqual(result, [])
             self.assertIn("Dataset is missing required columns", log.output[0])
 
-    @patch('pandas.read_csv')
-    def test_get_recommended_songs_invalid_filter(self, mock_read_csv):
+    def test_get_recommended_songs_invalid_filter(self):
         # Mock dataset
         mock_data = pd.DataFrame({
             'track_name': ['Song1', 'Song2', 'Song3'],
@@ -99,7 +102,7 @@ def test_get_recommended_songs_invalid_filter(self, mock_read_csv):
             'valence': [0.8, 0.9, 0.6],
             'energy': [0.7, 0.8, 0.65]
         })
-        mock_read_csv.return_value = mock_data
+        self.use_dataset(mock_data)
 
         # Define invalid filters
         filters = {'invalid_column': (0.7, 1.0)}
@@ -115,3 +118,35 @@ def test_get_recommended_songs_invalid_filter(self, mock_read_csv):
         ]
         self.assertEqual(result, expected)
 
+    def test_get_recommended_songs_shuffled(self):
+        # Mock dataset with more matches than the limit
+        mock_data = pd.DataFrame({
+            'track_name': [f'Song{i}' for i in range(50)],
+            'artist': [f'Artist{i}' for i in range(50)],
+            'valence': [i / 50 for i in range(50)],
+        })
+        self.use_dataset(mock_data)
+
+        # Only songs 35..49 have valence >= 0.7
+        result = get_recommended_songs_based_on_mood({'valence': (0.7, 1.0)}, limit=10, shuffle=True)
+
+        self.assertEqual(len(result), 10)
+        self.assertEqual(len(set(result)), 10)
+        self.assertTrue(all(int(track[4:]) >= 35 for track, _ in result))
+
+    def test_get_recommended_songs_for_mood_preset(self):
+        # Mock dataset where only Song1 and Song3 are happy, and only Song3 is recent
+        mock_data = pd.DataFrame({
+            'track_name': ['Song1', 'Song2', 'Song3'],
+            'artist': ['Artist1', 'Artist2', 'Artist3'],
+            'release_date': [1990, 2012, 2015],
+            'valence': [0.8, 0.2, 0.9],
+            'energy': [0.7, 0.8, 0.65]
+        })
+        self.use_dataset(mock_data)
+
+        self.assertEqual(sorted(get_all.get_recommended_songs_for_mood('happy')),
+                         [('Song1', 'Artist1'), ('Song3', 'Artist3')])
+        self.assertEqual(get_all.get_recommended_songs_for_mood('happy', {'release_date': (2010, 2020)}),
+                         [('Song3', 'Artist3')])
+        self.assertEqual(get_all.get_recommended_songs_for_mood('unknown'), [])
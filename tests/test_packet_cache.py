@@ -0,0 +1,84 @@
+import discord
+from cogs.helpers.packet_cache import PacketCache, CachedOpusSource
+
+
+class FakeOpusSource(discord.AudioSource):
+    """Opus source returning a fixed list of packets."""
+
+    def __init__(self, packets):
+        self.packets = list(packets)
+        self.cleaned = False
+
+    def read(self):
+        return self.packets.pop(0) if self.packets else b""
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+def play(source):
+    packets = []
+    while True:
+        data = source.read()
+        if not data:
+            break
+        packets.append(data)
+    source.cleanup()
+    return packets
+
+
+def test_played_track_is_served_from_memory():
+    """
+    Test that a track recorded to its end is cached and replayed packet for packet, also from an offset.
+    """
+    cache = PacketCache(max_bytes=1000)
+    packets = [bytes([i]) * 10 for i in range(5)]
+    recorder = cache.record("abc", FakeOpusSource(packets))
+    assert cache.get("abc") is None
+    assert play(recorder) == packets
+    assert recorder.source.cleaned
+
+    track = cache.get("abc")
+    assert track is not None and cache.size == 50
+    assert play(cache.open(track)) == packets
+    assert play(cache.open(track, offset=0.06)) == packets[3:]
+    assert track.refs == 0
+
+
+def test_skipped_track_is_not_cached():
+    """
+    Test that a recording stopped before the end of the track is dropped.
+    """
+    cache = PacketCache(max_bytes=1000)
+    recorder = cache.record("abc", FakeOpusSource([b"x" * 10] * 5))
+    recorder.read()
+    recorder.cleanup()
+    assert cache.get("abc") is None
+    assert cache.size == 0
+
+
+def test_budget_evicts_idle_tracks_but_not_playing_ones():
+    """
+    Test that a new recording evicts the least recently played idle track, keeps tracks that are
+    being played, and is given up if there is no room.
+    """
+    cache = PacketCache(max_bytes=100)
+    play(cache.record("a", FakeOpusSource([b"a" * 40])))
+    play(cache.record("b", FakeOpusSource([b"b" * 40])))
+    playing = cache.open(cache.get("a"))
+
+    play(cache.record("c", FakeOpusSource([b"c" * 40])))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    play(cache.record("d", FakeOpusSource([b"d" * 40])))
+    assert cache.get("a") is not None
+    assert cache.get("d") is not None and cache.get("c") is None
+
+    play(cache.record("e", FakeOpusSource([b"e" * 40] * 2)))
+    assert cache.get("e") is None
+    assert cache.size <= 100
+    assert isinstance(playing, CachedOpusSource) and playing.read() == b"a" * 40
@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from cogs.helpers.players import PlayerRegistry
+
+
+def guild(guild_id):
+    g = MagicMock()
+    g.id = guild_id
+    return g
+
+
+def test_players_are_per_guild():
+    """
+    Test that each guild lazily gets its own player and queue.
+    """
+    registry = PlayerRegistry()
+    first = registry.get(guild(1))
+    first.queue.add_to_queue(("Song1", "Artist1", "yt", None))
+
+    assert registry.get(1) is first
+    assert registry.get(guild(2)).queue.get_len() == 0
+    assert len(registry) == 2
+    assert guild(2) in registry
+
+
+@pytest.mark.asyncio
+async def test_idle_players_are_evicted():
+    """
+    Test that only players that are idle past the timeout are evicted, and that closing one leaves the channel.
+    """
+    registry = PlayerRegistry(idle_timeout=60)
+    idle, playing, recent = registry.get(1), registry.get(2), registry.get(3)
+    idle.voice_client = MagicMock(is_playing=MagicMock(return_value=False), is_paused=MagicMock(return_value=False),
+                                  is_connected=MagicMock(return_value=True), disconnect=AsyncMock())
+    playing.voice_client = MagicMock(is_playing=MagicMock(return_value=True))
+    idle.last_used = playing.last_used = 0
+    recent.last_used = 100
+
+    evicted = registry.evict_idle(now=120)
+    assert evicted == [idle]
+    assert 1 not in registry and 2 in registry and 3 in registry
+
+    voice_client = idle.voice_client
+    await idle.close()
+    voice_client.disconnect.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_player_task_handles_commands_in_order():
+    """
+    Test that commands are handled one at a time in submission order, including those posted from other threads.
+    """
+    import asyncio
+    import threading
+
+    handled = []
+
+    async def handler(player, command):
+        handled.append(command.kind)
+        await asyncio.sleep(0)
+        if command.kind == "fail":
+            raise RuntimeError("boom")
+        return command.value
+
+    player = PlayerRegistry().get(1)
+    player.start(handler)
+    first = player.submit("play", value="song")
+    failed = player.submit("fail")
+    thread = threading.Thread(target=player.submit_threadsafe, args=(asyncio.get_running_loop(), "track_end"))
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0)  # Let the loop pick up the post from the thread
+    last = player.submit("skip", value="next")
+
+    assert await first == "song"
+    assert await failed is None
+    assert await last == "next"
+    assert handled == ["play", "fail", "track_end", "skip"]
+    task = player.task
+    await player.close()
+    assert player.task is None
+    await asyncio.gather(task, return_exceptions=True)
+    assert task.cancelled()
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from cogs.helpers.prefetcher import Prefetcher
+from cogs.helpers.songs_queue import Songs_Queue
+
+
+def song(i):
+    return (f"Song{i}", f"Artist{i}", "yt", None)
+
+
+@pytest.fixture
+def queue():
+    sq = Songs_Queue()
+    sq.clear()
+    yield sq
+    sq.prefetcher = None
+    sq.clear()
+
+
+def test_upcoming(queue):
+    """
+    Test that upcoming wraps around and never includes the current song.
+    """
+    queue.add_to_queue([song(1), song(2), song(3)])
+    queue.next_song()
+    assert queue.upcoming(2) == [song(3), song(1)]
+    assert queue.upcoming(5) == [song(3), song(1)]
+
+
+@pytest.mark.asyncio
+async def test_prefetcher_follows_the_queue(queue):
+    """
+    Test that the next entries are resolved in the background and stale work is cancelled on reorder.
+    """
+    started, cancelled = [], []
+
+    async def resolve(entry):
+        started.append(entry)
+        try:
+            await asyncio.sleep(0 if entry == song(2) else 10)
+        except asyncio.CancelledError:
+            cancelled.append(entry)
+            raise
+        return entry[0]
+
+    Prefetcher(resolve, depth=1).attach(queue)
+    queue.add_to_queue([song(1), song(2), song(3)])
+    await asyncio.sleep(0.01)
+    assert started == [song(2)]
+    assert queue.prefetcher.is_ready(song(2))
+
+    # Moving Song3 up makes it the next song; its prefetch replaces Song2's
+    queue.move_song_by_index(2, 1)
+    await asyncio.sleep(0.01)
+    assert started == [song(2), song(3)]
+
+    queue.remove_at_index(1)
+    await asyncio.sleep(0.01)
+    assert cancelled == [song(3)]
+    assert await queue.prefetcher.resolve(song(2)) == "Song2"
@@ -22,9 +22,10 @@ def test_recommend_enhanced_two_songs():
     assert len(songs) == 10
 
 
-def test_random_recommendations():
+def test_deterministic_recommendations():
     """
-    This function tests the enhanced recommendation system
+    This function tests that the enhanced recommendation system returns the best matches,
+    not a random sample
     """
 
     input_songs = [("the carioca", "les paul")]
@@ -36,4 +37,5 @@ def test_random_recommendations():
     print(songs2)
     assert len(songs2) == 10
 
-    assert songs1 != songs2
+    assert songs1 == songs2
+    assert ("the carioca", "les paul") not in songs1
@@ -2,10 +2,12 @@
 
 import pytest
 import asyncio
+import importlib
 from unittest.mock import AsyncMock, MagicMock, patch
 from discord.ext import commands
 from discord import Embed, Message
 from cogs.recommender_cog import Recommender
+from cogs.helpers.players import PlayerRegistry
 
 # Use pytest-asyncio for testing async functions
 @pytest.mark.asyncio
@@ -20,20 +22,21 @@ def bot(self):
 
     @pytest.fixture
     def cog(self, bot):
-        # Initialize the Recommender cog with the mock bot
-        return Recommender(bot)
+        # Initialize the Recommender cog with the mock bot; the class is looked up now, as the
+        # bot tests reload the extension and the patches target the reloaded module
+        return importlib.import_module("cogs.recommender_cog").Recommender(bot)
 
     @patch('cogs.recommender_cog.utils.random_n')
-    @patch('cogs.recommender_cog.Songs_Queue')
+    @patch('cogs.recommender_cog.PLAYERS')
     async def test_poll_command_success(
-        self, mock_songs_queue, mock_random_n, cog, bot
+        self, mock_players, mock_random_n, cog, bot
     ):
         """
         Test the successful execution of the poll command.
         Ensures that a poll with up to 10 songs is created and reactions are added.
         """
-        # Mock the Songs_Queue instance
-        mock_queue_instance = mock_songs_queue.return_value
+        # Mock the guild's queue
+        mock_queue_instance = mock_players.get.return_value.queue
 
         # Mock random_n to return a DataFrame-like object with 10 songs
         mock_songs = MagicMock()
@@ -52,8 +55,8 @@ async def test_poll_command_success(
         ctx.fetch_message = AsyncMock()
 
         # Set previous message IDs
-        cog.message_id = 123
-        cog.command_msg_id = 456
+        mock_players.get.return_value.poll_message_id = 123
+        mock_players.get.return_value.poll_command_msg_id = 456
 
         # Mock fetching and deleting previous messages
         with patch.object(ctx, 'fetch_message', new=AsyncMock(return_value=MagicMock(delete=AsyncMock()))):
@@ -93,8 +96,9 @@ async def test_poll_command_success(
                 poll_message_instance.add_reaction.assert_any_call(reaction_emoji)
 
     @patch('cogs.recommender_cog.utils.random_n')
+    @patch('cogs.recommender_cog.PLAYERS', new_callable=PlayerRegistry)
     async def test_poll_command_no_songs(
-        self, mock_random_n, cog, bot
+        self, mock_players, mock_random_n, cog, bot
     ):
         """
         Test the poll command when no songs are available.
@@ -111,10 +115,6 @@ async def test_poll_command_no_songs(
         ctx = MagicMock()
         ctx.send = AsyncMock()
 
-        # Reset message IDs
-        cog.message_id = None
-        cog.command_msg_id = None
-
         # Access the underlying callback of the 'poll' command
         command = cog.poll.callback
         await command(cog, ctx)
@@ -122,10 +122,10 @@ async def test_poll_command_no_songs(
         # Assert that ctx.send was called with the no songs message
         ctx.send.assert_called_with("❌ No songs available to poll.")
 
-    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata')
-    @patch('cogs.recommender_cog.Songs_Queue')
+    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata_async', new_callable=AsyncMock)
+    @patch('cogs.recommender_cog.PLAYERS')
     async def test_myrecommend_command_more_than_10_songs(
-        self, mock_songs_queue, mock_fetch_spotify_metadata, cog, bot
+        self, mock_players, mock_fetch_spotify_metadata, cog, bot
     ):
         """
         Test the myrecommend command when more than 10 songs are provided.
@@ -145,10 +145,10 @@ async def test_myrecommend_command_more_than_10_songs(
         # Assert that the user was informed about the limit
         ctx.send.assert_called_with("❌ You can specify up to 10 songs only.")
 
-    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata')
-    @patch('cogs.recommender_cog.Songs_Queue')
+    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata_async', new_callable=AsyncMock)
+    @patch('cogs.recommender_cog.PLAYERS')
     async def test_myrecommend_command_no_songs_provided(
-        self, mock_songs_queue, mock_fetch_spotify_metadata, cog, bot
+        self, mock_players, mock_fetch_spotify_metadata, cog, bot
     ):
         """
         Test the myrecommend command when no song names are provided.
@@ -169,19 +169,19 @@ async def test_myrecommend_command_no_songs_provided(
         ctx.send.assert_called_with("❌ Please provide at least one song name.")
 
 
-    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata')
-    @patch('cogs.recommender_cog.Songs_Queue')
+    @patch('cogs.recommender_cog.utils.fetch_spotify_metadata_async', new_callable=AsyncMock)
+    @patch('cogs.recommender_cog.PLAYERS')
     async def test_myrecommend_command_all_songs_not_found(
-        self, mock_songs_queue, mock_fetch_spotify_metadata, cog, bot
+        self, mock_players, mock_fetch_spotify_metadata, cog, bot
     ):
         """
         Test the myrecommend command when none of the songs are found on Spotify.
         Ensures that no songs are added and appropriate warnings are sent.
         """
-        # Mock the Songs_Queue instance
-        mock_queue_instance = mock_songs_queue.return_value
+        # Mock the guild's queue
+        mock_queue_instance = mock_players.get.return_value.queue
 
-        # Mock fetch_spotify_metadata to return None for all songs
+        # Mock fetch_spotify_metadata_async to return None for all songs
         mock_fetch_spotify_metadata.return_value = None
 
         # Create a mock context
@@ -195,7 +195,7 @@ async def test_myrecommend_command_all_songs_not_found(
         command = cog.myrecommend.callback
         await command(cog, ctx, song_names=song_names)
 
-        # Assert that fetch_spotify_metadata was called for each song
+        # Assert that fetch_spotify_metadata_async was called for each song
         assert mock_fetch_spotify_metadata.call_count == 2
 
         # Assert that no songs were added to the queue
@@ -205,3 +205,41 @@ async def test_myrecommend_command_all_songs_not_found(
         ctx.send.assert_any_call("⚠️ Could not find 'NonExistentSong1' on Spotify.")
         ctx.send.assert_any_call("⚠️ Could not find 'NonExistentSong2' on Spotify.")
         ctx.send.assert_any_call("❌ No songs were added to the queue.")
+
+    @patch('cogs.recommender_cog.utils.random_n')
+    @patch('cogs.recommender_cog.PLAYERS', new_callable=PlayerRegistry)
+    async def test_polls_are_kept_per_guild(
+        self, mock_players, mock_random_n, cog, bot
+    ):
+        """
+        Test that a poll in one guild neither replaces nor answers the poll of another guild.
+        """
+        mock_songs = MagicMock()
+        mock_songs.filter.return_value = mock_songs
+        mock_songs.reset_index.return_value = mock_songs
+        mock_songs.empty = False
+        mock_songs.__len__.return_value = 1
+        mock_songs.iterrows.side_effect = lambda: iter([(0, {'track_name': 'Song0', 'artist': 'Artist0'})])
+        mock_random_n.return_value = mock_songs
+
+        def guild_ctx(guild_id, message_id):
+            ctx = MagicMock()
+            ctx.guild.id = guild_id
+            ctx.message.id = message_id
+            ctx.send = AsyncMock(return_value=MagicMock(id=message_id + 1, add_reaction=AsyncMock()))
+            ctx.fetch_message = AsyncMock()
+            return ctx
+
+        first, second = guild_ctx(1, 100), guild_ctx(2, 200)
+        await cog.poll.callback(cog, first)
+        await cog.poll.callback(cog, second)
+
+        # The second guild's poll did not delete the first guild's messages
+        second.fetch_message.assert_not_called()
+        assert mock_players.get(1).poll_message_id == 101
+        assert mock_players.get(2).poll_message_id == 201
+
+        # A guild without a poll is asked to run one
+        third = guild_ctx(3, 300)
+        await cog.recommend_command.callback(cog, third)
+        third.send.assert_called_with("❌ Please run the `!poll` command first to choose your preferences.")
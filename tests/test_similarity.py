@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cogs.helpers.catalog import Catalog
+from cogs.helpers.similarity import FeatureMatrix, feature_matrix
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "track_name": ["Song1", "Song2", "Song3", "Song4"],
+        "energy": [1.0, 0.9, 0.0, np.nan],
+        "valence": [0.0, 0.1, 1.0, 0.5],
+    })
+
+
+def test_feature_matrix_rows_are_unit_vectors():
+    """
+    Test that every non-empty row of the feature matrix has unit length.
+    """
+    matrix = FeatureMatrix(sample_frame(), ["energy", "valence", "missing"]).matrix
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (4, 2)
+    assert np.linalg.norm(matrix, axis=1) == pytest.approx([1.0, 1.0, 1.0, 1.0])
+
+
+def test_top_k_orders_by_similarity():
+    """
+    Test that top_k returns the most similar rows first and never the input rows.
+    """
+    matrix = FeatureMatrix(sample_frame(), ["energy", "valence"])
+    assert matrix.top_k([2], k=2) == [3, 1]
+
+
+def test_top_k_respects_candidates():
+    """
+    Test that rows outside the candidate mask are never returned.
+    """
+    matrix = FeatureMatrix(sample_frame(), ["energy", "valence"])
+    candidates = np.array([True, False, True, False])
+    assert matrix.top_k([0], k=10, candidates=candidates) == [2]
+
+
+def test_feature_matrix_cached_per_snapshot():
+    """
+    Test that the feature matrix is built once per catalog snapshot.
+    """
+    snapshot = Catalog.from_frame(sample_frame()).snapshot()
+    assert feature_matrix(snapshot, ["energy"]) is feature_matrix(snapshot, ["energy"])
@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from cogs.helpers.catalog import Catalog
+from cogs.helpers.snapshot import SnapshotTextDtype, read_snapshot, snapshot_path, write_snapshot
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "track_name": ["Hey, Soul Sister", "Café del Mar", np.nan],
+        "artist": ["Train", "Energy 52", "Unknown"],
+        "year": [2010, 1993, 2000],
+        "val": [0.8, 0.25, np.nan],
+    })
+
+
+def test_snapshot_round_trip(tmp_path):
+    """
+    Test that a snapshot reads back the same dataset, including unicode and missing values.
+    """
+    frame = sample_frame()
+    path = str(tmp_path / "songs.snap")
+    write_snapshot(frame, path)
+    loaded = read_snapshot(path)
+    pd.testing.assert_frame_equal(loaded, frame)
+
+
+def test_snapshot_numeric_columns_are_mapped(tmp_path):
+    """
+    Test that numeric columns are read-only views of the mapped file.
+    """
+    path = str(tmp_path / "songs.snap")
+    write_snapshot(sample_frame(), path)
+    year = read_snapshot(path)["year"].to_numpy()
+    assert not year.flags.writeable
+
+
+def test_catalog_prefers_snapshot(tmp_path):
+    """
+    Test that the catalog maps an up-to-date snapshot instead of parsing the CSV file.
+    """
+    csv_path = str(tmp_path / "songs.csv")
+    sample_frame().to_csv(csv_path, index=False)
+    stat = (tmp_path / "songs.csv").stat()
+    write_snapshot(pd.read_csv(csv_path), snapshot_path(csv_path), source_version=(stat.st_mtime_ns, stat.st_size))
+
+    with patch("cogs.helpers.catalog.pd.read_csv") as mock_read_csv:
+        frame = Catalog(csv_path).frame
+    mock_read_csv.assert_not_called()
+    assert frame["artist"].tolist() == ["Train", "Energy 52", "Unknown"]
+
+
+def test_catalog_ignores_stale_snapshot(tmp_path):
+    """
+    Test that the catalog falls back to the CSV file when the snapshot was built from an older version.
+    """
+    csv_path = str(tmp_path / "songs.csv")
+    sample_frame().to_csv(csv_path, index=False)
+    write_snapshot(sample_frame().head(1), snapshot_path(csv_path), source_version=(0, 0))
+
+    assert len(Catalog(csv_path).frame) == 3
+
+
+def test_catalog_falls_back_from_truncated_snapshot(tmp_path):
+    """
+    Test that a truncated or corrupt snapshot is rejected and the catalog parses the CSV file instead.
+    """
+    csv_path = str(tmp_path / "songs.csv")
+    sample_frame().to_csv(csv_path, index=False)
+    snap = snapshot_path(csv_path)
+    write_snapshot(sample_frame(), snap)
+    data = open(snap, "rb").read()
+
+    for corrupt in (data[:10], data[:20], data[:len(data) // 2], b"\0" * 64):
+        with open(snap, "wb") as f:
+            f.write(corrupt)
+        with pytest.raises(ValueError):
+            read_snapshot(snap)
+        assert len(Catalog(csv_path).frame) == 3
+
+
+def test_long_text_columns_are_decoded_on_access(tmp_path):
+    """
+    Test that long text columns stay in the mapped blob and read back the same values where they are used.
+    """
+    lyrics = ["la " * 200, np.nan, "café " * 100]
+    frame = sample_frame().assign(lyrics=lyrics)
+    path = str(tmp_path / "tcc.snap")
+    write_snapshot(frame, path)
+    loaded = read_snapshot(path)
+
+    assert isinstance(loaded["lyrics"].dtype, SnapshotTextDtype)
+    assert loaded["track_name"].dtype == object
+    assert loaded.iloc[2]["lyrics"] == "café " * 100
+    assert loaded["lyrics"].isna().tolist() == [False, True, False]
+    assert (loaded["lyrics"] == lyrics[0]).tolist() == [True, False, False]
+    assert loaded["lyrics"].str.startswith("café").tolist() == [False, np.nan, True]
+    assert loaded[["artist", "lyrics"]].iloc[[2, 0]]["lyrics"].tolist() == [lyrics[2], lyrics[0]]
+    pd.testing.assert_frame_equal(loaded.astype({"lyrics": object}), frame)
@@ -2,7 +2,6 @@
 import unittest
 from unittest.mock import AsyncMock, MagicMock, patch
 from cogs.songs_cog import Songs
-from cogs.helpers.songs_queue import Songs_Queue
 import discord
 
 
@@ -58,9 +57,9 @@ async def test_play_song(self):
         self.ctx.send.assert_called_with("❌ You are not connected to a voice channel.")
 
     async def test_handle_empty_queue(self):
-        # Mock Songs_Queue instance
-        self.songs_cog.songs_queue = MagicMock()
-        self.songs_cog.songs_queue.get_len.return_value = 0
+        # Mock the guild's queue
+        self.songs_cog.get_player = MagicMock()
+        self.songs_cog.get_player.return_value.queue.next_song.return_value = -1
 
         result = await self.songs_cog.handle_play_next(self.ctx)
         self.ctx.send.assert_called_with("❌ No more songs in the queue.")
@@ -86,7 +85,7 @@ async def test_add(self):
         query = "Test Song"
         source = "yt"
         with patch(
-            "cogs.songs_cog.fetch_spotify_metadata", return_value={"track_name": "Test Song", "artist": "Test Artist"}
+            "cogs.songs_cog.fetch_spotify_metadata_async", new_callable=AsyncMock, return_value={"track_name": "Test Song", "artist": "Test Artist"}
         ):
             await self.songs_cog.add(self.ctx, source, query=query)
             self.ctx.send.assert_called_with("✅ Added **Test Song** to the queue.")
@@ -97,27 +96,28 @@ async def test_add(self):
         self.ctx.send.assert_called_with("❌ Invalid source. Use 'yt', 'sc', or 'url'.")
 
     async def test_shuffle(self):
-        # Mock Songs_Queue instance
-        self.songs_cog.songs_queue = MagicMock()
-        self.songs_cog.songs_queue.shuffle = MagicMock()
+        # Mock the guild's queue
+        self.songs_cog.get_player = MagicMock()
+        songs_queue = self.songs_cog.get_player.return_value.queue
 
         await self.songs_cog.shuffle(self.ctx)
-        self.songs_cog.songs_queue.shuffle.assert_called_once()
+        songs_queue.shuffle.assert_called_once()
         self.ctx.send.assert_called_with("🔀 Playlist shuffled.")
 
     async def test_next_song(self):
         # Mock next_song function
-        self.songs_cog.songs_queue = MagicMock()
-        self.songs_cog.songs_queue.next_song = MagicMock(return_value=("Next Song", "Next Artist", "yt", None))
+        self.songs_cog.get_player = MagicMock()
+        player = self.songs_cog.get_player.return_value
+        player.queue.handle_empty_queue = AsyncMock(return_value=False)
+        player.submit = AsyncMock(return_value=("Next Song", "Next Artist", "yt", None))
 
-        with patch.object(self.songs_cog, "play_song") as mock_play_song:
-            await self.songs_cog.next_song_command(self.ctx)
-            mock_play_song.assert_called_once()
-            self.ctx.send.assert_called_with("✅ Skipped to **Next Song** by *Next Artist*.")
+        await self.songs_cog.next_song_command(self.ctx)
+        player.submit.assert_awaited_once_with("skip", self.ctx)
+        self.ctx.send.assert_called_with("✅ Skipped to **Next Song** by *Next Artist*.")
 
     async def test_mood(self):
         # Test mood selection
-        with patch("cogs.songs_cog.get_recommended_songs_based_on_mood", return_value=[("Mood Song", "Mood Artist", "Dataset", None)]):
+        with patch("cogs.songs_cog.get_recommended_songs_for_mood", return_value=[("Mood Song", "Mood Artist", "Dataset", None)]):
             await self.songs_cog.mood_recommend(self.ctx)
             self.ctx.send.assert_called_with("🎶 Now playing: **Mood Song** by *Mood Artist*")
 
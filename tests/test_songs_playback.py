@@ -0,0 +1,131 @@
+import pytest
+import discord
+from unittest.mock import AsyncMock, MagicMock, patch
+from cogs.helpers.players import GuildPlayer, PlayerCommand
+from cogs.helpers.dsp import GainSource, FadeStage
+from cogs.helpers.audio import FRAME_SIZE
+
+# Patch Spotify before importing the Songs cog
+with patch("spotipy.oauth2.SpotifyClientCredentials", MagicMock()), \
+     patch("cogs.helpers.utils.spotify", MagicMock()):
+    from cogs import songs_cog
+    from cogs.songs_cog import Songs
+
+
+class SilentSource(discord.AudioSource):
+    """PCM source that plays silence forever."""
+
+    def read(self):
+        return b"\x00" * FRAME_SIZE
+
+
+def playing_player(fade):
+    """Returns a GuildPlayer whose voice client plays a chain with the given fade stage."""
+    player = GuildPlayer(1)
+    player.queue.add_to_queue([("one", "a", "dataset", None), ("two", "b", "dataset", None)])
+    player.voice_client = MagicMock()
+    player.voice_client.source = GainSource(SilentSource(), stages=[fade])
+    player.voice_client.is_playing.return_value = True
+    player.voice_client.is_paused.return_value = False
+    player.prefetcher = MagicMock()
+    return player
+
+
+@pytest.mark.asyncio
+async def test_failed_skip_does_not_leave_the_song_faded_out():
+    """
+    Test that a skip resolves the next song before fading, and that a failed resolve keeps the current song audible.
+    """
+    cog = Songs(MagicMock())
+    fade = FadeStage(seconds=0.01)
+    player = playing_player(fade)
+    gain_while_resolving = []
+
+    async def resolve(song):
+        gain_while_resolving.append(fade.gain)
+        raise LookupError("not found")
+
+    player.prefetcher.resolve = resolve
+    ctx = MagicMock(send=AsyncMock())
+    await cog.handle_command(player, PlayerCommand("skip", ctx))
+
+    assert gain_while_resolving == [1.0]
+    assert fade.gain == 1.0
+    ctx.send.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_preload_is_dropped_when_playback_changed_during_the_resolve():
+    """
+    Test that a preload whose resolve outlasted a skip does not queue a song on the new player,
+    and that a queue change updates next_tag before the mutating command returns.
+    """
+    cog = Songs(MagicMock())
+    player = playing_player(FadeStage())
+    gapless = MagicMock(tag=player.queue.current_song())
+    gapless.is_opus.return_value = False
+    cog._gapless_source = MagicMock(return_value=gapless)
+
+    async def resolve(song):
+        player.generation += 1  # A skip started a new player meanwhile
+        return {'url': 'x', 'duration': 1.0, 'codec': None}
+
+    player.prefetcher.resolve = resolve
+    with patch.object(songs_cog, "open_audio") as open_audio:
+        await cog.preload_next_song(MagicMock(), player, player.generation)
+    assert player.next_tag == ("two", "b", "dataset", None)
+    gapless.queue_next.assert_not_called()
+    open_audio.assert_not_called()
+
+    player.queue.add_to_queue(("three", "c", "dataset", None))
+    player.queue.next_song()
+    assert player.next_tag == ("three", "c", "dataset", None)
+    player.queue.move_song_by_index(2, 1)  # "two" stays current and "three" moves before it
+    assert player.next_tag == ("one", "a", "dataset", None)
+    player.queue.clear()
+    assert player.next_tag is None
+
+
+@pytest.mark.asyncio
+async def test_track_that_failed_to_play_is_extracted_again():
+    """
+    Test that a track ending with an error or before its first frame forgets its cached stream and audio file,
+    while a track that played normally keeps them.
+    """
+    cog = Songs(MagicMock())
+    player = playing_player(FadeStage())
+    cog.handle_play_next = AsyncMock()
+    ctx = MagicMock(send=AsyncMock())
+    song = ("one", "a", "dataset", None)
+    with patch.object(songs_cog, "searchSong_async", AsyncMock(return_value="https://youtu.be/abc")), \
+         patch.object(songs_cog, "STREAM_CACHE") as stream_cache, \
+         patch.object(songs_cog, "AUDIO_CACHE") as audio_cache:
+        audio_cache.remove_async = AsyncMock()
+        played = MagicMock(tag=song, elapsed=120.0)
+        await cog.handle_command(player, PlayerCommand("track_end", ctx, (player.generation, None, played)))
+        stream_cache.invalidate.assert_not_called()
+        audio_cache.remove_async.assert_not_called()
+
+        rejected = MagicMock(tag=song, elapsed=0)
+        await cog.handle_command(player, PlayerCommand("track_end", ctx, (player.generation, None, rejected)))
+        stream_cache.invalidate.assert_called_once_with("https://youtu.be/abc")
+        audio_cache.remove_async.assert_called_once_with("abc")
+
+        failed = MagicMock(tag=song, elapsed=3.0)
+        await cog.handle_command(player, PlayerCommand("track_end", ctx, (player.generation, "403", failed)))
+        assert stream_cache.invalidate.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_extraction_without_audio_url_is_not_cached():
+    """
+    Test that an extraction that returned no audio URL is dropped from the stream cache.
+    """
+    with patch.object(songs_cog, "searchSong_async", AsyncMock(return_value="https://youtu.be/abc")), \
+         patch.object(songs_cog, "AUDIO_CACHE") as audio_cache, \
+         patch.object(songs_cog, "STREAM_CACHE") as stream_cache:
+        audio_cache.lookup_async = AsyncMock(return_value=None)
+        stream_cache.get = AsyncMock(return_value={'title': 'abc'})
+        with pytest.raises(Exception):
+            await songs_cog.resolve_stream_url(("one", "a", "dataset", None), packets=False)
+    stream_cache.invalidate.assert_called_once_with("https://youtu.be/abc")
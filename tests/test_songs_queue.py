@@ -1,16 +1,15 @@
 from cogs.helpers.songs_queue import Songs_Queue
 from random import shuffle
 
-def test_singleton():
+def test_queues_are_independent():
     sq1 = Songs_Queue()
     sq1.add_to_queue([("Song1", "Artist1", "source", None)])
     sq2 = Songs_Queue()
-    assert sq1 == sq2
-    assert sq1.queue == sq2.queue
+    assert sq1 is not sq2
+    assert sq2.queue == []
 
-    sq2.clear()
-    assert sq1 == sq2
-    assert sq1.queue == sq2.queue
+    sq2.add_to_queue([("Song2", "Artist2", "source", None)])
+    assert sq1.queue == [("Song1", "Artist1", "source", None)]
 
 
 def test_current_song():
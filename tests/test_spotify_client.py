@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from cogs.helpers.spotify_client import SpotifyClient
+
+
+class FakeResponse:
+    def __init__(self, status, payload, headers=None):
+        self.status = status
+        self.payload = payload
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(self.status)
+
+    async def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, search_statuses, retry_after="0"):
+        self.search_statuses = list(search_statuses)
+        self.retry_after = retry_after
+        self.token_requests = 0
+        self.searches = []
+
+    def post(self, url, **kwargs):
+        self.token_requests += 1
+        return FakeResponse(200, {"access_token": f"token{self.token_requests}", "expires_in": 3600})
+
+    def get(self, url, params=None, headers=None):
+        self.searches.append(headers["Authorization"])
+        status = self.search_statuses.pop(0) if self.search_statuses else 200
+        return FakeResponse(status, {"tracks": {"items": [{"name": params["q"]}]}}, {"Retry-After": self.retry_after})
+
+
+@pytest.mark.asyncio
+async def test_token_is_cached_between_searches():
+    """
+    Test that one token is reused for several searches.
+    """
+    client = SpotifyClient("id", "secret")
+    session = FakeSession([])
+    with patch.object(client, "_get_session", return_value=session):
+        client._token_lock = asyncio.Lock()
+        assert (await client.search_track("track:a"))["name"] == "track:a"
+        await client.search_track("track:b")
+    assert session.token_requests == 1
+    assert session.searches == ["Bearer token1", "Bearer token1"]
+
+
+@pytest.mark.asyncio
+async def test_token_is_refreshed_after_401():
+    """
+    Test that a rejected token is refreshed once and the search retried.
+    """
+    client = SpotifyClient("id", "secret")
+    session = FakeSession([401])
+    with patch.object(client, "_get_session", return_value=session):
+        client._token_lock = asyncio.Lock()
+        assert await client.search_track("track:a") == {"name": "track:a"}
+    assert session.searches == ["Bearer token1", "Bearer token2"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_search_is_retried_a_bounded_number_of_times():
+    """
+    Test that a 429 is retried after its Retry-After delay, and that the search gives up after
+    RATE_LIMIT_RETRIES retries or when Spotify asks to wait too long.
+    """
+    client = SpotifyClient("id", "secret")
+    session = FakeSession([429, 429])
+    with patch.object(client, "_get_session", return_value=session), \
+         patch("cogs.helpers.spotify_client.asyncio.sleep") as sleep:
+        client._token_lock = asyncio.Lock()
+        assert await client.search_track("track:a") == {"name": "track:a"}
+        assert len(session.searches) == 3
+        assert sleep.call_count == 2
+
+        session.search_statuses = [429, 429, 429]
+        with pytest.raises(RuntimeError):
+            await client.search_track("track:a")
+        assert sleep.call_count == 4
+
+        session.search_statuses, session.retry_after = [429], "3600"
+        with pytest.raises(RuntimeError):
+            await client.search_track("track:a")
+        assert sleep.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_session_of_another_loop_is_closed_before_replacing_it():
+    """
+    Test that the pooled session is closed, not leaked, when it is replaced for a new event loop.
+    """
+    client = SpotifyClient("id", "secret")
+    old = await client._get_session()
+    assert await client._get_session() is old
+
+    client._loop = object()  # As if the session was opened on an earlier loop
+    new = await client._get_session()
+    assert new is not old
+    assert old.closed
+
+    await client.close()
+    assert new.closed
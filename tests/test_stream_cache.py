@@ -0,0 +1,48 @@
+import time
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from cogs.helpers.stream_cache import StreamInfoCache, stream_expiry, video_id
+
+
+def media_url(expire):
+    return f"https://rr1---sn-abc.googlevideo.com/videoplayback?expire={int(expire)}&itag=251"
+
+
+def test_video_id():
+    """
+    Test that watch and short URLs of the same video share an id.
+    """
+    assert video_id("https://www.youtube.com/watch?v=abc123&t=10") == "abc123"
+    assert video_id("https://youtu.be/abc123") == "abc123"
+    assert video_id("https://soundcloud.com/artist/track") is None
+
+
+def test_stream_expiry():
+    """
+    Test that the expiry is read from the query string or the path of a media URL.
+    """
+    assert stream_expiry(media_url(1700000000)) == 1700000000
+    assert stream_expiry("https://manifest.googlevideo.com/api/manifest/expire/1700000000/ei/x") == 1700000000
+    assert stream_expiry("https://example.com/audio.mp3") is None
+
+
+@pytest.mark.asyncio
+async def test_stream_cache_reuses_extraction_until_expiry():
+    """
+    Test that extractions are reused, shared between concurrent callers and dropped before the URL expires.
+    """
+    extract = MagicMock(side_effect=lambda url: {"entries": [{"url": media_url(time.time() + 3600)}]})
+    cache = StreamInfoCache(extract, margin=300)
+
+    first, second = await asyncio.gather(cache.get("https://youtu.be/abc"), cache.get("https://youtu.be/abc"))
+    assert first is second
+    assert await cache.get("https://www.youtube.com/watch?v=abc") is first
+    assert extract.call_count == 1
+
+    cache.invalidate("https://youtu.be/abc")
+    assert cache.peek("https://youtu.be/abc") is None
+
+    # A media URL that expires within the margin is not cached
+    cache.put("https://youtu.be/def", {"url": media_url(time.time() + 60)})
+    assert cache.peek("https://youtu.be/def") is None
@@ -1,10 +1,12 @@
+import time
 import pytest
 import pandas as pd
 import numpy as np
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from cogs.helpers import utils
+from cogs.helpers.catalog import Catalog, CatalogSnapshot
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1", "Song2"] * 13}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1", "Song2"] * 13}))))
 def test_random_25(mock_songs):
     """
     Test if `random_25` retrieves exactly 25 songs when `SONGS` dataset is populated.
@@ -12,7 +14,7 @@ def test_random_25(mock_songs):
     random_songs = utils.random_25()
     assert len(random_songs) == 25
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1", "Song2"] * 10}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1", "Song2"] * 10}))))
 def test_random_n(mock_songs):
     """
     Test if `random_n` retrieves the requested number of songs from `SONGS` dataset.
@@ -20,20 +22,20 @@ def test_random_n(mock_songs):
     random_songs = utils.random_n(10)
     assert len(random_songs) == 10
 
-@patch("cogs.helpers.utils.retrieve_song_attributes")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
 def test_cosine_similarity_same_song(mock_retrieve):
-    mock_retrieve.return_value = [1, 0, 1]
+    mock_retrieve.return_value = np.array([[1, 0, 1], [1, 0, 1]])
     similarity = utils.cosine_similarity("Song1", "Artist1", "Song1", "Artist1")
     assert similarity == pytest.approx(1.0, rel=1e-9)
 
-@patch("cogs.helpers.utils.retrieve_song_attributes")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
 def test_cosine_similarity_different_songs(mock_retrieve):
-    mock_retrieve.side_effect = [[1, 0, 1], [0, 1, 0]]
+    mock_retrieve.return_value = np.array([[1, 0, 1], [0, 1, 0]])
     similarity = utils.cosine_similarity("Song1", "Artist1", "Song2", "Artist2")
     assert similarity == pytest.approx(0.0, rel=1e-9)
 
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame())
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame())))
 def test_random_n_empty_dataset(mock_songs):
     """
     Test if `random_n` handles an empty dataset gracefully.
@@ -41,12 +43,12 @@ def test_random_n_empty_dataset(mock_songs):
     random_songs = utils.random_n(5)
     assert random_songs.empty
 
-@patch("cogs.helpers.utils.retrieve_song_attributes")
+@patch("cogs.helpers.utils.retrieve_attributes_batch")
 def test_cosine_similarity_partial_overlap(mock_retrieve):
     """
     Test cosine similarity for songs with partially overlapping attributes.
     """
-    mock_retrieve.side_effect = [[1, 1, 0], [1, 0, 1]]
+    mock_retrieve.return_value = np.array([[1, 1, 0], [1, 0, 1]])
     similarity = utils.cosine_similarity("Song1", "Artist1", "Song2", "Artist2")
     expected_similarity = pytest.approx(0.5, rel=1e-9)  # Pre-calculated similarity
     assert similarity == expected_similarity
@@ -79,7 +81,7 @@ def test_searchSong_no_spotify_metadata(mock_spotify):
     # Check if the result is a valid YouTube URL
     assert "https://www.youtube.com" in youtube_url
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))))
 def test_get_full_song_name(mock_songs):
     """
     Test `get_full_song_name` for a valid song in the dataset.
@@ -87,7 +89,7 @@ def test_get_full_song_name(mock_songs):
     result = utils.get_full_song_name("Song1", "Artist1")
     assert result == ["Song1", "Artist1"]
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame(columns=["track_name", "artist"]))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame(columns=["track_name", "artist"]))))
 def test_get_full_song_name_not_found(mock_songs):
     """
     Test `get_full_song_name` when the song is not found in the dataset.
@@ -95,7 +97,7 @@ def test_get_full_song_name_not_found(mock_songs):
     result = utils.get_full_song_name("Nonexistent Song", "Nonexistent Artist")
     assert result is None
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1", "Song2"], "artist": ["Artist1", "Artist2"]}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1", "Song2"], "artist": ["Artist1", "Artist2"]}))))
 def test_random_n_larger_than_dataset(mock_songs):
     """
     Test `random_n` raises an error when requesting more songs than available.
@@ -112,7 +114,7 @@ def test_cosine_similarity_alternate_dataset(mock_retrieve):
     similarity = utils.cosine_similarity("Song1", "Artist1", "Song2", "Artist2")
     assert similarity == pytest.approx(1.0, rel=1e-9)
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))))
 def test_random_n_zero(mock_songs):
     """
     Test `random_n` when requesting zero songs.
@@ -120,10 +122,149 @@ def test_random_n_zero(mock_songs):
     random_songs = utils.random_n(0)
     assert len(random_songs) == 0  # Should return an empty DataFrame
 
-@patch("cogs.helpers.utils.SONGS", new_callable=lambda: pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))
+@patch("cogs.helpers.utils.songs_snapshot", new_callable=lambda: MagicMock(return_value=CatalogSnapshot(pd.DataFrame({"track_name": ["Song1"], "artist": ["Artist1"]}))))
 def test_random_n_negative(mock_songs):
     """
     Test `random_n` when requesting a negative number of songs.
     """
     with pytest.raises(ValueError):
         utils.random_n(-5)
+
+def attribute_catalog():
+    frame = pd.DataFrame({"track_name": ["Song1", "Song2"], "artist": ["Artist1", "Artist2"]})
+    for i, feature in enumerate(utils.TCC_FEATURES):
+        frame[feature] = [0.1 * (i % 10), 1.0]
+    return Catalog.from_frame(frame)
+
+def test_retrieve_attributes_batch():
+    """
+    Test that `retrieve_attributes_batch` returns one feature row per song and zeros for unknown songs.
+    """
+    with patch("cogs.helpers.utils.TCC_CATALOG", attribute_catalog()):
+        attributes = utils.retrieve_attributes_batch([("song2", "ARTIST2"), ("Missing", "Nobody"), ("Song1", "Artist1")])
+    assert attributes.shape == (3, len(utils.TCC_FEATURES))
+    assert np.all(attributes[0] == 1.0)
+    assert np.all(attributes[1] == 0.0)
+    assert attributes[2][1] == pytest.approx(0.1)
+
+def test_retrieve_song_attributes_real_values():
+    """
+    Test that `retrieve_song_attributes` returns the dataset values instead of placeholders.
+    """
+    with patch("cogs.helpers.utils.TCC_CATALOG", attribute_catalog()):
+        assert utils.retrieve_song_attributes("Song2", "Artist2") == [1.0] * len(utils.TCC_FEATURES)
+        assert utils.retrieve_song_attributes("Missing", "Nobody") == [0] * len(utils.TCC_FEATURES)
+
+def test_retrieve_attributes_alternate_real_values():
+    """
+    Test that `retrieve_attributes_alternate` returns the songs.csv features of a song.
+    """
+    attributes = utils.retrieve_attributes_alternate("Hey, Soul Sister", "Train")
+    assert attributes == [97, 89, 67, -4, 8, 80, 217, 19, 4, 83]
+
+def test_fetch_spotify_metadata_is_cached(tmp_path):
+    """
+    Test that repeated Spotify queries are answered from the cache, including "no result" answers.
+    """
+    cache = utils.PersistentCache(str(tmp_path / "cache.sqlite3"), "spotify_metadata", ttl=60)
+    track = {
+        "name": "Hey, Soul Sister", "artists": [{"name": "Train"}], "album": {"name": "Save Me", "release_date": "2009"},
+        "duration_ms": 216773, "popularity": 80, "external_urls": {"spotify": "https://open.spotify.com/track/1"},
+    }
+    with patch.object(utils, "SPOTIFY_CACHE", cache), patch.object(utils.spotify, "search") as mock_search:
+        mock_search.side_effect = [{"tracks": {"items": [track]}}, {"tracks": {"items": []}}]
+        first = utils.fetch_spotify_metadata("Hey Soul Sister")
+        assert utils.fetch_spotify_metadata("  hey, soul sister ") == first
+        assert utils.fetch_spotify_metadata("Nonexistent Song") == {}
+        assert utils.fetch_spotify_metadata("nonexistent song") == {}
+    assert first["artist"] == "Train"
+    assert mock_search.call_count == 2
+
+@pytest.mark.asyncio
+async def test_failed_spotify_lookup_is_not_cached(tmp_path):
+    """
+    Test that a failing Spotify search makes `fetch_spotify_metadata_async` return no metadata instead of raising,
+    and that the failure is not cached.
+    """
+    cache = utils.PersistentCache(str(tmp_path / "cache.sqlite3"), "spotify_metadata", ttl=60)
+    with patch.object(utils, "SPOTIFY_CACHE", cache), \
+            patch.object(utils.spotify_client, "search_track", AsyncMock(side_effect=[RuntimeError(429), None])) as search:
+        assert await utils.fetch_spotify_metadata_async("Hey Soul Sister") == {}
+        assert await utils.fetch_spotify_metadata_async("Hey Soul Sister") == {}
+    assert search.call_count == 2
+
+@pytest.mark.asyncio
+@patch("cogs.helpers.utils.YOUTUBE_CACHE", new_callable=lambda: MagicMock(get_async=AsyncMock(return_value=utils.MISSING)))
+async def test_searchSong_async(mock_cache):
+    """
+    Test that `searchSong_async` returns the search result and gives up on slow searches.
+    """
+    with patch("cogs.helpers.utils._search_youtube", return_value="https://www.youtube.com/watch?v=1") as mock_search:
+        assert await utils.searchSong_async("Song1", "Artist1") == "https://www.youtube.com/watch?v=1"
+        mock_search.assert_called_once_with("Song1 Artist1")
+
+    with patch("cogs.helpers.utils._search_youtube", side_effect=lambda query: time.sleep(0.5) or "late"):
+        assert await utils.searchSong_async("Song1", "Artist1", timeout=0.05) == ""
+
+@pytest.mark.asyncio
+async def test_searchSong_async_is_cached(tmp_path):
+    """
+    Test that a song is searched on YouTube once until its cached video is invalidated.
+    """
+    cache = utils.PersistentCache(str(tmp_path / "cache.sqlite3"), "youtube_video_ids", ttl=60)
+    with patch.object(utils, "YOUTUBE_CACHE", cache), \
+            patch("cogs.helpers.utils._search_youtube", return_value="https://www.youtube.com/watch?v=abc") as mock_search:
+        assert await utils.searchSong_async("Song1", "Artist1") == "https://www.youtube.com/watch?v=abc"
+        assert utils.searchSong("song1", "ARTIST1") == "https://www.youtube.com/watch?v=abc"
+        assert mock_search.call_count == 1
+
+        utils.invalidate_song_url("Song1", "Artist1")
+        await utils.searchSong_async("Song1", "Artist1")
+        assert mock_search.call_count == 2
+
+def test_symbol_only_queries_do_not_share_a_cache_entry(tmp_path):
+    """
+    Test that queries which normalize to nothing are cached under their own text, not under one "" key.
+    """
+    cache = utils.PersistentCache(str(tmp_path / "cache.sqlite3"), "spotify_metadata", ttl=60)
+    track = {
+        "name": "Hey, Soul Sister", "artists": [{"name": "Train"}], "album": {"name": "Save Me", "release_date": "2009"},
+        "duration_ms": 216773, "popularity": 80, "external_urls": {"spotify": "https://open.spotify.com/track/1"},
+    }
+    with patch.object(utils, "SPOTIFY_CACHE", cache), patch.object(utils.spotify, "search") as mock_search:
+        mock_search.side_effect = [{"tracks": {"items": [track]}}, {"tracks": {"items": []}}]
+        assert utils.fetch_spotify_metadata("!!!")["artist"] == "Train"
+        assert utils.fetch_spotify_metadata("???") == {}
+        assert utils.fetch_spotify_metadata("!!!")["artist"] == "Train"
+    assert mock_search.call_count == 2
+    assert utils._video_cache_key("♥", "") != utils._video_cache_key("★", "")
+
+def test_prepared_datasets_follow_catalog_reloads(tmp_path):
+    """
+    Test that the prepared datasets are rebuilt when the dataset file changes, and only then.
+    """
+    csv_path = tmp_path / "songs.csv"
+    columns = {column: 0 for column in utils.SONGS_COLUMNS}
+    pd.DataFrame({**columns, "track_name": [" Song1 "], "artist": ["Artist1"]}).to_csv(csv_path, index=False)
+    with patch.object(utils, "SONGS_CATALOG", Catalog(str(csv_path))):
+        first = utils.songs_snapshot()
+        assert utils.songs_snapshot() is first
+        assert utils.random_n(1)["track_name"].tolist() == ["Song1"]
+
+        pd.DataFrame({**columns, "track_name": ["Song2", "Song3"], "artist": ["Artist2", "Artist3"]}).to_csv(csv_path, index=False)
+        assert sorted(utils.random_n(2)["track_name"]) == ["Song2", "Song3"]
+
+def test_full_song_name_indexes_follow_catalog_reloads(tmp_path):
+    """
+    Test that the trigram indexes of get_full_song_name are cached on the live catalog snapshot and rebuilt on reload.
+    """
+    csv_path = tmp_path / "songs.csv"
+    columns = {column: 0 for column in utils.SONGS_COLUMNS}
+    pd.DataFrame({**columns, "track_name": ["Song1"], "artist": ["Artist1"]}).to_csv(csv_path, index=False)
+    with patch.object(utils, "SONGS_CATALOG", Catalog(str(csv_path))):
+        assert utils.get_full_song_name("song1", "artist") == ["Song1", "Artist1"]
+        first = utils.songs_snapshot().derived(("trigrams", "track_name"), None)
+
+        pd.DataFrame({**columns, "track_name": ["Song2", "Song3"], "artist": ["Artist2", "Artist3"]}).to_csv(csv_path, index=False)
+        assert utils.get_full_song_name("song3", "artist") == ["Song3", "Artist3"]
+        assert utils.songs_snapshot().derived(("trigrams", "track_name"), None) is not first